@@ -0,0 +1,280 @@
+"""
+Patent Scout command line interface
+Each subcommand imports only the subsystems it needs, so heavy
+dependencies (genai, bs4, lxml, yaml) load on demand
+"""
+
+import os
+import sys
+import json
+import argparse
+
+_SRC = os.path.dirname(os.path.abspath(__file__))
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
+
+def cmd_scan(args):
+    """Run the monthly industry scan"""
+    if args.merge:
+        from main import merge_shards
+        merge_shards(args.run_id, profiles=args.research_profile)
+        return 0
+
+    if args.shards:
+        return _scan_local_shards(args)
+
+    from main import main
+    main(full_rescan=args.full_rescan, profiles=args.research_profile,
+         time_budget=args.time_budget * 60 if args.time_budget else None,
+         shard=args.shard, run_id=args.run_id)
+    return 0
+
+def _scan_local_shards(args):
+    """Run every shard in its own process, then merge them"""
+    import subprocess
+    from utils.sharding import clear_run, default_run_id
+    from main import merge_shards
+
+    run_id = args.run_id or default_run_id()
+    # Manifests of an earlier run under this id would be merged with these
+    clear_run(run_id)
+    command = [sys.executable, os.path.abspath(__file__), 'scan', '--run-id', run_id]
+    if args.full_rescan:
+        command.append('--full-rescan')
+    if args.time_budget:
+        command += ['--time-budget', str(args.time_budget)]
+    for profile in args.research_profile or []:
+        command += ['--research-profile', profile]
+
+    processes = [subprocess.Popen(command + ['--shard', f'{index}/{args.shards}'])
+                 for index in range(1, args.shards + 1)]
+    failed = [index for index, process in enumerate(processes, 1) if process.wait() != 0]
+    if failed:
+        print(f"Shards {', '.join(map(str, failed))} of {args.shards} failed", file=sys.stderr)
+
+    merge_shards(run_id, profiles=args.research_profile)
+    return 1 if failed else 0
+
+def _shard(spec):
+    from utils.sharding import Shard
+    try:
+        return Shard.parse(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def cmd_prior_art(args):
+    """Check prior art for an invention description"""
+    if args.batch:
+        return _prior_art_batch(args)
+
+    from invention_miner.prior_art_search import check_prior_art, save_prior_art_result
+
+    invention = args.description or os.getenv('INVENTION_DESCRIPTION', '')
+    if not invention:
+        print('No invention description given (argument or INVENTION_DESCRIPTION)', file=sys.stderr)
+        return 2
+
+    print(f'Checking prior art for: {invention[:100]}... (urgency: {args.urgency})')
+    result = check_prior_art(invention, cpc_codes=args.cpc)
+
+    if not args.no_save:
+        print(f'Saved: {save_prior_art_result(result)}')
+
+    print(f'Prior art found: {len(result["prior_art_found"])} patents')
+    print(f'White space: {result["white_space"]}')
+    print(f'Recommendation: {result["recommendation"]}')
+    return 0
+
+def _prior_art_batch(args):
+    """Prior art for a file of invention descriptions (JSON list or one per line)"""
+    from invention_miner.prior_art_search import check_prior_art_batch, save_prior_art_result
+
+    with open(args.batch, 'r') as f:
+        content = f.read()
+
+    if content.lstrip().startswith(('[', '{')):
+        try:
+            inventions = json.loads(content)
+        except ValueError as e:
+            print(f'{args.batch} is not valid JSON: {e}', file=sys.stderr)
+            return 2
+        if not isinstance(inventions, list) or not all(isinstance(i, str) for i in inventions):
+            print(f'{args.batch} must hold a JSON list of description strings', file=sys.stderr)
+            return 2
+    else:
+        inventions = [line.strip() for line in content.splitlines() if line.strip()]
+
+    if not inventions:
+        print(f'No invention descriptions in {args.batch}', file=sys.stderr)
+        return 2
+
+    results = check_prior_art_batch(inventions)
+
+    if not args.no_save:
+        print(f'Saved: {save_prior_art_result(results, prefix="prior_art_batch")}')
+
+    for result in results:
+        print(f'{result["invention"][:80]}: {len(result["prior_art_found"])} patents, '
+              f'white space: {result["white_space"]}')
+    return 0
+
+def cmd_landscape(args):
+    """Run the quarterly patent landscape scan, or query the landscape history"""
+    if args.trend or args.diff:
+        return _landscape_query(args)
+
+    from main import load_config
+    from patent_landscape.google_patents_scraper import scan_industry_landscapes, save_landscape_snapshot
+
+    results = scan_industry_landscapes(load_config('industries.yaml'))
+
+    for industry, landscape in results.items():
+        print(f'{industry}: {landscape["total_patents"]} patents found, white space: {landscape["white_space"]}')
+
+    if not args.no_save:
+        print(f'Saved: {save_landscape_snapshot(results)}')
+    return 0
+
+def _landscape_query(args):
+    """Trend or diff from the landscape store"""
+    from patent_landscape.landscape_store import LandscapeStore
+
+    with LandscapeStore() as store:
+        if args.trend:
+            result = store.trend(args.trend, dimension=args.dimension, since=args.since)
+        else:
+            result = store.diff(args.diff[0], args.diff[1], dimension=args.dimension)
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+def cmd_fto(args):
+    """Freedom to operate analysis for a technology"""
+    from patent_landscape.freedom_to_operate import analyze_fto
+
+    result = analyze_fto(args.technology, target_market=args.market)
+
+    print(f'Risk level: {result["risk_level"]}')
+    print(f'Blocking patents: {len(result["blocking_patents"])}')
+    print(f'Recommendation: {result["recommendation"]}')
+    if args.json:
+        print(json.dumps(result, indent=2))
+    return 0
+
+def cmd_papers(args):
+    """Track recent papers for the research profile topics"""
+    from main import load_config
+    from invention_miner.paper_tracker import track_recent_papers
+
+    papers = track_recent_papers(load_config(args.research_profile))
+
+    for paper in papers:
+        print(f'[{paper["topic"]}] {paper["title"]} ({paper["published"][:10]})')
+    if args.json:
+        print(json.dumps(papers, indent=2))
+    return 0
+
+def cmd_serve(args):
+    """Run the long-running Sentinel/Oracle event service"""
+    from main import load_config
+    from service import serve
+
+    settings = (load_config('sentinel_integration.yaml') or {}).get('service', {})
+
+    serve(
+        host=args.host or settings.get('host', '127.0.0.1'),
+        port=args.port or settings.get('port', 8765),
+        unix_socket=args.socket,
+        workers=args.workers or settings.get('workers', 2)
+    )
+    return 0
+
+def build_parser():
+    """
+    Argument parser with one subcommand per pipeline entry point
+    """
+
+    parser = argparse.ArgumentParser(prog='patent-scout', description='IP & Commercial Intelligence for Plasma Research')
+    parser.add_argument('--profile', action='store_true',
+                        help='Write per-phase cProfile stats, collapsed stacks and memory peaks next to the log')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan = subparsers.add_parser('scan', help='Monthly industry scan and opportunity briefs')
+    scan.add_argument('--full-rescan', action='store_true',
+                      help='Process every page and bottleneck, not just those changed since the last scan')
+    scan.add_argument('--research-profile', action='append', metavar='FILE',
+                      help='Profile file in config/; repeat to serve several profiles from one scan '
+                           '(default: yatom_research_profile.yaml)')
+    scan.add_argument('--time-budget', type=float, metavar='MINUTES',
+                      help='Finish within this time: shed low-priority work and send the report before it runs out')
+    sharding = scan.add_mutually_exclusive_group()
+    sharding.add_argument('--shard', type=_shard, metavar='I/N',
+                          help='Scan only shard I of N of the report sources and write a shard manifest')
+    sharding.add_argument('--shards', type=int, metavar='N',
+                          help='Run N shards in parallel processes, then merge them')
+    sharding.add_argument('--merge', action='store_true',
+                          help='Merge the shard manifests of a run, send the reports and save fingerprints')
+    scan.add_argument('--run-id', help='Shard run to write or merge (default: today, YYYYMMDD)')
+    scan.set_defaults(func=cmd_scan)
+
+    prior_art = subparsers.add_parser('prior-art', help='Prior art check for an invention')
+    prior_art.add_argument('description', nargs='?', help='Invention description (default: $INVENTION_DESCRIPTION)')
+    prior_art.add_argument('--cpc', nargs='*', help='CPC codes to focus the search')
+    prior_art.add_argument('--batch', metavar='FILE',
+                           help='Check many inventions with shared queries (JSON list or one per line)')
+    prior_art.add_argument('--urgency', default='normal', choices=['normal', 'high', 'critical'])
+    prior_art.add_argument('--no-save', action='store_true', help='Do not write to data/your_research/')
+    prior_art.set_defaults(func=cmd_prior_art)
+
+    landscape = subparsers.add_parser('landscape', help='Quarterly patent landscape by industry')
+    landscape.add_argument('--no-save', action='store_true', help='Do not write a snapshot')
+    landscape.add_argument('--trend', metavar='KEY', help='Show counts across snapshots for an industry or CPC code')
+    landscape.add_argument('--diff', nargs=2, metavar=('DATE_A', 'DATE_B'), help='Compare two snapshots (YYYY-MM-DD)')
+    landscape.add_argument('--dimension', default='industry', choices=['industry', 'cpc'])
+    landscape.add_argument('--since', metavar='DATE', help='Earliest snapshot for --trend')
+    landscape.set_defaults(func=cmd_landscape)
+
+    fto = subparsers.add_parser('fto', help='Freedom to operate analysis')
+    fto.add_argument('technology', help='Technology description')
+    fto.add_argument('--market', default='US')
+    fto.add_argument('--json', action='store_true', help='Print the full result as JSON')
+    fto.set_defaults(func=cmd_fto)
+
+    papers = subparsers.add_parser('papers', help='Recent papers for the research profile topics')
+    papers.add_argument('--research-profile', default='yatom_research_profile.yaml',
+                        help='Profile file in config/')
+    papers.add_argument('--json', action='store_true', help='Print the papers as JSON')
+    papers.set_defaults(func=cmd_papers)
+
+    serve = subparsers.add_parser('serve', help='Long-running prior-art service for Sentinel/Oracle events')
+    serve.add_argument('--host', help='Bind address (default from sentinel_integration.yaml)')
+    serve.add_argument('--port', type=int, help='TCP port (default from sentinel_integration.yaml)')
+    serve.add_argument('--socket', help='Listen on a Unix socket instead of TCP')
+    serve.add_argument('--workers', type=int, help='Concurrent jobs')
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+def main(argv=None):
+    """
+    CLI entry point
+    """
+
+    args = build_parser().parse_args(argv)
+
+    from utils.logging_config import setup_logging
+    log_file = setup_logging()
+
+    if not args.profile:
+        return args.func(args)
+
+    from utils import profiling
+    profiling.enable(profiling.profile_dir(log_file))
+    try:
+        with profiling.phase(args.command):
+            return args.func(args)
+    finally:
+        profiling.finish()
+
+if __name__ == '__main__':
+    sys.exit(main())
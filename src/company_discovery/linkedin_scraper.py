@@ -4,7 +4,6 @@ LinkedIn company discovery (public data only)
 
 import logging
 import requests
-from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +25,7 @@ def search_companies_by_keyword(keyword, max_results=10):
         response = requests.get(search_url, headers=headers, timeout=30)
 
         if response.status_code == 200:
+            from bs4 import BeautifulSoup
             soup = BeautifulSoup(response.content, 'html.parser')
 
             company_elements = soup.find_all('span', class_='entity-result__title-text')
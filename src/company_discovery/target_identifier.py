@@ -4,10 +4,11 @@ Find target companies that need plasma solutions
 
 import logging
 import requests
-from bs4 import BeautifulSoup
+from utils.profiling import timed
 
 logger = logging.getLogger(__name__)
 
+@timed('companies.find_targets')
 def find_target_companies(bottleneck):
     """
     Find companies working on this problem but not using plasma
@@ -58,6 +59,7 @@ def search_linkedin_companies(industry):
         response = requests.get(search_url, headers=headers, timeout=30)
 
         if response.status_code == 200:
+            from bs4 import BeautifulSoup
             soup = BeautifulSoup(response.content, 'html.parser')
 
             # Parse company names (simplified)
@@ -3,8 +3,6 @@ Detect industrial bottlenecks from reports
 """
 
 import logging
-import requests
-from bs4 import BeautifulSoup
 import re
 
 logger = logging.getLogger(__name__)
@@ -25,95 +23,121 @@ BOTTLENECK_KEYWORDS = [
     'challenge'
 ]
 
-def scan_industry_bottlenecks(industries_config):
+def scan_industry_bottlenecks(industries_config, fingerprints=None):
     """
     Scan industry reports for process bottlenecks
+    Crawls report_sources from industries.yaml and ingests the report PDFs found
+    With a FingerprintStore, unchanged pages are skipped and only bottlenecks
+    not seen in a previous scan are returned
     """
 
     logger.info("Scanning industry reports for bottlenecks...")
 
-    bottlenecks = []
-
-    # Scan DOE reports
-    doe_bottlenecks = scan_doe_reports(industries_config)
-    bottlenecks.extend(doe_bottlenecks)
-
-    # Scan IEA reports
-    iea_bottlenecks = scan_iea_reports(industries_config)
-    bottlenecks.extend(iea_bottlenecks)
+    bottlenecks = list(iter_industry_bottlenecks(industries_config, fingerprints))
 
     logger.info(f"Found {len(bottlenecks)} bottlenecks")
 
     return bottlenecks
 
+def iter_industry_bottlenecks(industries_config, fingerprints=None):
+    """
+    Yield bottlenecks as report pages and PDFs are parsed, for streaming runs
+    """
+
+    from industry_intel.report_crawler import iter_report_sources
+
+    def new(found):
+        return found if fingerprints is None else fingerprints.new_bottlenecks(found)
+
+    # All sources share one crawl so their fetches overlap
+    pdf_urls = []
+    for found in iter_report_sources(industries_config, fingerprints, pdf_urls=pdf_urls):
+        yield from new(found)
+
+    # Scan full report PDFs, configured and discovered
+    for found in iter_pdf_reports(industries_config, fingerprints, discovered=pdf_urls):
+        yield from new(found)
+
+    if fingerprints is not None:
+        fingerprints.log_report()
+
 def scan_doe_reports(industries_config):
     """
     Scan DOE critical materials reports
     """
 
-    bottlenecks = []
+    from industry_intel.report_crawler import crawl_report_sources
+    return crawl_report_sources(industries_config, types=('DOE',))[0]
 
-    # DOE Critical Materials report URLs (public)
-    doe_urls = [
-        'https://www.energy.gov/cmm/critical-materials-reports',
-        'https://www.energy.gov/eere/critical-materials'
-    ]
+def scan_iea_reports(industries_config):
+    """
+    Scan IEA Critical Minerals Outlook
+    """
 
-    for url in doe_urls:
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                text = soup.get_text()
+    from industry_intel.report_crawler import crawl_report_sources
+    return crawl_report_sources(industries_config, types=('IEA',))[0]
 
-                # Find sentences with bottleneck keywords
-                sentences = re.split(r'[.!?]+', text)
+def bottlenecks_in_text(text, source, source_url=None):
+    """
+    Bottlenecks in the sentences of a page's text
+    """
 
-                for sentence in sentences:
-                    if any(keyword in sentence.lower() for keyword in BOTTLENECK_KEYWORDS):
-                        # Extract potential bottleneck
-                        bottleneck = extract_bottleneck_info(sentence)
-                        if bottleneck:
-                            bottlenecks.append(bottleneck)
+    bottlenecks = []
+
+    # Find sentences with bottleneck keywords
+    sentences = re.split(r'[.!?]+', text)
 
-        except Exception as e:
-            logger.warning(f"Failed to fetch DOE report: {e}")
+    for sentence in sentences:
+        if any(keyword in sentence.lower() for keyword in BOTTLENECK_KEYWORDS):
+            # Extract potential bottleneck
+            bottleneck = extract_bottleneck_info(re.sub(r'\s+', ' ', sentence), source=source)
+            if bottleneck:
+                bottleneck['source_url'] = source_url
+                bottlenecks.append(bottleneck)
 
     return bottlenecks
 
-def scan_iea_reports(industries_config):
+def scan_pdf_reports(industries_config, fingerprints=None, discovered=()):
     """
-    Scan IEA Critical Minerals Outlook
+    Scan full DOE/IEA/USGS report PDFs listed under report_pdfs,
+    plus PDF URLs discovered by the crawler
     """
 
     bottlenecks = []
+    for found in iter_pdf_reports(industries_config, fingerprints, discovered):
+        bottlenecks.extend(found)
+    return bottlenecks
+
+def iter_pdf_reports(industries_config, fingerprints=None, discovered=()):
+    """
+    Yield the bottlenecks of each report PDF as it is ingested
+    """
 
-    # IEA public reports
-    iea_urls = [
-        'https://www.iea.org/reports/critical-minerals-outlook-2023'
-    ]
+    from industry_intel.pdf_ingest import ingest_pdf, page_sentences
 
-    for url in iea_urls:
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                text = soup.get_text()
+    reports = list(industries_config.get('report_pdfs', []))
+    configured = {report['url'] for report in reports}
+    reports.extend({'url': url, 'type': 'Report'} for url in discovered if url not in configured)
 
-                sentences = re.split(r'[.!?]+', text)
+    for report in reports:
+        pages = ingest_pdf(report['url'])
 
-                for sentence in sentences:
-                    if any(keyword in sentence.lower() for keyword in BOTTLENECK_KEYWORDS):
-                        bottleneck = extract_bottleneck_info(sentence)
-                        if bottleneck:
-                            bottlenecks.append(bottleneck)
+        if fingerprints is not None and pages and fingerprints.page_unchanged(report['url'], '\f'.join(pages)):
+            logger.info(f"Unchanged since last scan, skipping: {report['url']}")
+            continue
 
-        except Exception as e:
-            logger.warning(f"Failed to fetch IEA report: {e}")
+        bottlenecks = []
+        for page, sentence in page_sentences(pages):
+            if any(keyword in sentence.lower() for keyword in BOTTLENECK_KEYWORDS):
+                bottleneck = extract_bottleneck_info(sentence, source=f"{report.get('type', 'Report')} Report PDF")
+                if bottleneck:
+                    bottleneck['source_url'] = report['url']
+                    bottleneck['page'] = page
+                    bottlenecks.append(bottleneck)
 
-    return bottlenecks
+        yield bottlenecks
 
-def extract_bottleneck_info(sentence):
+def extract_bottleneck_info(sentence, source='DOE/IEA Report'):
     """
     Extract structured bottleneck information from sentence
     """
@@ -128,7 +152,7 @@ def extract_bottleneck_info(sentence):
             return {
                 'industry': industry,
                 'description': sentence.strip(),
-                'source': 'DOE/IEA Report',
+                'source': source,
                 'process': 'extraction/processing'
             }
 
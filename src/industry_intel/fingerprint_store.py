@@ -0,0 +1,259 @@
+"""
+Content fingerprints for incremental industry scans
+Remembers a hash of every report page and every bottleneck sentence seen, so a
+monthly scan skips unchanged pages and passes only new bottlenecks downstream
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import closing
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+DEFAULT_PATH = os.path.join(_ROOT, 'data/industry_intelligence/fingerprints.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sentences (
+    sentence_hash TEXT PRIMARY KEY,
+    source_url TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+"""
+
+_VOLATILE = re.compile(r'<(script|style|noscript)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+
+class FingerprintStore:
+    """
+    Page and sentence hashes from previous scans
+    Fingerprints seen during a run are staged and only written by commit(),
+    so a run that fails before sending its report is retried in full next time
+    With full_rescan, nothing counts as seen but fingerprints are still recorded
+    """
+
+    def __init__(self, path=DEFAULT_PATH, full_rescan=False):
+        self.path = path
+        self.full_rescan = full_rescan
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+            self._pages = dict(conn.execute("SELECT url, content_hash FROM pages"))
+            self._sentences = {row[0] for row in conn.execute("SELECT sentence_hash FROM sentences")}
+
+        self._lock = threading.Lock()
+        self._staged_pages = {}
+        self._staged_sentences = {}
+        self._frozen = False
+        self.skipped_pages = 0
+        self.skipped_sentences = 0
+
+    def page_unchanged(self, url, content):
+        """
+        True if the page content is identical to the last committed scan
+        Stages the new fingerprint either way; safe to call from fetch threads
+        """
+
+        digest = page_hash(content)
+
+        with self._lock:
+            if not self._frozen:
+                self._staged_pages[url] = digest
+            unchanged = not self.full_rescan and self._pages.get(url) == digest
+            if unchanged:
+                self.skipped_pages += 1
+
+        return unchanged
+
+    def new_bottlenecks(self, bottlenecks):
+        """
+        Bottlenecks whose sentence was not in any committed scan
+        Repeats within this run are dropped too
+        """
+
+        fresh = []
+
+        with self._lock:
+            if self._frozen:
+                return fresh
+
+            for bottleneck in bottlenecks:
+                digest = sentence_hash(bottleneck.get('description', ''))
+                seen = digest in self._staged_sentences or (not self.full_rescan and digest in self._sentences)
+
+                if seen:
+                    self.skipped_sentences += 1
+                    continue
+
+                self._staged_sentences[digest] = bottleneck.get('source_url')
+                fresh.append(bottleneck)
+
+        return fresh
+
+    def release(self, bottlenecks):
+        """
+        Unstage bottlenecks that were not processed (a time-budgeted run deferred
+        them), with the pages they came from, so the next scan picks them up again
+        """
+
+        with self._lock:
+            for bottleneck in bottlenecks:
+                self._staged_sentences.pop(sentence_hash(bottleneck.get('description', '')), None)
+                self._staged_pages.pop(bottleneck.get('source_url'), None)
+
+    def retain_only(self, bottlenecks):
+        """
+        Unstage every sentence except those of bottlenecks, and stage no more
+        sentences or pages; for a run stopped before its scan finished, whose
+        source staged sentences it never passed on
+        """
+
+        keep = {sentence_hash(b.get('description', '')) for b in bottlenecks}
+        with self._lock:
+            self._frozen = True
+            self._staged_sentences = {k: v for k, v in self._staged_sentences.items() if k in keep}
+
+    def discard_pages(self):
+        """
+        Unstage every page fingerprint; for a scan cut short, whose fetched pages
+        may not all have had their bottlenecks extracted
+        """
+
+        with self._lock:
+            self._staged_pages.clear()
+
+    def staged(self):
+        """Fingerprints staged so far, for a shard manifest"""
+        with self._lock:
+            return {'pages': dict(self._staged_pages), 'sentences': dict(self._staged_sentences)}
+
+    def stage(self, staged):
+        """Stage fingerprints exported by staged(), e.g. those of every shard of a run"""
+        with self._lock:
+            self._staged_pages.update(staged.get('pages', {}))
+            self._staged_sentences.update(staged.get('sentences', {}))
+
+    def commit(self):
+        """
+        Persist the fingerprints staged during this run
+        """
+
+        now = datetime.now().isoformat(timespec='seconds')
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO pages VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash, last_seen = excluded.last_seen",
+                [(url, digest, now, now) for url, digest in self._staged_pages.items()]
+            )
+            conn.executemany(
+                "INSERT INTO sentences VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(sentence_hash) DO UPDATE SET last_seen = excluded.last_seen",
+                [(digest, url, now, now) for digest, url in self._staged_sentences.items()]
+            )
+
+            self._pages.update(self._staged_pages)
+            self._sentences.update(self._staged_sentences)
+            self._staged_pages.clear()
+            self._staged_sentences.clear()
+
+    def log_report(self):
+        logger.info(f"Fingerprints: {self.skipped_pages} unchanged pages skipped, "
+                    f"{self.skipped_sentences} known bottlenecks dropped, "
+                    f"{len(self._staged_sentences)} new"
+                    + (" (full rescan)" if self.full_rescan else ""))
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+class ProcessedLedger:
+    """
+    Which bottlenecks of a run were fully processed
+    A bottleneck is settled when a stage filtered it out on purpose, or when
+    every branch it fanned out to ended in a brief or a deliberate rejection.
+    The rest (failed briefs, stage errors, work cut short) are released from
+    the fingerprints, so the next run picks them up again
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = {}         # sentence hash -> bottleneck passed on by the source
+        self._branches = {}     # sentence hash -> [branches expected, branches done]
+        self._held = set()      # sentence hashes with a branch left for a later run
+        self._settled = set()
+
+    def track(self, bottlenecks):
+        """Pass source bottlenecks on, remembering each one"""
+        try:
+            for bottleneck in bottlenecks:
+                with self._lock:
+                    self._seen[sentence_hash(bottleneck.get('description', ''))] = bottleneck
+                yield bottleneck
+        finally:
+            if hasattr(bottlenecks, 'close'):
+                bottlenecks.close()
+
+    def settle(self, bottleneck):
+        """A bottleneck filtered out on purpose"""
+        with self._lock:
+            self._settled.add(sentence_hash(bottleneck.get('description', '')))
+
+    def expect(self, bottleneck, branches, hold=False):
+        """
+        A bottleneck fanned out to branches that each still have to finish
+        hold: one of its branches was put off to a later run, so it never settles
+        """
+
+        key = sentence_hash(bottleneck.get('description', ''))
+        with self._lock:
+            if hold:
+                self._held.add(key)
+            self._branches[key] = [branches, 0]
+            if not branches and key not in self._held:
+                self._settled.add(key)
+
+    def branch_done(self, bottleneck):
+        """One branch of a bottleneck finished (a brief, or a deliberate rejection)"""
+        key = sentence_hash(bottleneck.get('description', ''))
+        with self._lock:
+            branches = self._branches.setdefault(key, [1, 0])
+            branches[1] += 1
+            if branches[1] >= branches[0] and key not in self._held:
+                self._settled.add(key)
+
+    def unsettled(self):
+        """Bottlenecks passed on by the source but not fully processed"""
+        with self._lock:
+            return [b for key, b in self._seen.items() if key not in self._settled]
+
+def page_hash(content):
+    """
+    Hash of a page, ignoring scripts, styles and whitespace
+    Those change on every request (nonces, analytics) without the report changing
+    """
+
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', errors='replace')
+
+    content = _VOLATILE.sub('', content)
+    content = re.sub(r'\s+', ' ', content)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def sentence_hash(sentence):
+    """Hash of a sentence, ignoring case and whitespace differences"""
+    normalized = re.sub(r'\s+', ' ', sentence).strip().lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:32]
@@ -0,0 +1,239 @@
+"""
+PDF report ingestion for DOE/IEA/USGS publications
+Downloads report PDFs, extracts text page by page across a process pool
+and caches the pages by content hash
+"""
+
+import os
+import re
+import gzip
+import json
+import mmap
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from utils.profiling import timed
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+# Extracted page text, keyed by PDF content hash (small, kept across runs)
+TEXT_CACHE_DIR = os.path.join(_ROOT, 'data/cache/pdf_text')
+
+# Downloaded PDFs (large, gitignored)
+DOWNLOAD_DIR = os.path.join(_ROOT, 'data/cache/pdf')
+
+# Pages per worker task; small enough to balance, large enough to amortize PDF parsing per task
+PAGES_PER_TASK = 25
+
+_index_lock = threading.Lock()
+
+@timed('pdf.ingest')
+def ingest_pdf(url, max_workers=None):
+    """
+    Page texts of the PDF at url
+    Unchanged PDFs (same ETag/Last-Modified, or same content hash) come from
+    the text cache without re-extraction
+    Returns: list of page strings (empty on failure)
+    """
+
+    path, digest = download_pdf(url)
+    if not digest:
+        return []
+
+    pages = load_cached_pages(digest)
+    if pages is not None:
+        logger.info(f"PDF unchanged, using cached text: {url}")
+        return pages
+
+    if not path:
+        return []
+
+    pages = extract_pages(path, max_workers=max_workers)
+    if pages:
+        save_cached_pages(digest, url, pages)
+        logger.info(f"Ingested {len(pages)} pages from {url}")
+
+    return pages
+
+def download_pdf(url):
+    """
+    Download a PDF with a conditional request
+    Returns (path, sha256); path is None when the server reports the PDF
+    unchanged and its text is already cached
+    """
+
+    from utils.princeton_proxy import get_proxy_manager
+
+    index = _load_index()
+    known = index.get(url, {})
+
+    headers = {}
+    if known.get('sha256') and load_cached_pages(known['sha256']) is not None:
+        if known.get('etag'):
+            headers['If-None-Match'] = known['etag']
+        if known.get('last_modified'):
+            headers['If-Modified-Since'] = known['last_modified']
+
+    try:
+        response = get_proxy_manager().fetch(url, timeout=120, headers=headers, stream=True)
+
+        if response.status_code == 304:
+            return None, known['sha256']
+
+        if response.status_code != 200:
+            logger.warning(f"PDF fetch returned {response.status_code}: {url}")
+            return None, None
+
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        sha = hashlib.sha256()
+        # The name is only known once the content is hashed; pid and thread keep
+        # concurrent downloads, in this process or another shard's, apart
+        tmp_path = os.path.join(DOWNLOAD_DIR, f".{os.getpid()}.{threading.get_ident()}.part")
+
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                sha.update(chunk)
+                f.write(chunk)
+
+        digest = sha.hexdigest()
+        path = os.path.join(DOWNLOAD_DIR, f"{digest}.pdf")
+        os.replace(tmp_path, path)
+
+        with _index_lock:
+            index = _load_index()
+            index[url] = {
+                'sha256': digest,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            _save_index(index)
+
+        return path, digest
+
+    except Exception as e:
+        logger.warning(f"Failed to download PDF {url}: {e}")
+        return None, None
+
+@timed('pdf.extract_pages')
+def extract_pages(path, max_workers=None):
+    """
+    Extract text from every page of a local PDF across a process pool
+    """
+
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        logger.warning("pypdf not installed - PDF ingestion disabled")
+        return []
+
+    try:
+        page_count = _page_count(path)
+    except Exception as e:
+        logger.warning(f"Unreadable PDF {path}: {e}")
+        return []
+
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+    pages = [''] * page_count
+
+    if len(ranges) <= 1:
+        results = [_extract_range(path, start, end) for start, end in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_extract_range, [path] * len(ranges),
+                                        [r[0] for r in ranges], [r[1] for r in ranges]))
+
+    for (start, _), texts in zip(ranges, results):
+        pages[start:start + len(texts)] = texts
+
+    return pages
+
+def page_sentences(pages):
+    """
+    Yield (page_number, sentence) for every sentence in the page texts
+    Page numbers start at 1
+    """
+
+    for number, text in enumerate(pages, 1):
+        # PDF text wraps lines mid-sentence; join them before splitting
+        text = re.sub(r'-\n(?=[a-z])', '', text)
+        text = re.sub(r'\s+', ' ', text)
+        for sentence in re.split(r'[.!?]+', text):
+            sentence = sentence.strip()
+            if sentence:
+                yield number, sentence
+
+def load_cached_pages(digest):
+    path = _cache_path(digest)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)['pages']
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring corrupt PDF text cache {path}: {e}")
+        return None
+
+def save_cached_pages(digest, url, pages):
+    os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+    path = _cache_path(digest)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump({'url': url, 'sha256': digest, 'pages': pages}, f)
+    os.replace(tmp_path, path)
+
+def _cache_path(digest):
+    return os.path.join(TEXT_CACHE_DIR, f"{digest}.json.gz")
+
+def _load_index():
+    path = os.path.join(TEXT_CACHE_DIR, 'index.json')
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_index(index):
+    """Replace index.json whole, so other processes never read it half written"""
+    os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+    path = os.path.join(TEXT_CACHE_DIR, 'index.json')
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _open_mapped(path):
+    """Memory-map a PDF read-only; pages are read from the OS page cache, not copied in"""
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _page_count(path):
+    from pypdf import PdfReader
+
+    mapped = _open_mapped(path)
+    try:
+        return len(PdfReader(mapped).pages)
+    finally:
+        mapped.close()
+
+def _extract_range(path, start, end):
+    """Worker: text of pages [start, end)"""
+    from pypdf import PdfReader
+
+    mapped = _open_mapped(path)
+    texts = []
+    try:
+        reader = PdfReader(mapped)
+        for number in range(start, end):
+            try:
+                texts.append(reader.pages[number].extract_text() or '')
+            except Exception as e:
+                logger.warning(f"Failed to extract page {number + 1} of {path}: {e}")
+                texts.append('')
+    finally:
+        mapped.close()
+    return texts
@@ -0,0 +1,346 @@
+"""
+Crawler for the report_sources in industries.yaml
+Starts from each source URL and follows in-domain links to the actual report
+pages, feeding them through the fetch/parse pipeline. Report PDFs it finds
+are returned for PDF ingestion
+"""
+
+import re
+import time
+import logging
+import threading
+from collections import deque
+from urllib.parse import urljoin, urldefrag, urlparse
+from urllib.robotparser import RobotFileParser
+from utils.http_session import get_session
+from utils.princeton_proxy import fetch_with_proxy
+from utils.fetch_pipeline import fetch_and_parse, scan_settings
+from utils.profiling import timed
+from industry_intel.report_parsers import PARSERS, parse_crawled_page
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CRAWL = {
+    'max_depth': 2,
+    'max_pages_per_source': 150,
+    'per_host': 2,          # concurrent requests per host
+    'host_delay': 0.5,      # seconds between requests to one host (robots.txt Crawl-delay wins if longer)
+    'fetch_workers': 8,
+    'max_pdfs': 5,
+    'respect_robots': True
+}
+
+# Robots.txt groups are matched against this token
+ROBOTS_AGENT = 'patent-scout'
+
+# Longest Crawl-delay honored; slower hosts are crawled at this rate anyway
+MAX_HOST_DELAY = 10.0
+
+_HREF = re.compile(r'''href\s*=\s*["']([^"'#\s][^"'\s]*)["']''', re.IGNORECASE)
+
+_SKIP_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.css', '.js', '.ico',
+    '.zip', '.xls', '.xlsx', '.csv', '.doc', '.docx', '.ppt', '.pptx', '.mp4', '.mp3', '.xml'
+)
+
+def crawl_settings(industries_config=None):
+    """
+    Crawler settings from the crawl: block of industries.yaml
+    """
+
+    settings = dict(DEFAULT_CRAWL)
+    settings.update({k: v for k, v in ((industries_config or {}).get('crawl') or {}).items() if k in DEFAULT_CRAWL})
+    return settings
+
+def crawl_report_sources(industries_config, fingerprints=None, types=None):
+    """
+    Crawl report_sources (optionally only those of the given types)
+    Returns (bottlenecks, pdf_urls)
+    """
+
+    bottlenecks = []
+    pdf_urls = []
+
+    for found in iter_report_sources(industries_config, fingerprints, types, pdf_urls):
+        bottlenecks.extend(found)
+
+    return bottlenecks, pdf_urls
+
+def iter_report_sources(industries_config, fingerprints=None, types=None, pdf_urls=None):
+    """
+    Yield the bottlenecks of each crawled page as soon as it is parsed
+    Report PDFs found are appended to pdf_urls once the crawl is done
+    In a sharded scan (industries_config['shard'], set by Shard.filter_config)
+    only the shard's own pages are parsed and its own PDFs returned
+    """
+
+    sources = [s for s in industries_config.get('report_sources', [])
+               if types is None or s.get('type') in types]
+    if not sources:
+        return
+
+    settings = crawl_settings(industries_config)
+    shard = industries_config.get('shard')
+    crawler = ReportCrawler(sources, settings, fingerprints, owns=shard.owns if shard is not None else None)
+
+    pipeline = scan_settings(industries_config)
+    pipeline['fetch_workers'] = settings['fetch_workers']
+
+    for _, found in fetch_and_parse(crawler.frontier(), crawler.fetch, parse_crawled_page, **pipeline):
+        yield found
+
+    logger.info(f"Crawled {crawler.fetched} pages from {len(sources)} sources "
+                f"({crawler.robots_blocked} blocked by robots.txt), "
+                f"found {len(crawler.pdf_urls)} report PDFs")
+
+    if pdf_urls is not None:
+        pdf_urls.extend(crawler.pdf_urls[:settings['max_pdfs']])
+
+class ReportCrawler:
+    """
+    Frontier and fetch stage of a crawl
+    URLs are queued per host and handed out breadth-first, skipping hosts that
+    are at their concurrency limit or inside their politeness delay
+    owns: for a sharded crawl, whether a normalized URL is this shard's. Other
+    shards' pages are only fetched for their links, and not at all once
+    there are no links left to follow from them
+    """
+
+    def __init__(self, sources, settings, fingerprints=None, owns=None):
+        self.sources = sources
+        self.settings = settings
+        self.fingerprints = fingerprints
+        self.owns = owns
+        self.robots = RobotsCache() if settings['respect_robots'] else None
+
+        self.follow = [[re.compile(p) for p in source.get('follow', [])] for source in sources]
+        self.sites = [_site(source['url']) for source in sources]
+
+        self._cond = threading.Condition()
+        self._queues = {}        # host -> deque of (url, depth, source_index)
+        self._active = {}        # host -> requests in flight
+        self._next_time = {}     # host -> earliest next request
+        self._host_delays = {}   # host -> delay, where robots.txt asks for a longer one
+        self._in_flight = 0
+        self._seen = set()
+        self._per_source = [0] * len(sources)
+        self._pdfs = set()
+
+        self.pdf_urls = []
+        self.fetched = 0
+        self.robots_blocked = 0
+
+        for index, source in enumerate(sources):
+            self._enqueue(source['url'], 0, index)
+
+    def frontier(self):
+        """
+        Yield crawl items until the frontier is empty and no fetch can add more
+        The caller must pass each item to fetch(), which releases its host slot
+        """
+
+        while True:
+            with self._cond:
+                while True:
+                    item, wait_for = self._pop_ready()
+                    if item is not None:
+                        break
+                    if not self._queues and self._in_flight == 0:
+                        return
+                    self._cond.wait(timeout=wait_for)
+
+            yield item
+
+    @timed('crawler.fetch')
+    def fetch(self, item):
+        """
+        Fetch stage: (content, parser_name, report_type) for a crawled page, or None
+        Links on the page are added to the frontier before it is parsed
+        """
+
+        url, depth, index = item
+        host = urlparse(url).netloc
+
+        try:
+            if self.robots is not None:
+                allowed, delay = self.robots.check(url)
+                if delay:
+                    self._set_delay(host, delay)
+                if not allowed:
+                    with self._cond:
+                        self.robots_blocked += 1
+                    return None
+
+            response = fetch_with_proxy(url)
+            with self._cond:
+                self.fetched += 1
+
+            if response.status_code != 200:
+                logger.warning(f"Crawl: {url} returned {response.status_code}")
+                return None
+
+            if 'html' not in response.headers.get('Content-Type', 'text/html'):
+                return None
+
+            content = response.content
+            self._add_links(url, content, depth, index)
+
+            if self.owns is not None and not self.owns(url):
+                # Another shard parses this page; it was fetched for its links
+                return None
+
+            if self.fingerprints is not None and self.fingerprints.page_unchanged(url, content):
+                return None
+
+            source = self.sources[index]
+            parser_name = source.get('parser', source.get('type', 'default'))
+            if parser_name not in PARSERS:
+                parser_name = 'default'
+
+            return content, parser_name, source.get('type', 'Report')
+
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._active[host] -= 1
+                self._cond.notify_all()
+
+    def _pop_ready(self):
+        """Next URL from a host with a free slot; else (None, seconds to wait)"""
+        now = time.monotonic()
+        wait_for = 0.5
+
+        for host, urls in list(self._queues.items()):
+            if self._active.get(host, 0) >= self.settings['per_host']:
+                continue
+
+            ready_at = self._next_time.get(host, 0)
+            if ready_at > now:
+                wait_for = min(wait_for, ready_at - now)
+                continue
+
+            item = urls.popleft()
+            if not urls:
+                del self._queues[host]
+
+            self._active[host] = self._active.get(host, 0) + 1
+            self._next_time[host] = now + self._delay(host)
+            self._in_flight += 1
+            return item, 0
+
+        return None, wait_for
+
+    def _delay(self, host):
+        return self._host_delays.get(host, self.settings['host_delay'])
+
+    def _set_delay(self, host, delay):
+        with self._cond:
+            self._host_delays[host] = min(max(delay, self.settings['host_delay']), MAX_HOST_DELAY)
+
+    def _add_links(self, base_url, content, depth, index):
+        html = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+
+        links = []
+        for href in _HREF.findall(html):
+            url = normalize_url(urljoin(base_url, href))
+            if url and _site(url) == self.sites[index]:
+                links.append(url)
+
+        with self._cond:
+            for url in links:
+                if urlparse(url).path.lower().endswith('.pdf'):
+                    if url not in self._pdfs:
+                        self._pdfs.add(url)
+                        if self.owns is None or self.owns(url):
+                            self.pdf_urls.append(url)
+                elif depth < self.settings['max_depth'] and self._follows(url, index):
+                    self._enqueue(url, depth + 1, index)
+            self._cond.notify_all()
+
+    def _follows(self, url, index):
+        patterns = self.follow[index]
+        return not patterns or any(p.search(url) for p in patterns)
+
+    def _enqueue(self, url, depth, index):
+        """Queue a URL once per crawl, within the source's page budget (caller holds the lock)"""
+        url = normalize_url(url)
+        if not url or url in self._seen or self._per_source[index] >= self.settings['max_pages_per_source']:
+            return
+
+        # Counted in every shard alike, so they all see the same frontier
+        self._seen.add(url)
+        self._per_source[index] += 1
+        if self.owns is not None and depth >= self.settings['max_depth'] and not self.owns(url):
+            return
+        self._queues.setdefault(urlparse(url).netloc, deque()).append((url, depth, index))
+
+class RobotsCache:
+    """
+    robots.txt rules per host, fetched once per crawl
+    Hosts without a readable robots.txt are crawled freely
+    """
+
+    def __init__(self):
+        self._parsers = {}
+        self._lock = threading.Lock()
+        self._host_locks = {}
+
+    def check(self, url):
+        """(allowed, crawl_delay or None) for a URL"""
+        parser = self._parser(url)
+        if parser is None:
+            return True, None
+        return parser.can_fetch(ROBOTS_AGENT, url), parser.crawl_delay(ROBOTS_AGENT)
+
+    def _parser(self, url):
+        parts = urlparse(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+
+        with self._lock:
+            host_lock = self._host_locks.setdefault(origin, threading.Lock())
+
+        # One fetch per host even when several threads hit it at once
+        with host_lock:
+            if origin not in self._parsers:
+                self._parsers[origin] = self._fetch(origin)
+            return self._parsers[origin]
+
+    def _fetch(self, origin):
+        parser = RobotFileParser(f"{origin}/robots.txt")
+
+        try:
+            response = get_session().get(parser.url, timeout=15)
+        except Exception as e:
+            logger.info(f"No robots.txt for {origin}: {e}")
+            return None
+
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code == 200:
+            parser.parse(response.text.splitlines())
+        else:
+            return None
+
+        return parser
+
+def normalize_url(url):
+    """
+    Canonical form for dedup: http(s) only, no fragment, lowercase host,
+    no trailing slash; None for URLs the crawler never fetches
+    """
+
+    url, _ = urldefrag(url.strip())
+    parts = urlparse(url)
+
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return None
+    if parts.path.lower().endswith(_SKIP_EXTENSIONS):
+        return None
+
+    path = parts.path.rstrip('/') or '/'
+    return parts._replace(netloc=parts.netloc.lower(), path=path).geturl()
+
+def _site(url):
+    """Registered domain of a URL, e.g. pubs.usgs.gov -> usgs.gov"""
+    host = (urlparse(url).hostname or '').lower()
+    return '.'.join(host.split('.')[-2:])
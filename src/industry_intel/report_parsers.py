@@ -0,0 +1,82 @@
+"""
+Per-source report page parsers for the crawler
+Each parser turns one HTML page into its report text; bottleneck extraction
+is shared. Parsers run in worker processes, so they must be module-level
+functions registered with @source_parser
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARSERS = {}
+
+def source_parser(name):
+    """
+    Register a page parser for report_sources entries with this type or parser name
+    """
+
+    def register(func):
+        PARSERS[name] = func
+        return func
+    return register
+
+def get_parser(name):
+    """Parser for a source type, falling back to the generic parser"""
+    return PARSERS.get(name, PARSERS['default'])
+
+def parse_crawled_page(item, payload):
+    """
+    Parse stage (runs in a worker process): bottlenecks in one crawled page
+    item: (url, depth, source_index); payload: (content, parser_name, report_type)
+    """
+
+    from industry_intel.bottleneck_detector import bottlenecks_in_text
+
+    url = item[0]
+    content, parser_name, report_type = payload
+
+    text = get_parser(parser_name)(content)
+    return bottlenecks_in_text(text, source=f"{report_type} Report", source_url=url)
+
+def _soup(content):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+    for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'form']):
+        tag.decompose()
+    return soup
+
+def _main_text(soup, selectors):
+    """Text of the first matching content region, or the whole page"""
+    for selector in selectors:
+        region = soup.select_one(selector)
+        if region is not None:
+            return region.get_text(separator=' ')
+    return soup.get_text(separator=' ')
+
+@source_parser('default')
+def parse_generic(content):
+    """Whole page text, minus navigation and page chrome"""
+    return _soup(content).get_text(separator=' ')
+
+@source_parser('DOE')
+def parse_doe(content):
+    """energy.gov pages keep the article body in the main page-content region"""
+    return _main_text(_soup(content), ['main .page-content', 'main', 'article'])
+
+@source_parser('IEA')
+def parse_iea(content):
+    """iea.org report pages: report body, without related-report teasers"""
+    soup = _soup(content)
+    for teaser in soup.select('.m-block-grid, .m-related, aside'):
+        teaser.decompose()
+    return _main_text(soup, ['.m-block-report', 'main', 'article'])
+
+@source_parser('USGS')
+def parse_usgs(content):
+    """usgs.gov pages: main content, without the sidebar"""
+    soup = _soup(content)
+    for sidebar in soup.select('aside, .sidebar'):
+        sidebar.decompose()
+    return _main_text(soup, ['main', 'article', '#main-content'])
@@ -3,8 +3,7 @@ Scrape industry reports from public sources
 """
 
 import logging
-import requests
-from bs4 import BeautifulSoup
+from utils.princeton_proxy import fetch_with_proxy
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +13,10 @@ def scrape_report(url, report_type='generic'):
     """
 
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        response = requests.get(url, headers=headers, timeout=30)
+        response = fetch_with_proxy(url)
 
         if response.status_code == 200:
+            from bs4 import BeautifulSoup
             soup = BeautifulSoup(response.content, 'html.parser')
 
             # Remove scripts and styles
@@ -3,7 +3,8 @@ Track recent papers for invention opportunities and prior art
 """
 
 import logging
-import requests
+from utils.princeton_proxy import fetch_with_proxy
+from utils.profiling import timed
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,7 @@ def track_recent_papers(research_profile):
     logger.info(f"Found {len(papers)} recent papers")
     return papers
 
+@timed('arxiv.search')
 def search_arxiv(topic, max_results=10):
     """
     Search arXiv for recent papers on topic
@@ -33,7 +35,7 @@ def search_arxiv(topic, max_results=10):
     try:
         url = f"http://export.arxiv.org/api/query?search_query=all:{topic.replace(' ', '+')}&start=0&max_results={max_results}&sortBy=submittedDate&sortOrder=descending"
 
-        response = requests.get(url, timeout=30)
+        response = fetch_with_proxy(url)
 
         if response.status_code == 200:
             # Parse Atom XML response
@@ -2,11 +2,46 @@
 Prior art search before patent filing
 """
 
+import os
+import re
+import json
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from patent_landscape.google_patents_scraper import search_google_patents
 
 logger = logging.getLogger(__name__)
 
+_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+# Words that carry no search signal in invention descriptions
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'from', 'into', 'onto', 'that', 'this', 'these', 'those', 'which',
+    'using', 'used', 'use', 'via', 'based', 'method', 'methods', 'system', 'systems', 'apparatus',
+    'device', 'devices', 'process', 'novel', 'new', 'improved', 'approach', 'technique', 'our',
+    'its', 'their', 'are', 'is', 'was', 'were', 'be', 'been', 'can', 'may', 'such', 'between',
+    'within', 'without', 'over', 'under', 'than', 'more', 'less', 'high', 'low', 'by', 'of', 'in',
+    'on', 'to', 'a', 'an', 'or', 'as', 'at', 'we', 'it', 'not', 'also', 'both', 'each', 'per',
+    'driven', 'assisted', 'enhanced'
+}
+
+_WORD = re.compile(r'[a-z][a-z0-9]+')
+
+# Key terms taken from each description for scoring, and how many of the
+# rarest ones each invention contributes to the shared queries
+MAX_TERMS_PER_INVENTION = 10
+QUERY_TERMS_PER_INVENTION = 3
+
+# Alternatives OR-ed together in one planned query
+OR_TERMS_PER_QUERY = 8
+
+# Planned queries serve several inventions, so they fetch a larger page
+BATCH_RESULTS_PER_QUERY = 100
+
+# Share of an invention's key terms a patent must mention to count as prior art
+MIN_RELEVANCE = 0.3
+
 def check_prior_art(invention_description, cpc_codes=None):
     """
     Check prior art for a potential invention
@@ -38,3 +73,158 @@ def check_prior_art(invention_description, cpc_codes=None):
 
     logger.info(f"Prior art check complete: {len(patents)} patents found")
     return results
+
+def check_prior_art_batch(invention_descriptions, max_results=30, max_workers=2):
+    """
+    Check prior art for many related inventions with one shared search sweep
+    Queries are planned over the union of key terms, each unique query runs
+    once, and the pooled results are scored against every invention
+    Returns: list of prior art results in check_prior_art format
+    """
+
+    descriptions = list(invention_descriptions)
+    plan = plan_queries(descriptions)
+
+    logger.info(f"Checking prior art for {len(descriptions)} inventions with {len(plan)} shared queries")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        query_results = list(executor.map(
+            lambda planned: search_google_patents(planned['query'], max_results=BATCH_RESULTS_PER_QUERY),
+            plan
+        ))
+
+    candidates = [OrderedDict() for _ in descriptions]
+    for planned, patents in zip(plan, query_results):
+        for i in planned['inventions']:
+            for patent in patents:
+                candidates[i].setdefault(_patent_key(patent), patent)
+
+    results = []
+    for i, description in enumerate(descriptions):
+        terms = extract_terms(description)
+        scored = []
+
+        for patent in candidates[i].values():
+            relevance = score_relevance(terms, patent)
+            if relevance >= MIN_RELEVANCE:
+                scored.append(dict(patent, relevance=round(relevance, 2)))
+
+        scored.sort(key=lambda p: p['relevance'], reverse=True)
+        scored = scored[:max_results]
+
+        results.append({
+            'invention': description,
+            'prior_art_found': scored,
+            'white_space': len(scored) < 3,
+            'recommendation': (
+                "Prior art found - review carefully before filing"
+                if scored else
+                "No prior art found - favorable for patent filing"
+            ),
+            'queries': [p['query'] for p in plan if i in p['inventions']]
+        })
+
+    logger.info(f"Batch prior art check complete: {len(plan)} searches for {len(descriptions)} inventions")
+    return results
+
+def extract_terms(description, max_terms=MAX_TERMS_PER_INVENTION):
+    """
+    Key search terms of a description in order of first appearance
+    Simple plurals are folded so 'electrodes' and 'electrode' are one term
+    """
+
+    return list(_term_forms(description, max_terms))
+
+def plan_queries(descriptions, terms_per_invention=QUERY_TERMS_PER_INVENTION, or_terms=OR_TERMS_PER_QUERY):
+    """
+    Plan the deduplicated union of search queries for a batch of inventions
+    Each invention is anchored on its most widely shared term and contributes
+    its rarest terms as alternatives. Inventions with the same anchor share
+    queries of the form 'anchor (t1 OR t2 ...)', so overlapping terms are
+    searched once and related disclosures need only a few queries in total.
+    Returns: list of {'query': str, 'inventions': [index, ...]}
+    """
+
+    forms = [_term_forms(description, MAX_TERMS_PER_INVENTION) for description in descriptions]
+
+    owners = {}
+    surface = {}
+    for i, terms in enumerate(forms):
+        for term, word in terms.items():
+            owners.setdefault(term, set()).add(i)
+            surface.setdefault(term, word)
+
+    buckets = OrderedDict()
+    for i, terms in enumerate(forms):
+        if not terms:
+            continue
+
+        anchor = max(terms, key=lambda t: len(owners[t]))
+        rest = [t for t in terms if t != anchor]
+        distinctive = sorted(rest, key=lambda t: len(owners[t]))[:terms_per_invention]
+
+        bucket = buckets.setdefault(anchor, OrderedDict())
+        for term in distinctive or [None]:
+            bucket.setdefault(term, set()).add(i)
+
+    plan = []
+    for anchor, alternatives in buckets.items():
+        bare = alternatives.pop(None, None)
+        if bare:
+            plan.append({'query': surface[anchor], 'inventions': sorted(bare)})
+
+        items = list(alternatives.items())
+        for start in range(0, len(items), or_terms):
+            chunk = items[start:start + or_terms]
+            words = [surface[term] for term, _ in chunk]
+            query = f"{surface[anchor]} {words[0]}" if len(words) == 1 else f"{surface[anchor]} ({' OR '.join(words)})"
+            inventions = set()
+            for _, term_owners in chunk:
+                inventions |= term_owners
+            plan.append({'query': query, 'inventions': sorted(inventions)})
+
+    return plan
+
+def score_relevance(terms, patent):
+    """
+    Share of an invention's key terms found in a patent's title and abstract
+    """
+
+    if not terms:
+        return 0.0
+
+    words = {_normalize_term(w) for w in _WORD.findall(f"{patent.get('title', '')} {patent.get('abstract', '')}".lower())}
+    return sum(1 for term in terms if term in words) / len(terms)
+
+def _term_forms(description, max_terms):
+    """Ordered map of normalized key term -> first surface form"""
+    forms = OrderedDict()
+    for word in _WORD.findall(description.lower()):
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        forms.setdefault(_normalize_term(word), word)
+        if len(forms) >= max_terms:
+            break
+    return forms
+
+def _normalize_term(word):
+    if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+def _patent_key(patent):
+    return patent.get('number') or patent.get('title', '')
+
+def save_prior_art_result(result, prefix='prior_art'):
+    """
+    Save a prior art result (or list of results) to data/your_research/
+    Returns the file path
+    """
+
+    filename = os.path.join(_ROOT, f"data/your_research/{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    with open(filename, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    return filename
@@ -6,82 +6,216 @@ Runs monthly industry scans and event-driven checks
 import os
 import sys
 import logging
-from datetime import datetime
-import yaml
-
-# Setup logging
-_log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
-os.makedirs(_log_dir, exist_ok=True)
-_log_file = os.path.join(_log_dir, f'patent_scout_{datetime.now().strftime("%Y%m%d")}.log')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(_log_file),
-        logging.StreamHandler()
-    ]
-)
+import functools
+
 logger = logging.getLogger(__name__)
 
 _ROOT = os.path.join(os.path.dirname(__file__), '..')
 
-def main():
+def load_config(name):
+    """
+    Load a YAML file from config/
+    """
+
+    import yaml
+
+    with open(os.path.join(_ROOT, 'config', name), 'r') as f:
+        return yaml.safe_load(f)
+
+def main(full_rescan=False, profiles=None, time_budget=None, shard=None, run_id=None):
     """
     Main entry point for Patent Scout
+    Bottlenecks stream through the patent, company, triage, analysis and brief
+    stages as soon as they are extracted, rather than phase by phase
+    Only bottlenecks not seen in a previous scan are processed, unless full_rescan
+    profiles: research profile files in config/ (default the Yatom profile).
+    The scan, patent and company stages run once for all of them; each profile
+    then gets briefs for the opportunities its triage lets through and Gemini
+    finds viable, in its own directory and report email
+    time_budget: seconds the run may take. Work is then ordered by profile
+    priorities and opportunity priority, low-priority work is shed when it
+    would not fit, and the report goes out before the budget runs out
+    shard: scan only this Shard's report sources and write a shard manifest
+    under data/shards/<run_id>/ instead of reporting; merge_shards() reports
     """
 
     logger.info("=" * 60)
     logger.info("PATENT SCOUT - IP & Commercial Intelligence")
     logger.info("=" * 60)
 
+    from utils import profiling
+    from utils.deadline import DeadlineScheduler, deadline_settings
+
+    scheduler = None
+    if time_budget:
+        # Started first, so setup counts against the budget too
+        scheduler = DeadlineScheduler(time_budget, key_of=_source_bottleneck)
+
     try:
-        # Load configurations
-        with open(os.path.join(_ROOT, 'config/yatom_research_profile.yaml'), 'r') as f:
-            research_profile = yaml.safe_load(f)
-
-        with open(os.path.join(_ROOT, 'config/industries.yaml'), 'r') as f:
-            industries = yaml.safe_load(f)
-
-        logger.info("Configurations loaded successfully")
-
-        # Phase 1: Industry Intelligence Scan
-        logger.info("\nPhase 1: Industry Intelligence Scan")
-        from industry_intel.bottleneck_detector import scan_industry_bottlenecks
-        bottlenecks = scan_industry_bottlenecks(industries)
-        logger.info(f"  Found {len(bottlenecks)} potential bottlenecks")
-
-        # Phase 2: Patent Landscape Check
-        logger.info("\nPhase 2: Patent Landscape Analysis")
-        from patent_landscape.google_patents_scraper import check_patent_landscape
-        for bottleneck in bottlenecks:
-            patent_status = check_patent_landscape(bottleneck)
-            bottleneck['patent_status'] = patent_status
-
-        # Phase 3: Company Discovery
-        logger.info("\nPhase 3: Company Discovery")
-        from company_discovery.target_identifier import find_target_companies
-        opportunities = []
-        for bottleneck in bottlenecks:
-            if bottleneck['patent_status']['white_space']:
-                companies = find_target_companies(bottleneck)
-                if companies:
-                    opportunities.append({
-                        'bottleneck': bottleneck,
-                        'companies': companies
-                    })
-
-        logger.info(f"  Found {len(opportunities)} commercial opportunities")
-
-        # Phase 4: Opportunity Analysis
-        if opportunities:
-            logger.info("\nPhase 4: Generating Opportunity Briefs")
-            from opportunity_engine.discussion_generator import generate_briefs
-            briefs = generate_briefs(opportunities, research_profile)
-
-            # Send email with opportunities
-            from utils.email_sender import send_monthly_report
-            send_monthly_report(briefs)
-            logger.info("  Monthly report sent successfully")
+        with profiling.phase('setup'):
+            # Load configurations
+            from opportunity_engine.research_profiles import load_research_profiles
+
+            industries = load_config('industries.yaml')
+            research_profiles = load_research_profiles(profiles, load_config, industries)
+
+            recorder = None
+            if shard is not None:
+                from utils.sharding import ShardRecorder, default_run_id
+                industries = shard.filter_config(industries)
+                recorder = ShardRecorder(shard, run_id or default_run_id())
+
+            logger.info(f"Configurations loaded successfully ({len(research_profiles)} research profiles)")
+
+            from industry_intel.bottleneck_detector import iter_industry_bottlenecks
+            from industry_intel.fingerprint_store import FingerprintStore, ProcessedLedger
+            from patent_landscape.google_patents_scraper import check_patent_landscape
+            from company_discovery.target_identifier import find_target_companies
+            from opportunity_engine.bottleneck_matcher import match_bottleneck
+            from opportunity_engine.discussion_generator import generate_brief, brief_path
+            from opportunity_engine.triage import AUDITED, OVER_BUDGET, REJECTED
+            from utils.gemini_analyzer import GeminiAnalyzer
+            from utils.stream_pipeline import stream, pipeline_settings
+
+            fingerprints = FingerprintStore(full_rescan=full_rescan)
+            ledger = ProcessedLedger()
+            analyzer = GeminiAnalyzer()
+            settings = pipeline_settings(industries)
+
+            if scheduler is not None:
+                scheduler.settings.update(deadline_settings(industries))
+                if time_budget <= scheduler.settings['reserve_seconds']:
+                    raise ValueError(f"Time budget of {time_budget:.0f}s leaves nothing beyond the "
+                                     f"{scheduler.settings['reserve_seconds']}s reserved for the report")
+                settings['queue_size'] = max(settings['queue_size'], scheduler.settings['queue_size'])
+                logger.info(f"Time budget: {time_budget:.0f}s, "
+                            f"{scheduler.settings['reserve_seconds']}s reserved for the report")
+
+        # Stage 2: Patent Landscape Check
+        def patent_stage(bottleneck):
+            bottleneck['patent_status'] = check_patent_landscape(bottleneck)
+            if recorder is not None:
+                recorder.record_bottleneck(bottleneck)
+            return bottleneck
+
+        # Stage 3: Company Discovery (white space only)
+        def company_stage(bottleneck):
+            if not bottleneck['patent_status']['white_space']:
+                ledger.settle(bottleneck)
+                return None
+            companies = find_target_companies(bottleneck)
+            if not companies:
+                ledger.settle(bottleneck)
+                return None
+            return {'bottleneck': bottleneck, 'companies': companies}
+
+        # Stage 4: Triage (fans each opportunity out to the profiles whose triage lets it through)
+        def triage_stage(opportunity):
+            bottleneck = opportunity['bottleneck']
+            matches, over_budget = [], False
+            for profile in research_profiles:
+                if os.path.exists(brief_path(opportunity, profile.output_dir)):
+                    # Already briefed by an earlier run; generate_brief just lists it
+                    matches.append((profile, opportunity, None))
+                    continue
+                decision, score = profile.triage.admit(bottleneck)
+                if decision == OVER_BUDGET:
+                    over_budget = True
+                elif decision != REJECTED:
+                    bottleneck.setdefault('triage_score', {})[profile.name] = score
+                    matches.append((profile, opportunity, decision))
+            # Over top_k for a profile: keep it unsettled, so the next run sees it again
+            ledger.expect(bottleneck, len(matches), hold=over_budget)
+            return matches
+
+        # Stage 5: Plasma Analysis, per profile (the Gemini check triage saves calls on)
+        def analysis_stage(match):
+            profile, opportunity, decision = match
+            if decision is None:
+                return match
+            bottleneck = opportunity['bottleneck']
+            viable = match_bottleneck(analyzer, bottleneck, profile.config)
+            profile.triage.record(decision, viable is not None)
+            if viable is None:
+                ledger.branch_done(bottleneck)
+                return None
+            if decision == AUDITED:
+                logger.warning(f"  Triage rejected a viable bottleneck for {profile.name} "
+                               f"({bottleneck['triage_score'][profile.name]:.2f}): {bottleneck['description'][:80]}")
+            return match
+
+        # Stage 6: Opportunity Brief, per profile
+        def brief_stage(match):
+            profile, opportunity, _ = match
+            brief = generate_brief(analyzer, opportunity, profile.config, profile.output_dir)
+            if not brief:
+                return None
+            ledger.branch_done(opportunity['bottleneck'])
+            return profile, brief
+
+        stages = [
+            ('patent landscape', patent_stage, settings['patent_workers']),
+            ('company discovery', company_stage, settings['company_workers']),
+            ('triage', triage_stage, 1),
+            ('plasma analysis', analysis_stage, settings['analysis_workers']),
+            ('opportunity brief', brief_stage, settings['brief_workers'])
+        ]
+        source = ledger.track(iter_industry_bottlenecks(industries, fingerprints))
+        priority = None
+        deferred = []
+
+        if scheduler is not None:
+            priority = functools.partial(_work_priority, research_profiles=research_profiles)
+            stages = [scheduler.stage(name, func, workers, priority) for name, func, workers in stages]
+            source = scheduler.source(source)
+
+        # Stage 1 (industry intelligence scan) feeds the others as pages are parsed
+        logger.info("\nStreaming: industry scan -> patent landscape -> company discovery -> triage "
+                    "-> plasma analysis -> briefs")
+        results = list(stream(
+            source,
+            stages,
+            queue_size=settings['queue_size'],
+            source_name='industry scan',
+            priority=priority,
+            stop_at=scheduler.stop_at if scheduler is not None else None
+        ))
+
+        for profile in research_profiles:
+            profile.triage.log_report(profile.name)
+        analyzer.prompt_stats.log_report()
+        analyzer.output_stats.log_report()
+
+        if scheduler is not None:
+            # Whatever was shed or cut off is picked up again by the next run
+            scheduler.log_report()
+            deferred = scheduler.deferred()
+            if scheduler.scan_cut:
+                # Sentences staged but never passed on, and pages not fully extracted, are scanned again
+                fingerprints.retain_only(scheduler.yielded)
+                fingerprints.discard_pages()
+            fingerprints.release(deferred)
+
+        # Failed briefs and items a stage dropped on an error are retried next run,
+        # in a shard's manifest as much as in a direct commit
+        unsettled = ledger.unsettled()
+        if unsettled:
+            logger.info(f"  {len(unsettled)} bottlenecks not fully processed, left for the next run")
+            fingerprints.release(unsettled)
+
+        briefs = {profile.name: [] for profile in research_profiles}
+        for profile, brief in results:
+            briefs[profile.name].append(brief)
+
+        with profiling.phase('report'):
+            if recorder is not None:
+                # The merge step reports and commits fingerprints for all shards at once
+                recorder.write([p.filename for p in research_profiles], briefs, deferred, fingerprints.staged())
+            else:
+                send_reports(research_profiles, briefs, deferred)
+
+                # Only remember what was seen once the run has gone through
+                fingerprints.commit()
 
         logger.info("\n" + "=" * 60)
         logger.info("PATENT SCOUT COMPLETE")
@@ -91,5 +225,84 @@ def main():
         logger.error(f"Error in Patent Scout: {e}", exc_info=True)
         sys.exit(1)
 
+def merge_shards(run_id=None, profiles=None):
+    """
+    Combine the shard manifests of a sharded run, then report and commit
+    fingerprints as a single-process run would
+    profiles defaults to the profiles the shards ran with
+    """
+
+    from utils.sharding import load_manifests, merge_manifests, write_merged, default_run_id
+    from industry_intel.fingerprint_store import FingerprintStore
+    from opportunity_engine.research_profiles import load_research_profiles
+
+    run_id = run_id or default_run_id()
+    logger.info(f"Merging shards of run {run_id}")
+
+    try:
+        merged = merge_manifests(load_manifests(run_id))
+        write_merged(merged)
+
+        industries = load_config('industries.yaml')
+        research_profiles = load_research_profiles(profiles or merged['profiles'], load_config, industries)
+
+        briefs = {profile.name: merged['briefs'].get(profile.name, []) for profile in research_profiles}
+        send_reports(research_profiles, briefs, merged['deferred'])
+
+        fingerprints = FingerprintStore()
+        fingerprints.stage(merged['fingerprints'])
+        fingerprints.commit()
+
+    except Exception as e:
+        logger.error(f"Error merging shards: {e}", exc_info=True)
+        sys.exit(1)
+
+def send_reports(research_profiles, briefs, deferred):
+    """
+    One report email per profile
+    briefs: {profile name: brief entries}; deferred: bottlenecks left for the next run
+    """
+
+    from utils.email_sender import send_monthly_report
+
+    for profile in research_profiles:
+        logger.info(f"  Generated {len(briefs[profile.name])} opportunity briefs for {profile.name}")
+        profile_deferred = sum(1 for bottleneck in deferred if profile.matches(bottleneck))
+        if briefs[profile.name] or profile_deferred:
+            # Send email with this profile's opportunities
+            send_monthly_report(
+                briefs[profile.name],
+                recipient=profile.email_recipient,
+                profile_name=profile.name if len(research_profiles) > 1 else None,
+                output_dir=profile.output_label,
+                deferred=profile_deferred
+            )
+
+def _source_bottleneck(item):
+    """The scanned bottleneck behind an item at any stage"""
+    if isinstance(item, tuple):
+        item = item[1]
+    return item.get('bottleneck', item)
+
+def _work_priority(item, research_profiles):
+    """
+    Scheduling priority in [0, 1]: the best profile priority a bottleneck
+    mentions, averaged with calculate_priority once it is an opportunity
+    """
+
+    from opportunity_engine.discussion_generator import calculate_priority
+
+    if isinstance(item, tuple):
+        profile, opportunity = item[:2]
+        return (profile.priority(opportunity['bottleneck']) + calculate_priority(opportunity)) / 2
+
+    if 'bottleneck' in item:
+        bottleneck = item['bottleneck']
+        return (max(p.priority(bottleneck) for p in research_profiles) + calculate_priority(item)) / 2
+
+    return max(p.priority(item) for p in research_profiles)
+
 if __name__ == '__main__':
+    from utils.logging_config import setup_logging
+    setup_logging()
     main()
@@ -4,6 +4,10 @@ Generate discussion briefs for opportunities
 
 import logging
 import os
+import glob
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from utils.gemini_analyzer import GeminiAnalyzer
 
@@ -11,43 +15,119 @@ logger = logging.getLogger(__name__)
 
 _ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
 
-def generate_briefs(opportunities, research_profile):
+# Suffix marking briefs that are still streaming or were interrupted
+PARTIAL_SUFFIX = '.partial'
+
+def generate_briefs(opportunities, research_profile, max_workers=3):
     """
     Generate comprehensive briefs for all opportunities
+    Briefs stream to disk as they are generated, max_workers at a time
     """
 
     logger.info("Generating opportunity briefs...")
 
     analyzer = GeminiAnalyzer()
-    briefs = []
-
-    for opp in opportunities:
-        logger.info(f"  Generating brief for: {opp['bottleneck']['industry']}")
-
-        # Generate brief with Gemini
-        brief = analyzer.generate_opportunity_brief(
-            bottleneck=opp['bottleneck'],
-            patent_landscape=opp['bottleneck']['patent_status'],
-            companies=opp['companies'],
-            capabilities=research_profile
-        )
-
-        if brief:
-            # Save to file
-            filename = os.path.join(_ROOT, f"data/opportunities/{opp['bottleneck']['industry']}_{datetime.now().strftime('%Y%m%d')}.md")
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-            with open(filename, 'w') as f:
-                f.write(brief)
-
-            briefs.append({
-                'title': f"{opp['bottleneck']['industry']} Opportunity",
-                'brief_file': filename,
-                'priority': calculate_priority(opp),
-                'companies': len(opp['companies'])
-            })
-
-    return briefs
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(generate_brief, analyzer, opp, research_profile)
+                   for opp in opportunities]
+        results = [future.result() for future in futures]
+
+    analyzer.prompt_stats.log_report()
+
+    return [brief for brief in results if brief]
+
+def generate_brief(analyzer, opp, research_profile, output_dir=None):
+    """
+    Stream one opportunity brief into output_dir (default data/opportunities/)
+    Chunks are written to a .partial file as they arrive; the file is renamed
+    to .md once the brief is complete. An existing .partial file is resumed,
+    whichever day it was started on, and completed under today's name.
+    """
+
+    industry = opp['bottleneck']['industry']
+    filename = brief_path(opp, output_dir)
+    partial_file = find_partial_brief(opp, output_dir) or filename + PARTIAL_SUFFIX
+
+    if os.path.exists(filename):
+        logger.info(f"  Brief already generated for: {industry}")
+        return _brief_entry(opp, filename)
+
+    resume_from = None
+    if os.path.exists(partial_file):
+        with open(partial_file, 'r') as f:
+            resume_from = f.read() or None
+        if resume_from:
+            logger.info(f"  Resuming partial brief for: {industry}")
+
+    logger.info(f"  Generating brief for: {industry}")
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    start = time.monotonic()
+    written = 0
+
+    try:
+        with open(partial_file, 'a' if resume_from else 'w') as f:
+            for chunk in analyzer.stream_opportunity_brief(
+                bottleneck=opp['bottleneck'],
+                patent_landscape=opp['bottleneck']['patent_status'],
+                companies=opp['companies'],
+                capabilities=research_profile,
+                resume_from=resume_from
+            ):
+                if not written:
+                    logger.info(f"  First output for {industry} after {time.monotonic() - start:.1f}s")
+                f.write(chunk)
+                f.flush()
+                written += len(chunk)
+
+    except Exception as e:
+        logger.error(f"Brief generation failed for {industry}, partial brief kept at {partial_file}: {e}")
+        return None
+
+    if not written:
+        if not resume_from and os.path.exists(partial_file):
+            os.remove(partial_file)
+        return None
+
+    os.replace(partial_file, filename)
+    logger.info(f"  Brief complete for {industry} in {time.monotonic() - start:.1f}s")
+
+    return _brief_entry(opp, filename)
+
+def brief_path(opp, output_dir=None):
+    """
+    Output path for an opportunity brief
+    The description hash keeps concurrent briefs for the same industry apart
+    and lets an interrupted run find its partial brief again
+    """
+
+    bottleneck = opp['bottleneck']
+    return os.path.join(output_dir or os.path.join(_ROOT, 'data/opportunities'),
+                        f"{bottleneck['industry']}_{datetime.now().strftime('%Y%m%d')}_{_digest(opp)}.md")
+
+def find_partial_brief(opp, output_dir=None):
+    """
+    Partial brief of an opportunity from an interrupted run, or None
+    Looked up by industry and description hash, so a run resumes one started
+    on an earlier day or before midnight; the newest one wins
+    """
+
+    industry = glob.escape(opp['bottleneck']['industry'])
+    pattern = os.path.join(glob.escape(output_dir or os.path.join(_ROOT, 'data/opportunities')),
+                           f"{industry}_*_{_digest(opp)}.md{PARTIAL_SUFFIX}")
+    return max(glob.glob(pattern), key=os.path.getmtime, default=None)
+
+def _digest(opp):
+    return hashlib.sha1(opp['bottleneck']['description'].encode('utf-8')).hexdigest()[:8]
+
+def _brief_entry(opp, filename):
+    return {
+        'title': f"{opp['bottleneck']['industry']} Opportunity",
+        'brief_file': filename,
+        'priority': calculate_priority(opp),
+        'companies': len(opp['companies'])
+    }
 
 def calculate_priority(opportunity):
     """
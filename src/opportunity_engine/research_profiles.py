@@ -0,0 +1,83 @@
+"""
+Research profiles served by one monthly run
+The scan, patent landscape and company lookups are shared; each profile only
+adds its own matching and briefs, written to its own directory and emailed
+to its own recipient
+"""
+
+import os
+import re
+import logging
+from opportunity_engine.triage import TriageGate, TriageScorer, triage_settings
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+DEFAULT_PROFILE = 'yatom_research_profile.yaml'
+
+class ResearchProfile:
+    """
+    One research group's profile and where its briefs go
+    Optional delivery: block in the profile yaml:
+        name: short name used in paths and the email subject (default from the file name)
+        output_dir: brief directory (default data/opportunities/<name>, and
+            data/opportunities itself for the default profile)
+        email_recipient: report address (default $EMAIL_RECIPIENT_<NAME>, then $EMAIL_RECIPIENT)
+    triage decides which of the run's opportunities are worth Gemini calls for this profile
+    """
+
+    def __init__(self, filename, config, industries_config=None):
+        delivery = config.get('delivery') or {}
+
+        self.filename = filename
+        self.config = config
+        self.name = delivery.get('name') or profile_name(filename)
+
+        # As configured, relative to the repository root, for logs and the report email
+        self.output_label = delivery.get('output_dir') or (
+            'data/opportunities' if filename == DEFAULT_PROFILE else os.path.join('data/opportunities', self.name))
+        self.output_dir = os.path.join(_ROOT, self.output_label)
+
+        env_name = re.sub(r'\W', '_', self.name).upper()
+        self.email_recipient = (delivery.get('email_recipient')
+                                or os.getenv(f'EMAIL_RECIPIENT_{env_name}')
+                                or os.getenv('EMAIL_RECIPIENT'))
+
+        self.min_score = triage_settings(industries_config)['min_score']
+        self.scorer = TriageScorer(config, industries_config)
+        self.triage = TriageGate(self.scorer, triage_settings(industries_config))
+
+    def priority(self, bottleneck):
+        """Weight of the best profile priority a bottleneck mentions (high 1.0 ... none 0)"""
+        text = f"{bottleneck.get('industry', '')} {bottleneck.get('description', '')}".lower()
+        return max((weight for term, weight in self.scorer.priorities.items() if term in text), default=0.0)
+
+    def matches(self, bottleneck):
+        """Whether a bottleneck is worth a brief for this profile (local, no LLM call)"""
+        return self.scorer.score(bottleneck) >= self.min_score
+
+def profile_name(filename):
+    """Short name from a profile file name, e.g. yatom_research_profile.yaml -> yatom"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return re.sub(r'_?research_profile$', '', stem) or stem
+
+def load_research_profiles(filenames, load_config, industries_config=None):
+    """
+    ResearchProfile for each profile file in config/
+    Profiles sharing a name would overwrite each other's briefs, so that is an error
+    """
+
+    profiles = [ResearchProfile(name, load_config(name) or {}, industries_config)
+                for name in dict.fromkeys(filenames or [DEFAULT_PROFILE])]
+
+    names = [p.name for p in profiles]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Research profiles share a name: {', '.join(duplicates)}")
+
+    for profile in profiles:
+        logger.info(f"Research profile {profile.name}: briefs to {profile.output_label}, "
+                    f"{'emailed' if profile.email_recipient else 'no email recipient'}")
+
+    return profiles
@@ -0,0 +1,268 @@
+"""
+Local triage of bottlenecks before Gemini analysis
+Scores each bottleneck against the research profile and monitored industries
+with sparse TF-IDF and keyword features, so only promising ones cost an LLM call
+"""
+
+import re
+import math
+import random
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'top_k': 10,          # at most this many opportunities per profile go to Gemini each run
+    'min_score': 0.25,    # and only those scoring at least this
+    'audit_sample': 2     # rejected opportunities also sent to Gemini to estimate recall
+}
+
+# Chance that a reject is audited while the audit sample is not yet full, so
+# the sample is spread over the run rather than its first rejects
+AUDIT_RATE = 0.25
+
+# TriageGate decisions
+SELECTED = 'selected'
+AUDITED = 'audited'
+OVER_BUDGET = 'over budget'
+REJECTED = 'rejected'
+
+PRIORITY_WEIGHTS = {'high': 1.0, 'medium': 0.6, 'low': 0.3}
+
+# Feature weights in the combined score
+SIMILARITY_WEIGHT = 0.6
+KEYWORD_WEIGHT = 0.25
+PRIORITY_WEIGHT = 0.15
+
+# Words that look like bottlenecks but carry no signal about plasma fit
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'that', 'this', 'from', 'are', 'was', 'were', 'has', 'have',
+    'its', 'their', 'which', 'can', 'will', 'also', 'into', 'more', 'than', 'such', 'other',
+    'been', 'being', 'these', 'those', 'not', 'but', 'all', 'our', 'per', 'via', 'use', 'used'
+}
+
+_WORD = re.compile(r'[a-z][a-z0-9]+')
+
+# Site chrome that report scrapes pick up as sentences: cookie banners, legal
+# links, account and sharing widgets; never a bottleneck, whatever words it shares
+_BOILERPLATE = re.compile(
+    r'\b(cookies?|privacy (policy|notice|statement)|terms (of (use|service)|and conditions)|'
+    r'(our|this) (web ?)?site|javascript|your browser|sign (in|up)|log ?in|subscribe|newsletter|'
+    r'all rights reserved|copyright|click here|skip to|back to top|share this|follow us|site ?map)\b',
+    re.IGNORECASE
+)
+
+def triage_settings(config=None):
+    """
+    Triage settings from the triage: block of industries.yaml
+    """
+
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({k: v for k, v in ((config or {}).get('triage') or {}).items() if k in DEFAULT_SETTINGS})
+    return settings
+
+def is_boilerplate(text):
+    """Whether a sentence is site navigation or legal boilerplate rather than report content"""
+    return bool(_BOILERPLATE.search(text or ''))
+
+class TriageGate:
+    """
+    Streaming triage in front of Gemini for one research profile
+    Opportunities are decided as they arrive: those scoring at least min_score
+    go to Gemini, top_k at most per run, and the rest are put off to the next
+    run. A few rejects (audit_sample) are sent anyway, so the cascade report
+    can estimate how many viable opportunities triage throws away
+    """
+
+    def __init__(self, scorer, settings, seed=None):
+        self.scorer = scorer
+        self.settings = settings
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {SELECTED: 0, AUDITED: 0, OVER_BUDGET: 0, REJECTED: 0}
+        self.analyzed = {SELECTED: 0, AUDITED: 0}
+        self.viable = {SELECTED: 0, AUDITED: 0}
+
+    def admit(self, bottleneck):
+        """(decision, score): SELECTED or AUDITED go to Gemini, OVER_BUDGET waits for the next run"""
+        score = self.scorer.score(bottleneck)
+
+        with self._lock:
+            if score <= 0:
+                # Boilerplate or nothing in common with the profile: not even worth an audit
+                decision = REJECTED
+            elif score >= self.settings['min_score']:
+                decision = SELECTED if self.counts[SELECTED] < self.settings['top_k'] else OVER_BUDGET
+            elif self.counts[AUDITED] < self.settings['audit_sample'] and self._random.random() < AUDIT_RATE:
+                decision = AUDITED
+            else:
+                decision = REJECTED
+            self.counts[decision] += 1
+
+        return decision, score
+
+    def record(self, decision, viable):
+        """Gemini's verdict on an opportunity that triage let through"""
+        with self._lock:
+            self.analyzed[decision] += 1
+            self.viable[decision] += bool(viable)
+
+    def log_report(self, label=None):
+        with self._lock:
+            counts, analyzed, viable = dict(self.counts), dict(self.analyzed), dict(self.viable)
+
+        logger.info(f"Triage{f' ({label})' if label else ''}: {counts[SELECTED]} sent to Gemini, "
+                    f"{counts[OVER_BUDGET]} over top_k={self.settings['top_k']} left for the next run, "
+                    f"{counts[REJECTED] + counts[AUDITED]} below min_score={self.settings['min_score']}")
+        # Rates over the opportunities Gemini actually judged; failed analyses are retried next run
+        return log_cascade_report(analyzed[SELECTED], viable[SELECTED], counts[REJECTED] + counts[AUDITED],
+                                  analyzed[AUDITED], viable[AUDITED])
+
+def log_cascade_report(selected_count, selected_viable, rejected_count, audited, audited_viable):
+    """
+    Log the cascade's precision, and its recall estimated from the audit sample
+    """
+
+    precision = selected_viable / selected_count if selected_count else 0.0
+
+    # Viable rate among audited rejects, extrapolated to every reject
+    missed = (audited_viable / audited) * rejected_count if audited else 0.0
+    recall = selected_viable / (selected_viable + missed) if (selected_viable + missed) else 1.0
+
+    logger.info(f"Triage cascade: precision {precision:.0%} ({selected_viable}/{selected_count} viable), "
+                f"est. recall {recall:.0%} ({audited_viable}/{audited} audited rejects viable), "
+                f"{rejected_count} Gemini calls skipped")
+
+    return {'precision': precision, 'recall': recall, 'skipped': rejected_count}
+
+class TriageScorer:
+    """
+    Scores bottleneck descriptions against profile and industry documents
+    Each capability, priority and monitored industry is one TF-IDF document;
+    a bottleneck's similarity is its best cosine match among them
+    """
+
+    def __init__(self, research_profile, industries_config=None):
+        self.documents = profile_documents(research_profile, industries_config)
+        self.keywords = industry_keywords(industries_config)
+        self.priorities = priority_terms(research_profile)
+
+        doc_terms = [Counter(tokenize(text)) for text, _ in self.documents]
+        self.idf = _idf(doc_terms)
+        self.vectors = [(_tfidf(terms, self.idf), weight) for terms, (_, weight) in zip(doc_terms, self.documents)]
+
+    def score(self, bottleneck):
+        """
+        Score in [0, 1]: TF-IDF similarity, keyword hits and priority match
+        Boilerplate scores 0
+        """
+
+        if is_boilerplate(bottleneck.get('description', '')):
+            return 0.0
+
+        text = f"{bottleneck.get('industry', '')} {bottleneck.get('description', '')}"
+        terms = Counter(tokenize(text))
+        if not terms:
+            return 0.0
+
+        vector = _tfidf(terms, self.idf)
+        similarity = max((_cosine(vector, doc) * weight for doc, weight in self.vectors), default=0.0)
+
+        lowered = text.lower()
+        hits = sum(1 for phrase in self.keywords if phrase in lowered)
+        keyword_score = min(1.0, hits / 3)
+
+        priority_score = max((weight for term, weight in self.priorities.items() if term in lowered), default=0.0)
+
+        return SIMILARITY_WEIGHT * similarity + KEYWORD_WEIGHT * keyword_score + PRIORITY_WEIGHT * priority_score
+
+def profile_documents(research_profile, industries_config=None):
+    """
+    (text, weight) documents describing what counts as a good match
+    """
+
+    documents = []
+
+    for capability in research_profile.get('unique_capabilities', []):
+        documents.append((f"{capability.get('name', '')} {capability.get('description', '')}", 1.0))
+
+    for focus in research_profile.get('current_focus', []):
+        documents.append((focus, 1.0))
+
+    for level, phrases in priority_topics(research_profile):
+        documents.append((' '.join(phrases), PRIORITY_WEIGHTS.get(level, 0.5)))
+
+    for name, industry in ((industries_config or {}).get('target_industries') or {}).items():
+        terms = [name.replace('_', ' ')] + industry.get('keywords', []) + industry.get('pain_points', [])
+        documents.append((' '.join(terms), 0.8))
+
+    return documents
+
+def industry_keywords(industries_config=None):
+    """
+    Lowercased keyword and pain point phrases of the monitored industries
+    """
+
+    phrases = set()
+    for industry in ((industries_config or {}).get('target_industries') or {}).values():
+        for phrase in industry.get('keywords', []) + industry.get('pain_points', []):
+            phrases.add(phrase.lower())
+    return phrases
+
+def priority_terms(research_profile):
+    """
+    {priority topic phrase: weight}, e.g. 'battery recycling': 1.0
+    A topic's priority_aliases count as the topic
+    """
+
+    terms = {}
+    for level, phrases in priority_topics(research_profile):
+        for phrase in phrases:
+            terms[phrase] = max(terms.get(phrase, 0.0), PRIORITY_WEIGHTS.get(level, 0.5))
+    return terms
+
+def priority_topics(research_profile):
+    """
+    (level, lowercased phrases) per priority topic: the topic itself, e.g.
+    'ree separation', and its priority_aliases, e.g. 'rare earth separation'
+    """
+
+    aliases = {str(topic).lower(): names for topic, names in (research_profile.get('priority_aliases') or {}).items()}
+
+    for level, topics in (research_profile.get('priorities') or {}).items():
+        for topic in topics:
+            phrases = [topic.replace('_', ' ')] + list(aliases.get(topic.lower()) or [])
+            yield level, list(dict.fromkeys(phrase.lower() for phrase in phrases))
+
+def tokenize(text):
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+def _stem(word):
+    """Crude suffix stripping so 'separation'/'separating' and 'nanotubes'/'nanotube' match"""
+    for suffix in ('ations', 'ation', 'ing', 'ies', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+def _idf(doc_terms):
+    df = Counter(term for terms in doc_terms for term in terms)
+    n = len(doc_terms)
+    return {term: math.log((1 + n) / (1 + count)) + 1 for term, count in df.items()}
+
+def _tfidf(terms, idf):
+    """
+    Sparse L2-normalized TF-IDF vector
+    Terms outside the profile vocabulary get the rarest-term IDF, so boilerplate
+    with one incidental profile word scores low
+    """
+    unseen = max(idf.values(), default=1.0)
+    vector = {term: (1 + math.log(count)) * idf.get(term, unseen) for term, count in terms.items()}
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {term: v / norm for term, v in vector.items()} if norm else {}
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(term, 0.0) for term, v in a.items())
@@ -3,7 +3,8 @@ Freedom to Operate (FTO) analysis
 """
 
 import logging
-from patent_landscape.google_patents_scraper import search_google_patents
+from patent_landscape.google_patents_scraper import search_google_patents, patent_text
+from patent_landscape.patent_details import enrich_patents
 from patent_landscape.uspto_fetcher import search_uspto
 
 logger = logging.getLogger(__name__)
@@ -24,10 +25,12 @@ def analyze_fto(technology_description, target_market='US'):
 
     all_patents = google_patents + uspto_patents
 
+    # Abstracts and claims, so the filter is not limited to titles
+    enrich_patents(all_patents)
+
     # Filter for potentially blocking patents
     plasma_relevant = [p for p in all_patents
-                       if any(kw in p.get('title', '').lower() or kw in p.get('abstract', '').lower()
-                              for kw in ['plasma', 'discharge', 'ionization'])]
+                       if any(kw in patent_text(p) for kw in ['plasma', 'discharge', 'ionization'])]
 
     if plasma_relevant:
         blocking_patents = plasma_relevant
@@ -1,14 +1,39 @@
 """
 Google Patents scraper for patent landscape analysis
+Uses the JSON query endpoint behind the patents.google.com front end; the
+HTML results page is rendered client-side and has no results in it
 """
 
-import logging
-import requests
-from bs4 import BeautifulSoup
+import re
+import html
+import json
 import time
+import logging
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from utils.http_session import get_session
+from utils.ttl_cache import ttl_cache
+from utils.profiling import timed
+from patent_landscape.patent_details import enrich_patents
 
 logger = logging.getLogger(__name__)
 
+GOOGLE_PATENTS_QUERY_URL = 'https://patents.google.com/xhr/query'
+
+# Largest page the endpoint serves
+MAX_PAGE_SIZE = 100
+
+# Results per landscape search; the total count comes from the endpoint
+LANDSCAPE_RESULTS = 100
+
+# Top results per landscape enriched with abstract, claims and CPC codes
+LANDSCAPE_ENRICH = 50
+
+# Google Patents rate-limits aggressively; cap concurrent searches
+MAX_SEARCH_FETCH_WORKERS = 2
+
+_TAG = re.compile(r'<[^>]+>')
+
 def check_patent_landscape(bottleneck):
     """
     Check if plasma approaches exist for this bottleneck
@@ -16,64 +41,195 @@ def check_patent_landscape(bottleneck):
 
     logger.info(f"  Checking patent landscape for: {bottleneck['industry']}")
 
-    # Build search query
+    # Search Google Patents
+    results = query_google_patents(landscape_query(bottleneck), max_results=LANDSCAPE_RESULTS)
+    enrich_patents(results['patents'], limit=LANDSCAPE_ENRICH)
+
+    return summarize_landscape(results['patents'], total=results['total'])
+
+def check_patent_landscapes(bottlenecks):
+    """
+    Patent landscape for many bottlenecks
+    Bottlenecks that share a search query are searched once
+    Returns landscapes in bottleneck order
+    """
+
+    queries = list(dict.fromkeys(landscape_query(b) for b in bottlenecks))
+    logger.info(f"  Checking patent landscape: {len(queries)} searches for {len(bottlenecks)} bottlenecks")
+
+    def search(query):
+        result = query_google_patents(query, max_results=LANDSCAPE_RESULTS)
+        enrich_patents(result['patents'], limit=LANDSCAPE_ENRICH)
+        return result
+
+    with ThreadPoolExecutor(max_workers=MAX_SEARCH_FETCH_WORKERS) as executor:
+        results = dict(zip(queries, executor.map(search, queries)))
+
+    landscapes = []
+    for bottleneck in bottlenecks:
+        result = results[landscape_query(bottleneck)]
+        landscapes.append(summarize_landscape(result['patents'], total=result['total']))
+
+    return landscapes
+
+def landscape_query(bottleneck):
+    """
+    Search query for a bottleneck's plasma patent landscape
+    """
+
     search_terms = [
         bottleneck['industry'],
         'plasma',
         'processing'
     ]
 
-    query = ' '.join(search_terms)
+    return ' '.join(search_terms)
 
-    # Search Google Patents
-    results = search_google_patents(query)
+def summarize_landscape(results, total=None):
+    """
+    Landscape summary of search results
+    total: match count reported by the search, when known
+    """
 
     # Check if white space (no plasma patents)
-    plasma_patents = [r for r in results if 'plasma' in r['title'].lower() or 'plasma' in r.get('abstract', '').lower()]
+    plasma_patents = [r for r in results if 'plasma' in patent_text(r)]
 
     return {
-        'total_patents': len(results),
+        'total_patents': max(total or 0, len(results)),
         'plasma_patents': len(plasma_patents),
         'white_space': len(plasma_patents) == 0,
         'patents': plasma_patents[:5]  # Top 5
     }
 
+def scan_industry_landscapes(industries_config):
+    """
+    Check the patent landscape for every target industry
+    """
+
+    industries = list(industries_config['target_industries'])
+    landscapes = check_patent_landscapes([{'industry': i, 'process': 'general'} for i in industries])
+
+    results = {}
+
+    for industry, landscape in zip(industries, landscapes):
+        results[industry] = landscape
+        logger.info(f"{industry}: {landscape['total_patents']} patents found, white space: {landscape['white_space']}")
+
+    return results
+
+def save_landscape_snapshot(results):
+    """
+    Append a quarterly landscape snapshot to the landscape store
+    Returns the store path
+    """
+
+    from patent_landscape.landscape_store import LandscapeStore
+
+    with LandscapeStore() as store:
+        store.record_snapshot(results)
+        return store.path
+
+def patent_text(patent):
+    """Lowercased title, abstract and claims of a patent for keyword tests"""
+    return f"{patent.get('title', '')} {patent.get('abstract', '')} {patent.get('claims', '')}".lower()
+
 def search_google_patents(query, max_results=20):
     """
     Search Google Patents (public search)
     """
 
+    return query_google_patents(query, max_results=max_results)['patents']
+
+@timed('google_patents.query')
+@ttl_cache(cache_if=lambda result: bool(result['patents']))
+def query_google_patents(query, max_results=20):
+    """
+    Search Google Patents through its JSON query endpoint, paging as needed
+    Returns: {'total': match count, 'patents': [...up to max_results]}
+    """
+
     patents = []
+    total = 0
+    page_size = min(MAX_PAGE_SIZE, max(10, max_results))
 
     try:
-        # Google Patents public search URL
-        url = f"https://patents.google.com/?q={query.replace(' ', '+')}"
+        page = 0
+        while len(patents) < max_results:
+            content = fetch_search_page(query, page=page, num=page_size)
+            if content is None:
+                break
+
+            result = parse_search_results(query, content)
+            total = result['total'] or total
+            patents.extend(result['patents'])
+
+            page += 1
+            if not result['patents'] or page >= result['pages']:
+                break
+
+    except Exception as e:
+        logger.warning(f"Google Patents search failed: {e}")
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+    return {'total': total, 'patents': patents[:max_results]}
 
-        response = requests.get(url, headers=headers, timeout=30)
+@timed('google_patents.fetch_page')
+def fetch_search_page(query, page=0, num=MAX_PAGE_SIZE):
+    """
+    Raw JSON of one results page for a query, or None
+    """
 
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
+    # The endpoint takes the front end's search URL parameters, encoded as url=
+    search = urlencode({'q': query, 'num': num, 'page': page})
+    url = f"{GOOGLE_PATENTS_QUERY_URL}?{urlencode({'url': search, 'exp': ''})}"
 
-            # Parse patent results (basic scraping)
-            # Note: Google Patents may require more sophisticated parsing
-            patent_elements = soup.find_all('search-result-item', limit=max_results)
+    response = get_session().get(url, headers={'Accept': 'application/json'}, timeout=30)
+    time.sleep(2)  # Rate limiting
 
-            for elem in patent_elements:
-                title_elem = elem.find('h3')
-                if title_elem:
-                    patents.append({
-                        'title': title_elem.text.strip(),
-                        'abstract': '',  # Would need more detailed parsing
-                        'source': 'Google Patents'
-                    })
+    if response.status_code != 200:
+        logger.warning(f"Google Patents search returned {response.status_code} for: {query}")
+        return None
 
-        time.sleep(2)  # Rate limiting
+    return response.content
 
-    except Exception as e:
-        logger.warning(f"Google Patents search failed: {e}")
+def parse_search_results(query, content):
+    """
+    Patents in one JSON results page
+    Returns: {'total', 'pages', 'patents'}
+    """
+
+    text = content.decode('utf-8') if isinstance(content, bytes) else content
+
+    # Strip the anti-JSON-hijacking prefix if the endpoint adds one
+    if text.startswith(")]}'"):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+
+    results = json.loads(text).get('results', {})
+
+    patents = []
+    for cluster in results.get('cluster', []):
+        for entry in cluster.get('result', []):
+            patent = entry.get('patent') or {}
+            number = patent.get('publication_number', '')
+            if not number and not patent.get('title'):
+                continue
+
+            patents.append({
+                'title': _clean(patent.get('title', '')),
+                'number': number,
+                'abstract': _clean(patent.get('snippet', '')),  # abstract excerpt matching the query
+                'assignee': _clean(patent.get('assignee', '')),
+                'priority_date': patent.get('priority_date', ''),
+                'publication_date': patent.get('publication_date', ''),
+                'url': f"https://patents.google.com/patent/{number}/en" if number else '',
+                'source': 'Google Patents'
+            })
+
+    return {
+        'total': results.get('total_num_results', 0),
+        'pages': results.get('total_num_pages', 1),
+        'patents': patents
+    }
 
-    return patents
+def _clean(text):
+    """Plain text from a result field (match highlighting tags, HTML entities)"""
+    return html.unescape(_TAG.sub('', text)).strip()
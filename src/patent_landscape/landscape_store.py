@@ -0,0 +1,315 @@
+"""
+Append-only time-series store for quarterly patent landscapes
+SQLite tables of per-industry counts, per-CPC samples and patent IDs by
+snapshot date, so trends and quarter-over-quarter diffs are indexed lookups
+CPC codes are not searched on their own: a CPC row only counts the sampled
+industry patents (the enriched top results) that carry the code, so it has
+no total, plasma share or white space
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+DEFAULT_PATH = os.path.join(_ROOT, 'data/patent_landscape/landscape.sqlite')
+
+# Legacy per-quarter snapshots written before the store existed
+_LEGACY_SNAPSHOT = re.compile(r'^quarterly_(\d{4})(\d{2})(\d{2})\.json$')
+
+# CPC rows used to be stored as counts, with the sample size as every count
+_MIGRATE_CPC_COUNTS = """
+INSERT OR IGNORE INTO cpc_samples
+    SELECT snapshot_date, key, total_patents FROM counts WHERE dimension = 'cpc';
+DELETE FROM counts WHERE dimension = 'cpc';
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    snapshot_date TEXT PRIMARY KEY,
+    recorded_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS counts (
+    snapshot_date TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    total_patents INTEGER NOT NULL,
+    plasma_patents INTEGER NOT NULL,
+    white_space INTEGER NOT NULL,
+    PRIMARY KEY (dimension, key, snapshot_date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS cpc_samples (
+    snapshot_date TEXT NOT NULL,
+    code TEXT NOT NULL,
+    sampled_patents INTEGER NOT NULL,
+    PRIMARY KEY (code, snapshot_date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS patents (
+    id INTEGER PRIMARY KEY,
+    patent_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    source TEXT
+);
+
+CREATE TABLE IF NOT EXISTS snapshot_patents (
+    snapshot_date TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    patent INTEGER NOT NULL REFERENCES patents(id),
+    PRIMARY KEY (dimension, key, snapshot_date, patent)
+) WITHOUT ROWID;
+"""
+
+class LandscapeStore:
+    """
+    Quarterly landscape history in one SQLite file
+    Dimensions are 'industry' and 'cpc'; CPC entries only have sampled_patents
+    """
+
+    def __init__(self, path=DEFAULT_PATH, import_legacy=True):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+        with self.conn:
+            self.conn.executescript(_MIGRATE_CPC_COUNTS)
+
+        if import_legacy:
+            self.import_json_snapshots(os.path.dirname(path))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_snapshot(self, results, snapshot_date=None):
+        """
+        Append one landscape snapshot
+        results: {industry: check_patent_landscape() result}
+        Per-CPC samples are taken from the patents' cpc_codes when present
+        Returns the snapshot date
+        """
+
+        snapshot_date = snapshot_date or datetime.now().strftime('%Y-%m-%d')
+
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?)",
+                              (snapshot_date, datetime.now().isoformat(timespec='seconds')))
+            self.conn.execute("DELETE FROM counts WHERE snapshot_date = ?", (snapshot_date,))
+            self.conn.execute("DELETE FROM cpc_samples WHERE snapshot_date = ?", (snapshot_date,))
+            self.conn.execute("DELETE FROM snapshot_patents WHERE snapshot_date = ?", (snapshot_date,))
+
+            for industry, landscape in results.items():
+                self._insert_entry(snapshot_date, 'industry', industry, landscape)
+
+            for code, patents in _cpc_samples(results).items():
+                self.conn.execute("INSERT INTO cpc_samples VALUES (?, ?, ?)", (snapshot_date, code, len(patents)))
+                self._insert_patents(snapshot_date, 'cpc', code, patents)
+
+        logger.info(f"Recorded landscape snapshot {snapshot_date} ({len(results)} industries)")
+        return snapshot_date
+
+    def snapshot_dates(self):
+        """All snapshot dates, oldest first"""
+        return [row[0] for row in self.conn.execute("SELECT snapshot_date FROM snapshots ORDER BY snapshot_date")]
+
+    def keys(self, dimension='industry'):
+        """Industries or CPC codes with recorded counts"""
+        if dimension == 'cpc':
+            rows = self.conn.execute("SELECT DISTINCT code FROM cpc_samples ORDER BY code")
+        else:
+            rows = self.conn.execute("SELECT DISTINCT key FROM counts WHERE dimension = ? ORDER BY key", (dimension,))
+        return [row[0] for row in rows]
+
+    def trend(self, key, dimension='industry', since=None):
+        """
+        Counts for one industry or CPC code across snapshots
+        Returns: list of {'date', 'total_patents', 'plasma_patents', 'white_space'},
+        or of {'date', 'sampled_patents'} for a CPC code
+        """
+
+        if dimension == 'cpc':
+            rows = self.conn.execute(
+                """SELECT snapshot_date, sampled_patents FROM cpc_samples
+                   WHERE code = ? AND snapshot_date >= ? ORDER BY snapshot_date""",
+                (key, since or '')
+            )
+            return [{'date': row['snapshot_date'], 'sampled_patents': row['sampled_patents']} for row in rows]
+
+        rows = self.conn.execute(
+            """SELECT snapshot_date, total_patents, plasma_patents, white_space FROM counts
+               WHERE dimension = ? AND key = ? AND snapshot_date >= ? ORDER BY snapshot_date""",
+            (dimension, key, since or '')
+        )
+
+        return [{
+            'date': row['snapshot_date'],
+            'total_patents': row['total_patents'],
+            'plasma_patents': row['plasma_patents'],
+            'white_space': bool(row['white_space'])
+        } for row in rows]
+
+    def diff(self, date_a, date_b, dimension='industry'):
+        """
+        Changes between two snapshots per industry or CPC code
+        Returns: {key: {'total_delta', 'plasma_delta', 'white_space', 'new_patents', 'dropped_patents'}},
+        with 'sampled_delta' in place of the counts for CPC codes
+        """
+
+        if dimension == 'cpc':
+            return self._cpc_diff(date_a, date_b)
+
+        counts_a = self._counts(date_a, dimension)
+        counts_b = self._counts(date_b, dimension)
+        changes = {}
+
+        for key in sorted(set(counts_a) | set(counts_b)):
+            a = counts_a.get(key, {'total_patents': 0, 'plasma_patents': 0, 'white_space': 1})
+            b = counts_b.get(key, {'total_patents': 0, 'plasma_patents': 0, 'white_space': 1})
+            patents_a = self._patent_ids(date_a, dimension, key)
+            patents_b = self._patent_ids(date_b, dimension, key)
+
+            changes[key] = {
+                'total_delta': b['total_patents'] - a['total_patents'],
+                'plasma_delta': b['plasma_patents'] - a['plasma_patents'],
+                'white_space': [bool(a['white_space']), bool(b['white_space'])],
+                'new_patents': sorted(patents_b - patents_a),
+                'dropped_patents': sorted(patents_a - patents_b)
+            }
+
+        return changes
+
+    def patents(self):
+        """Every patent recorded in any snapshot"""
+        rows = self.conn.execute("SELECT patent_id, title, source FROM patents")
+        return [{'number': row['patent_id'], 'title': row['title'] or '', 'source': row['source'] or ''}
+                for row in rows]
+
+    def import_json_snapshots(self, directory):
+        """
+        Import legacy quarterly_YYYYMMDD.json files not yet in the store
+        Returns the number of snapshots imported
+        """
+
+        if not os.path.isdir(directory):
+            return 0
+
+        known = set(self.snapshot_dates())
+        imported = 0
+
+        for name in sorted(os.listdir(directory)):
+            match = _LEGACY_SNAPSHOT.match(name)
+            if not match:
+                continue
+
+            snapshot_date = '-'.join(match.groups())
+            if snapshot_date in known:
+                continue
+
+            try:
+                with open(os.path.join(directory, name), 'r') as f:
+                    results = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping legacy snapshot {name}: {e}")
+                continue
+
+            self.record_snapshot(results, snapshot_date=snapshot_date)
+            imported += 1
+
+        return imported
+
+    def _cpc_diff(self, date_a, date_b):
+        samples_a = self._cpc_sample_sizes(date_a)
+        samples_b = self._cpc_sample_sizes(date_b)
+        changes = {}
+
+        for code in sorted(set(samples_a) | set(samples_b)):
+            patents_a = self._patent_ids(date_a, 'cpc', code)
+            patents_b = self._patent_ids(date_b, 'cpc', code)
+
+            changes[code] = {
+                'sampled_delta': samples_b.get(code, 0) - samples_a.get(code, 0),
+                'new_patents': sorted(patents_b - patents_a),
+                'dropped_patents': sorted(patents_a - patents_b)
+            }
+
+        return changes
+
+    def _insert_entry(self, snapshot_date, dimension, key, landscape):
+        self.conn.execute(
+            "INSERT INTO counts VALUES (?, ?, ?, ?, ?, ?)",
+            (snapshot_date, dimension, key, landscape.get('total_patents', 0),
+             landscape.get('plasma_patents', 0), int(bool(landscape.get('white_space', True))))
+        )
+        self._insert_patents(snapshot_date, dimension, key, landscape.get('patents', []))
+
+    def _insert_patents(self, snapshot_date, dimension, key, patents):
+        for patent in patents:
+            patent_id = patent_key(patent)
+            if not patent_id:
+                continue
+
+            self.conn.execute(
+                "INSERT INTO patents (patent_id, title, source) VALUES (?, ?, ?) "
+                "ON CONFLICT(patent_id) DO UPDATE SET title = excluded.title",
+                (patent_id, patent.get('title', ''), patent.get('source', ''))
+            )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO snapshot_patents "
+                "SELECT ?, ?, ?, id FROM patents WHERE patent_id = ?",
+                (snapshot_date, dimension, key, patent_id)
+            )
+
+    def _counts(self, snapshot_date, dimension):
+        rows = self.conn.execute(
+            "SELECT key, total_patents, plasma_patents, white_space FROM counts "
+            "WHERE snapshot_date = ? AND dimension = ?",
+            (snapshot_date, dimension)
+        )
+        return {row['key']: dict(row) for row in rows}
+
+    def _cpc_sample_sizes(self, snapshot_date):
+        rows = self.conn.execute("SELECT code, sampled_patents FROM cpc_samples WHERE snapshot_date = ?",
+                                 (snapshot_date,))
+        return {row['code']: row['sampled_patents'] for row in rows}
+
+    def _patent_ids(self, snapshot_date, dimension, key):
+        rows = self.conn.execute(
+            """SELECT p.patent_id FROM snapshot_patents s JOIN patents p ON p.id = s.patent
+               WHERE s.dimension = ? AND s.key = ? AND s.snapshot_date = ?""",
+            (dimension, key, snapshot_date)
+        )
+        return {row[0] for row in rows}
+
+def patent_key(patent):
+    """Publication number where known, otherwise the title"""
+    return patent.get('number') or patent.get('title', '')
+
+def _cpc_samples(results):
+    """
+    {CPC code: sampled patents carrying it} over the industry landscapes
+    Only patents with cpc_codes, i.e. the enriched top results, are sampled
+    """
+
+    by_code = {}
+
+    for landscape in results.values():
+        for patent in landscape.get('patents', []):
+            for code in patent.get('cpc_codes', []):
+                by_code.setdefault(code, {}).setdefault(patent_key(patent), patent)
+
+    return {code: list(patents.values()) for code, patents in by_code.items()}
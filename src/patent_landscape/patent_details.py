@@ -0,0 +1,205 @@
+"""
+Patent detail enrichment
+Fills in abstracts, claims, CPC codes and priority dates for search results
+from the Google Patents patent pages, caching each patent's details in a
+compressed content-addressed store so they are fetched at most once
+"""
+
+import os
+import re
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from utils.http_session import HostThrottle, get_session, retry_after
+from utils.fetch_pipeline import fetch_and_parse
+from utils.profiling import timed
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+# One gzipped JSON file per patent, fanned out by key prefix
+DETAILS_CACHE_DIR = os.path.join(_ROOT, 'data/cache/patent_details')
+
+PATENT_PAGE_URL = 'https://patents.google.com/patent/{number}/en'
+
+# Patent pages are fetched from the same host as searches; stay gentle
+DETAIL_FETCH_WORKERS = 4
+
+# Seconds between patent page requests, over all fetch threads and concurrent
+# enrichments; a 429 or 503 holds the host for BACKOFF_SECONDS (or its
+# Retry-After), doubling on each retry
+DETAIL_REQUEST_DELAY = 1.0
+DETAIL_RETRIES = 3
+BACKOFF_SECONDS = 5.0
+RETRY_STATUSES = (429, 503)
+
+_throttle = HostThrottle(DETAIL_REQUEST_DELAY)
+
+# Claims can run to tens of pages; relevance checks only need the start
+CLAIMS_MAX_CHARS = 8000
+
+# Batches this small are parsed in the calling thread
+SMALL_BATCH = 4
+
+DETAIL_FIELDS = ('abstract', 'claims', 'cpc_codes', 'priority_date')
+
+@timed('patent_details.enrich')
+def enrich_patents(patents, limit=None, parse_workers=None):
+    """
+    Add details to patents (in place) that have a publication number
+    Cached details are used as is; the rest are fetched in bulk, limit at most
+    Returns the patents
+    """
+
+    candidates = [p for p in patents if detail_number(p)][:limit]
+    missing = []
+
+    for patent in candidates:
+        details = load_details(detail_number(patent))
+        if details is None:
+            missing.append(detail_number(patent))
+        else:
+            merge_details(patent, details)
+
+    missing = list(dict.fromkeys(missing))
+
+    # A process pool only pays off for more than a handful of pages
+    if parse_workers is None and len(missing) <= SMALL_BATCH:
+        parse_workers = 0
+
+    if missing:
+        logger.info(f"Fetching details for {len(missing)} patents ({len(candidates) - len(missing)} cached)")
+
+        fetched = {}
+        for number, details in fetch_and_parse(missing, fetch_detail_page, parse_detail_page,
+                                               fetch_workers=DETAIL_FETCH_WORKERS,
+                                               parse_workers=parse_workers):
+            save_details(details)
+            fetched[number] = details
+
+        for patent in candidates:
+            details = fetched.get(detail_number(patent))
+            if details is not None:
+                merge_details(patent, details)
+
+    return patents
+
+def detail_number(patent):
+    """
+    Publication number to look a patent up by, e.g. US10000000B2
+    Bare USPTO numbers get the US prefix
+    """
+
+    number = (patent.get('number') or '').replace(' ', '').replace(',', '')
+    if number.isdigit():
+        number = f"US{number}"
+    return number
+
+def merge_details(patent, details):
+    """Copy fetched details over the search result's fields"""
+    if details.get('missing'):
+        return
+
+    for field in DETAIL_FIELDS:
+        if details.get(field):
+            patent[field] = details[field]
+
+@timed('patent_details.fetch_page')
+def fetch_detail_page(number):
+    """
+    Fetch stage: a patent page, or None
+    A page that does not exist is recorded as missing so it is not retried
+    Requests are throttled per host and retried after a backoff on 429/503
+    """
+
+    url = PATENT_PAGE_URL.format(number=number)
+
+    for attempt in range(DETAIL_RETRIES + 1):
+        _throttle.wait(url)
+        response = get_session().get(url, timeout=30)
+        if response.status_code not in RETRY_STATUSES or attempt == DETAIL_RETRIES:
+            break
+
+        backoff = retry_after(response, BACKOFF_SECONDS * 2 ** attempt)
+        logger.info(f"Patent page returned {response.status_code}: {number}, backing off {backoff:.0f}s")
+        _throttle.back_off(url, backoff)
+
+    if response.status_code == 404:
+        save_details({'number': number, 'missing': True})
+        return None
+
+    if response.status_code != 200:
+        logger.warning(f"Patent page returned {response.status_code}: {number}")
+        return None
+
+    return response.content
+
+def parse_detail_page(number, content):
+    """
+    Parse stage (runs in a worker process): details from a patent page
+    """
+
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+
+    abstract = soup.select_one('section[itemprop="abstract"] .abstract') or soup.select_one('section[itemprop="abstract"]')
+    if abstract is not None:
+        abstract = _text(abstract.get_text(' '))
+    else:
+        meta = soup.find('meta', attrs={'name': 'DC.description'})
+        abstract = _text(meta.get('content', '')) if meta else ''
+
+    claims = soup.select_one('section[itemprop="claims"]')
+    claims = _text(claims.get_text(' '))[:CLAIMS_MAX_CHARS] if claims is not None else ''
+
+    # Leaf CPC codes only; the page also lists every ancestor class
+    cpc_codes = []
+    for code in soup.select('[itemprop="classifications"] [itemprop="Code"]'):
+        if code.parent.find('meta', attrs={'itemprop': 'Leaf'}) is not None:
+            cpc_codes.append(code.get_text(strip=True))
+
+    priority = soup.find(attrs={'itemprop': 'priorityDate'})
+    priority_date = ''
+    if priority is not None:
+        priority_date = priority.get('datetime') or priority.get_text(strip=True)
+
+    return {
+        'number': number,
+        'abstract': abstract,
+        'claims': claims,
+        'cpc_codes': list(dict.fromkeys(cpc_codes)),
+        'priority_date': priority_date,
+        'fetched_at': datetime.now().isoformat(timespec='seconds')
+    }
+
+def load_details(number):
+    path = _cache_path(number)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring corrupt patent detail cache {path}: {e}")
+        return None
+
+def save_details(details):
+    path = _cache_path(details['number'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(details, f)
+    os.replace(tmp_path, path)
+
+def _cache_path(number):
+    key = hashlib.sha256(number.upper().encode('utf-8')).hexdigest()
+    return os.path.join(DETAILS_CACHE_DIR, key[:2], f"{key}.json.gz")
+
+def _text(text):
+    return re.sub(r'\s+', ' ', text).strip()
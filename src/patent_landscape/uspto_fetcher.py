@@ -3,12 +3,16 @@ USPTO patent data fetcher using public API
 """
 
 import logging
-import requests
+from utils.http_session import get_session
+from utils.ttl_cache import ttl_cache
+from utils.profiling import timed
 
 logger = logging.getLogger(__name__)
 
 USPTO_API_BASE = "https://developer.uspto.gov/ds-api"
 
+@timed('uspto.search')
+@ttl_cache()
 def search_uspto(query, max_results=20):
     """
     Search USPTO patent database
@@ -24,7 +28,7 @@ def search_uspto(query, max_results=20):
             'start': 0
         }
 
-        response = requests.get(url, params=params, timeout=30)
+        response = get_session().get(url, params=params, timeout=30)
 
         if response.status_code == 200:
             data = response.json()
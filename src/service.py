@@ -0,0 +1,402 @@
+"""
+Patent Scout service mode
+Long-running process that answers Sentinel and Oracle events from warm
+caches instead of a cold workflow run per event
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import logging
+import itertools
+import threading
+import socketserver
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# Lower value is served first; levels match the event-prior-art-check workflow
+URGENCY_LEVELS = {'critical': 0, 'high': 1, 'normal': 2}
+
+# sentinel_integration.yaml also uses 'medium'/'low' for Oracle events
+URGENCY_ALIASES = {'medium': 'normal', 'low': 'normal'}
+
+DEFAULT_ACTIONS = {
+    'sentinel': 'prior_art_check',
+    'oracle': 'patent_landscape_check'
+}
+
+# Finished jobs kept in memory for GET /jobs/<id>
+MAX_FINISHED_JOBS = 500
+
+_WORD = re.compile(r'[a-z][a-z0-9\-]{2,}')
+
+class PatentIndex:
+    """
+    In-memory keyword index of every patent the service has seen
+    Gives instant local matches before (and in addition to) a remote search
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._patents = {}
+        self._postings = {}
+
+    def add(self, patents):
+        """Index a list of patent dicts"""
+        with self._lock:
+            for patent in patents:
+                key = patent.get('number') or patent.get('title', '')
+                if not key or key in self._patents:
+                    continue
+                self._patents[key] = patent
+                for word in set(_WORD.findall(_patent_text(patent))):
+                    self._postings.setdefault(word, set()).add(key)
+
+    def search(self, text, limit=10):
+        """Patents sharing the most keywords with text"""
+        scores = {}
+        with self._lock:
+            for word in set(_WORD.findall(text.lower())):
+                for key in self._postings.get(word, ()):
+                    scores[key] = scores.get(key, 0) + 1
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [dict(self._patents[key], match_terms=score) for key, score in ranked if score >= 2]
+
+    def __len__(self):
+        return len(self._patents)
+
+def _patent_text(patent):
+    return f"{patent.get('title', '')} {patent.get('abstract', '')}".lower()
+
+class ScoutService:
+    """
+    Priority job queue with warm fetch caches, patent index and Gemini client
+    """
+
+    def __init__(self, workers=2):
+        self.workers = max(1, workers)
+        self.queue = queue.PriorityQueue()
+        self.jobs = OrderedDict()
+        self.index = PatentIndex()
+        self.analyzer = None
+        self.research_profile = {}
+        self.integration = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._job_ids = itertools.count(1)
+
+    def warm_up(self):
+        """
+        Load configuration, import the pipeline modules and build the Gemini
+        client and patent index once, before the first event arrives
+        """
+
+        from main import load_config
+        from utils.gemini_analyzer import GeminiAnalyzer
+        import invention_miner.prior_art_search  # noqa: F401
+        import patent_landscape.google_patents_scraper  # noqa: F401
+        import company_discovery.target_identifier  # noqa: F401
+
+        self.integration = load_config('sentinel_integration.yaml') or {}
+        self.research_profile = load_config('yatom_research_profile.yaml') or {}
+        self.analyzer = GeminiAnalyzer()
+        self._load_index()
+
+        logger.info(f"Service warm: {len(self.index)} patents indexed, "
+                    f"Gemini {'ready' if self.analyzer.model else 'disabled'}")
+
+    def start(self):
+        """Start the worker threads"""
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f'scout-worker-{i}', daemon=True).start()
+
+    def submit(self, event):
+        """
+        Queue a Sentinel/Oracle event
+        Returns the job record
+        """
+
+        if not isinstance(event, dict):
+            raise ValueError(f"Event must be a JSON object, got {type(event).__name__}")
+
+        source = str(event.get('source', 'sentinel')).lower()
+        event_type = event.get('event') or event.get('event_type') or ''
+        event_config = (self.integration.get(source) or {}).get(event_type) or {}
+
+        action = event.get('action') or event_config.get('action') or DEFAULT_ACTIONS.get(source)
+        if action not in ('prior_art_check', 'patent_landscape_check'):
+            raise ValueError(f"Unsupported action: {action}")
+
+        urgency = str(event.get('urgency') or event_config.get('urgency') or 'normal').lower()
+        urgency = URGENCY_ALIASES.get(urgency, urgency)
+        if urgency not in URGENCY_LEVELS:
+            raise ValueError(f"Unknown urgency: {urgency}")
+
+        job = {
+            'id': f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{next(self._job_ids)}",
+            'source': source,
+            'event': event_type,
+            'action': action,
+            'urgency': urgency,
+            'payload': event,
+            'status': 'queued',
+            'submitted_at': time.time(),
+            'done': threading.Event()
+        }
+
+        with self._lock:
+            self.jobs[job['id']] = job
+
+        self.queue.put((URGENCY_LEVELS[urgency], next(self._sequence), job['id']))
+        logger.info(f"Queued {action} job {job['id']} ({urgency})")
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def status(self):
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+
+        return {
+            'uptime_seconds': round(time.time() - self.started_at),
+            'queued': self.queue.qsize(),
+            'jobs': counts,
+            'patents_indexed': len(self.index),
+            'gemini': bool(self.analyzer and self.analyzer.model)
+        }
+
+    def _worker(self):
+        while True:
+            _, _, job_id = self.queue.get()
+            job = self.get_job(job_id)
+            if job is None:
+                continue
+
+            job['status'] = 'running'
+            start = time.monotonic()
+
+            try:
+                if job['action'] == 'prior_art_check':
+                    job['result'] = self._prior_art(job['payload'])
+                else:
+                    job['result'] = self._landscape(job['payload'])
+                job['result_file'] = self._persist(job)
+                job['status'] = 'done'
+
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+                job['error'] = str(e)
+                job['status'] = 'failed'
+
+            job['seconds'] = round(time.monotonic() - start, 2)
+            job['done'].set()
+            logger.info(f"Job {job_id} {job['status']} in {job['seconds']}s")
+            self._trim_jobs()
+
+    def _prior_art(self, payload):
+        """Sentinel paper_submission: prior art check, or a batch of related disclosures"""
+        from invention_miner.prior_art_search import check_prior_art, check_prior_art_batch
+
+        if payload.get('invention_descriptions'):
+            results = check_prior_art_batch(payload['invention_descriptions'])
+            for result in results:
+                self.index.add(result['prior_art_found'])
+            return {'batch': results}
+
+        description = payload.get('invention_description') or payload.get('description') or ''
+        if not description:
+            raise ValueError('Event has no invention_description')
+
+        # Patents already known locally come back even if the remote search is thin
+        indexed_matches = self.index.search(description)
+
+        result = check_prior_art(description, cpc_codes=payload.get('cpc_codes'))
+        result['indexed_matches'] = indexed_matches
+        self.index.add(result['prior_art_found'])
+        return result
+
+    def _landscape(self, payload):
+        """Oracle commercial_opportunity: patent landscape, companies and plasma fit"""
+        from patent_landscape.google_patents_scraper import check_patent_landscape
+        from company_discovery.target_identifier import find_target_companies
+
+        bottleneck = {
+            'industry': payload.get('industry', 'general'),
+            'description': payload.get('description', ''),
+            'process': payload.get('process', 'general'),
+            'source': payload.get('source', 'oracle')
+        }
+
+        indexed_matches = self.index.search(f"{bottleneck['industry']} {bottleneck['description']}")
+
+        landscape = check_patent_landscape(bottleneck)
+        self.index.add(landscape['patents'])
+        bottleneck['patent_status'] = landscape
+
+        result = {
+            'bottleneck': bottleneck,
+            'companies': find_target_companies(bottleneck),
+            'indexed_matches': indexed_matches
+        }
+
+        if bottleneck['description'] and self.analyzer and self.analyzer.model:
+            result['plasma_fit'] = self.analyzer.analyze_bottleneck(bottleneck, self.research_profile)
+
+        return result
+
+    def _persist(self, job):
+        """Save a job result to data/your_research/"""
+        prefix = 'prior_art' if job['action'] == 'prior_art_check' else 'landscape_check'
+        filename = os.path.join(_ROOT, f"data/your_research/{prefix}_{job['id']}.json")
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        with open(filename, 'w') as f:
+            json.dump(dict(job['result'], urgency=job['urgency'], source=job['source']), f, indent=2)
+
+        return filename
+
+    def _load_index(self):
+        """Index patents from the landscape store and saved prior art results"""
+        from patent_landscape.landscape_store import LandscapeStore
+
+        with LandscapeStore() as store:
+            self.index.add(store.patents())
+
+        path = os.path.join(_ROOT, 'data/your_research')
+        if not os.path.isdir(path):
+            return
+
+        for name in sorted(os.listdir(path)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(path, name), 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping {name} while indexing: {e}")
+                continue
+
+            for result in data.get('batch', [data]) if isinstance(data, dict) else data:
+                self.index.add(result.get('prior_art_found', []))
+
+    def _trim_jobs(self):
+        with self._lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job['done'].is_set()]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self.jobs[job_id]
+
+def job_view(job):
+    """JSON-serialisable view of a job"""
+    return {key: value for key, value in job.items() if key not in ('done', 'payload')}
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /events           queue an event; ?wait=SECONDS waits for the result
+    GET  /jobs/<id>        job status and result
+    GET  /health           queue and cache status
+    """
+
+    service = None
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+
+        if path == '/health':
+            return self._send(200, self.service.status())
+
+        if path.startswith('/jobs/'):
+            job = self.service.get_job(path[len('/jobs/'):])
+            if job is None:
+                return self._send(404, {'error': 'unknown job'})
+            return self._send(200, job_view(job))
+
+        self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/events':
+            return self._send(404, {'error': 'not found'})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            event = json.loads(self.rfile.read(length) or b'{}')
+            job = self.service.submit(event)
+        except ValueError as e:
+            return self._send(400, {'error': str(e)})
+
+        wait = parse_qs(url.query).get('wait', [event.get('wait', 0)])[0]
+        try:
+            wait = float(wait)
+        except (TypeError, ValueError):
+            wait = 0
+
+        if wait and job['done'].wait(timeout=wait):
+            return self._send(200, job_view(job))
+
+        self._send(202, job_view(job))
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def _send(self, status, body):
+        data = json.dumps(body, indent=2, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a Unix socket"""
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.UnixStreamServer.server_bind(self)
+
+def serve(host='127.0.0.1', port=8765, unix_socket=None, workers=2):
+    """
+    Run the service until interrupted
+    """
+
+    service = ScoutService(workers=workers)
+    service.warm_up()
+    service.start()
+
+    handler = type('BoundServiceRequestHandler', (ServiceRequestHandler,), {'service': service})
+
+    if unix_socket:
+        server = UnixHTTPServer(unix_socket, handler)
+        logger.info(f"Patent Scout service listening on unix:{unix_socket}")
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        logger.info(f"Patent Scout service listening on http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Service stopped")
+    finally:
+        server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+    return service
@@ -0,0 +1,202 @@
+"""
+Deadline-aware scheduling for a time-budgeted run (--time-budget)
+Stage timings are measured live. An item only starts a stage if it can still
+finish in the time left, and low-priority items also need the work already
+queued to fit. What is shed is deferred to the next run. A reserve at the end
+of the budget is kept for flushing results and sending the report
+"""
+
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'reserve_seconds': 120,   # kept free at the end for the report, fingerprints and the workflow's commit
+    'low_priority': 0.5,      # items below this priority are shed first
+    'queue_size': 16          # per-stage inbox, deep enough to reorder items by priority
+}
+
+def deadline_settings(config=None):
+    """
+    Deadline settings from the deadline: block of industries.yaml
+    """
+
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({k: v for k, v in ((config or {}).get('deadline') or {}).items() if k in DEFAULT_SETTINGS})
+    return settings
+
+class DeadlineScheduler:
+    """
+    Admission control for the stages of one streamed run
+    Items are followed from the source to the last stage, so the ones that
+    were shed or cut off at the deadline can be handed back as deferred
+    key_of(item) maps an item at any stage to the source item it came from
+    """
+
+    def __init__(self, budget_seconds, settings=None, key_of=None):
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.started = time.monotonic()
+        self.deadline = self.started + budget_seconds
+        self.key_of = key_of or (lambda item: item)
+
+        self._lock = threading.Lock()
+        self._stages = []       # stage names in pipeline order
+        self._workers = {}      # stage -> worker threads
+        self._costs = {}        # stage -> [items timed, seconds]
+        self._flow = {}         # stage -> [items queued, items handled, items passed on]
+        self._open = {}         # id(source item) -> [source item, branches still in the pipeline]
+        self._shed = {}         # id(source item) -> source item
+        self._source_done = False
+        self.yielded = []       # every source item passed on
+
+    @property
+    def scan_cut(self):
+        """Whether the run stopped before the source ran out, whichever side stopped it"""
+        return not self._source_done
+
+    @property
+    def stop_at(self):
+        """When the pipeline must stop so the reserve is left for reporting"""
+        return self.deadline - self.settings['reserve_seconds']
+
+    def remaining(self):
+        """Seconds left before the reserve"""
+        return self.stop_at - time.monotonic()
+
+    def source(self, items):
+        """
+        Pass source items on while one more could still make it through every stage
+        """
+
+        try:
+            for item in items:
+                with self._lock:
+                    self._open[id(item)] = [item, 1]
+                    self.yielded.append(item)
+                    if self._stages:
+                        self._flow[self._stages[0]][0] += 1
+                yield item
+
+                if self.remaining() < self.path_seconds(0):
+                    logger.warning(f"Time budget: stopping the scan with {max(self.remaining(), 0):.0f}s left")
+                    return
+            self._source_done = True
+        finally:
+            if hasattr(items, 'close'):
+                items.close()
+
+    def stage(self, name, func, workers, priority):
+        """
+        (name, func, workers) stage for stream() with admission control
+        priority(item) in [0, 1] decides what is shed first
+        """
+
+        with self._lock:
+            index = len(self._stages)
+            self._stages.append(name)
+            self._workers[name] = max(1, workers)
+            self._costs[name] = [0, 0.0]
+            self._flow[name] = [0, 0, 0]
+
+        def run(item):
+            if not self.admit(index, priority(item)):
+                self._finish(index, item, [], shed=True)
+                return None
+
+            start = time.monotonic()
+            result = None
+            try:
+                result = func(item)
+            finally:
+                with self._lock:
+                    cost = self._costs[name]
+                    cost[0] += 1
+                    cost[1] += time.monotonic() - start
+                self._finish(index, item, result if isinstance(result, list) else [result] if result is not None else [])
+
+            return result
+
+        return name, run, workers
+
+    def admit(self, index, priority):
+        """
+        Whether an item may start stage index: it must fit in the time left,
+        and a low-priority one must also fit behind the queued work
+        """
+
+        needed = self.path_seconds(index)
+        if priority < self.settings['low_priority']:
+            needed += self.backlog_seconds()
+        return self.remaining() >= needed
+
+    def path_seconds(self, index):
+        """Estimated time for one item to get from stage index through the last stage"""
+        with self._lock:
+            return sum(self._mean(name) for name in self._stages[index:])
+
+    def backlog_seconds(self):
+        """
+        Estimated time to drain the items already in the pipeline, from live
+        stage times and pass rates; stages overlap, so the slowest one decides
+        """
+
+        with self._lock:
+            arriving = 0.0
+            longest = 0.0
+            for name in self._stages:
+                items_in, handled, items_out = self._flow[name]
+                # Items waiting here, plus those upstream that will pass on to here
+                arriving += max(items_in - handled, 0)
+                longest = max(longest, arriving * self._mean(name) / self._workers[name])
+                arriving *= items_out / handled if handled else 1.0
+            return longest
+
+    def deferred(self):
+        """
+        Source items not fully processed: shed, or still in the pipeline when it stopped
+        """
+
+        with self._lock:
+            items = {key: item for key, (item, _) in self._open.items()}
+            items.update(self._shed)
+            return list(items.values())
+
+    def log_report(self):
+        used = time.monotonic() - self.started
+        with self._lock:
+            shed = len(self._shed)
+            unfinished = len(set(self._open) - set(self._shed))
+        logger.info(f"Time budget: {used:.0f}s of {self.deadline - self.started:.0f}s used, "
+                    f"{shed} items shed, {unfinished} unfinished at the deadline"
+                    + (", scan cut short" if self.scan_cut else ""))
+        for name in self._stages:
+            logger.info(f"  {name}: {self._mean(name):.1f}s per item")
+
+    def _mean(self, name):
+        count, seconds = self._costs[name]
+        return seconds / count if count else 0.0
+
+    def _finish(self, index, item, results, shed=False):
+        """Account for an item leaving stage index, passing results on"""
+        source = self.key_of(item)
+        last = index + 1 == len(self._stages)
+
+        with self._lock:
+            flow = self._flow[self._stages[index]]
+            flow[1] += 1
+            flow[2] += len(results)
+            if not last:
+                self._flow[self._stages[index + 1]][0] += len(results)
+
+            entry = self._open.get(id(source))
+            if entry is None:
+                return
+
+            # The item's branch ends here unless it passed results to another stage
+            entry[1] += (0 if last else len(results)) - 1
+            if shed:
+                self._shed[id(source)] = source
+            if entry[1] <= 0:
+                del self._open[id(source)]
@@ -11,12 +11,15 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def send_monthly_report(briefs):
+def send_monthly_report(briefs, recipient=None, profile_name=None, output_dir='data/opportunities/', deferred=0):
     """
     Send monthly industry intelligence report
+    recipient defaults to $EMAIL_RECIPIENT; profile_name marks the report of
+    one research profile in a multi-profile run; deferred counts bottlenecks
+    a time-budgeted run left for the next one
     """
 
-    recipient = os.getenv('EMAIL_RECIPIENT')
+    recipient = recipient or os.getenv('EMAIL_RECIPIENT')
     smtp_user = os.getenv('SMTP_USERNAME')
     smtp_pass = os.getenv('SMTP_PASSWORD')
 
@@ -26,6 +29,8 @@ def send_monthly_report(briefs):
 
     # Build email content
     subject = f"Patent Scout Monthly Report - {datetime.now().strftime('%B %Y')}"
+    if profile_name:
+        subject += f" ({profile_name})"
 
     body = f"""
 PATENT SCOUT MONTHLY REPORT - {datetime.now().strftime('%B %Y')}
@@ -49,8 +54,14 @@ Brief file: {brief['brief_file']}
 ---
 """
 
-    body += """
-Full briefs saved to: data/opportunities/
+    if deferred:
+        body += f"""
+DEFERRED: {deferred} lower-priority bottlenecks did not fit in this run's time budget
+and will be processed in the next run.
+"""
+
+    body += f"""
+Full briefs saved to: {output_dir}
 """
 
     # Send email
@@ -67,7 +78,7 @@ Full briefs saved to: data/opportunities/
             server.login(smtp_user, smtp_pass)
             server.send_message(msg)
 
-        logger.info("Monthly report email sent successfully")
+        logger.info(f"Monthly report email sent successfully{f' ({profile_name})' if profile_name else ''}")
 
     except Exception as e:
         logger.error(f"Failed to send email: {e}")
@@ -0,0 +1,138 @@
+"""
+Producer/consumer pipeline for scanners
+Fetch threads feed a bounded queue that a process pool of parsers drains,
+so network waits and CPU-bound parsing overlap and parsing uses every core
+"""
+
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils import profiling
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'fetch_workers': 4,
+    'parse_workers': None,
+    'queue_size': 8
+}
+
+_DONE = object()
+
+def scan_settings(config=None):
+    """
+    Pipeline settings from the scan: block of industries.yaml
+    parse_workers None means one per CPU core, 0 parses in the calling thread
+    """
+
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({k: v for k, v in ((config or {}).get('scan') or {}).items() if k in DEFAULT_SETTINGS})
+
+    if settings['parse_workers'] is None:
+        settings['parse_workers'] = os.cpu_count() or 1
+
+    return settings
+
+def fetch_and_parse(items, fetch, parse, fetch_workers=4, parse_workers=None, queue_size=8):
+    """
+    Yield (item, parsed) as items are fetched and parsed, in completion order
+    fetch(item) runs in threads and returns a picklable payload, or None to skip
+    parse(item, payload) runs in the process pool and must be a module-level function
+    Fetchers block when queue_size payloads are waiting (backpressure), and at
+    most two parse tasks per worker are in flight
+    """
+
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+
+    fetched = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    pending = iter(items)
+    pending_lock = threading.Lock()
+
+    # Fetch threads work for the caller's profiling phase
+    caller_phase = profiling.current_phase()
+
+    def fetch_loop():
+        while not stop.is_set():
+            with pending_lock:
+                item = next(pending, _DONE)
+            if item is _DONE:
+                return
+            try:
+                with profiling.phase(caller_phase):
+                    payload = fetch(item)
+            except Exception as e:
+                logger.warning(f"Fetch failed for {item}: {e}")
+                continue
+            if payload is not None:
+                _put(fetched, (item, payload), stop)
+
+    def run_fetchers():
+        with ThreadPoolExecutor(max_workers=max(1, fetch_workers)) as fetchers:
+            for _ in range(max(1, fetch_workers)):
+                fetchers.submit(fetch_loop)
+        _put(fetched, _DONE, stop)
+
+    producer = threading.Thread(target=run_fetchers, name='fetch-stage', daemon=True)
+    producer.start()
+
+    try:
+        if parse_workers == 0:
+            for item, payload in iter(fetched.get, _DONE):
+                result = _safe_parse(parse, item, payload)
+                if result is not None:
+                    yield item, result
+            return
+
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            in_flight = {}
+            max_in_flight = parse_workers * 2
+
+            for item, payload in iter(fetched.get, _DONE):
+                in_flight[pool.submit(parse, item, payload)] = item
+
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    yield from _collect(done, in_flight)
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from _collect(done, in_flight)
+
+    finally:
+        stop.set()
+        # Unblock fetchers waiting on a full queue so they can see the stop flag
+        while producer.is_alive():
+            try:
+                fetched.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+def _put(fetched, value, stop):
+    while not stop.is_set():
+        try:
+            fetched.put(value, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+def _collect(done, in_flight):
+    for future in done:
+        item = in_flight.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning(f"Parse failed for {item}: {e}")
+            continue
+        if result is not None:
+            yield item, result
+
+def _safe_parse(parse, item, payload):
+    try:
+        return parse(item, payload)
+    except Exception as e:
+        logger.warning(f"Parse failed for {item}: {e}")
+        return None
@@ -4,12 +4,31 @@ Deep reasoning for patent and commercial analysis
 """
 
 import os
+import time
 import logging
-import json
-import google.generativeai as genai
+import threading
+from datetime import timedelta
+from utils.profiling import timed
+from utils.prompt_builder import (
+    PromptStats, TASK_ANALYSIS, TASK_BRIEF, estimate_tokens, build_task_prefix, prefix_key,
+    build_bottleneck_prompt, build_brief_prompt, build_resume_suffix, build_reask_suffix, raw_prompt_tokens
+)
+from utils.structured_output import (
+    BottleneckAnalysis, OutputStats, response_schema, parse_record, validate_record, loads_lenient
+)
 
 logger = logging.getLogger(__name__)
 
+# google.generativeai is slow to import, so it is loaded on first use
+genai = None
+
+MODEL_NAME = 'gemini-3-flash-preview'
+
+# Context caching only accepts prefixes above a minimum size; smaller
+# prefixes are sent inline with each prompt instead
+CACHE_MIN_TOKENS = 1024
+CACHE_TTL = timedelta(hours=1)
+
 class GeminiAnalyzer:
     """
     Gemini Pro for IP and commercial intelligence
@@ -18,68 +37,90 @@ class GeminiAnalyzer:
     def __init__(self):
         api_key = os.getenv('GEMINI_API_KEY')
 
+        self.prompt_stats = PromptStats()
+        self.output_stats = OutputStats()
+        self._prefix_models = {}
+        self._prefix_lock = threading.Lock()
+
         if not api_key:
             logger.warning("GEMINI_API_KEY not configured - analysis disabled")
             self.model = None
         else:
             try:
+                _load_genai()
                 genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-3-flash-preview')
+                self.model = genai.GenerativeModel(MODEL_NAME)
                 logger.info("Initialized Gemini 3 Flash Preview for IP and commercial analysis")
             except Exception as e:
                 logger.error(f"Gemini initialization failed: {e}")
                 self.model = None
 
+    @timed('gemini.analyze_bottleneck')
     def analyze_bottleneck(self, bottleneck, capabilities):
         """
         Determine if plasma could solve this bottleneck
+        The reply is schema-constrained JSON, validated into a BottleneckAnalysis;
+        malformed replies are repaired locally, and only required fields still
+        missing are asked for again
         """
 
         if not self.model:
             return {'success': False, 'error': 'Gemini not available'}
 
-        prompt = f"""
-Analyze industrial bottleneck for plasma solution potential.
-
-BOTTLENECK:
-Industry: {bottleneck['industry']}
-Process: {bottleneck['process']}
-Problem: {bottleneck['description']}
-
-PLASMA CAPABILITIES AVAILABLE:
-{self._format_capabilities(capabilities)}
-
-ANALYSIS REQUIRED:
-1. Could plasma solve this bottleneck? (Yes/No/Maybe)
-2. Which specific plasma capability would apply?
-3. Expected improvement (quantitative if possible)
-4. Technical feasibility (0-10 scale)
-5. Commercial potential (0-10 scale)
-6. Key technical risks
-
-Return as JSON:
-{{
-  "plasma_applicable": boolean,
-  "applicable_capability": "string",
-  "expected_improvement": "string with numbers",
-  "technical_feasibility": number (0-10),
-  "commercial_potential": number (0-10),
-  "risks": ["risk1", "risk2"],
-  "recommendation": "string"
-}}
-"""
-
         try:
-            response = self.model.generate_content(prompt)
-            # Clean response (remove markdown if present)
-            text = response.text.replace('```json', '').replace('```', '').strip()
-            result = json.loads(text)
-            return {'success': True, 'analysis': result}
+            model, inline_prefix, cached_tokens = self._model_for(TASK_ANALYSIS, capabilities)
+            prompt = inline_prefix + build_bottleneck_prompt(bottleneck)
+            self.prompt_stats.record(
+                'analyze_bottleneck',
+                raw_tokens=raw_prompt_tokens(TASK_ANALYSIS, capabilities,
+                                             build_bottleneck_prompt(bottleneck, compact=False)),
+                sent_tokens=estimate_tokens(prompt),
+                cached_tokens=cached_tokens
+            )
+
+            response = model.generate_content(prompt, generation_config=_json_config(BottleneckAnalysis))
+            record, missing, repaired = parse_record(_response_text(response), BottleneckAnalysis)
+
+            if missing:
+                record, missing = self._complete_record(model, prompt, record, missing, BottleneckAnalysis,
+                                                        'analyze_bottleneck', cached_tokens)
+                if missing:
+                    self.output_stats.record('failed')
+                    return {'success': False, 'error': f"Analysis missing {', '.join(missing)}"}
+                self.output_stats.record('reasked')
+            else:
+                self.output_stats.record('repaired' if repaired else 'valid')
+
+            return {'success': True, 'analysis': record}
 
         except Exception as e:
             logger.error(f"Gemini analysis failed: {e}")
             return {'success': False, 'error': str(e)}
 
+    def _complete_record(self, model, prompt, record, missing, record_type, call, cached_tokens):
+        """
+        Ask again for only the fields missing from a reply
+        Returns (record, fields still missing)
+        """
+
+        logger.info(f"Re-asking for {', '.join(missing)}")
+        prompt += build_reask_suffix(record, missing)
+        self.prompt_stats.record(
+            f'{call}_reask',
+            raw_tokens=estimate_tokens(prompt) + cached_tokens,
+            sent_tokens=estimate_tokens(prompt),
+            cached_tokens=cached_tokens
+        )
+
+        response = model.generate_content(prompt, generation_config=_json_config(record_type, missing))
+        data, _ = loads_lenient(_response_text(response))
+
+        merged = dict(record or {})
+        if isinstance(data, dict):
+            merged.update({k: v for k, v in data.items() if k in missing})
+        return validate_record(merged, record_type)
+
+    @timed('gemini.generate_brief')
     def generate_opportunity_brief(self, bottleneck, patent_landscape, companies, capabilities):
         """
         Generate comprehensive opportunity discussion brief
@@ -88,92 +129,132 @@ Return as JSON:
         if not self.model:
             return None
 
-        prompt = f"""
-You are an IP and commercialization strategist for a plasma physics researcher.
-
-OPPORTUNITY DETECTED:
-Industry: {bottleneck['industry']}
-Problem: {bottleneck['description']}
-Current method limitations: {bottleneck.get('current_limitations', 'N/A')}
-
-PATENT LANDSCAPE:
-{self._format_patent_landscape(patent_landscape)}
-
-TARGET COMPANIES:
-{self._format_companies(companies)}
-
-RESEARCHER CAPABILITIES:
-{self._format_capabilities(capabilities)}
-
-Generate comprehensive discussion brief (2000-3000 words) with:
-
-1. EXECUTIVE SUMMARY (3-4 sentences)
-   - The opportunity
-   - Market size
-   - Priority level
-
-2. INDUSTRIAL PAIN POINT
-   - Current process details
-   - Quantitative limitations (time, cost, yield)
-   - Why it matters
-
-3. YOUR PLASMA SOLUTION
-   - Which capability applies
-   - How plasma solves it
-   - Expected performance improvement (quantitative)
-   - Technical feasibility
-
-4. PATENT LANDSCAPE ANALYSIS
-   - Prior art summary
-   - White space identified
-   - Your novel contributions
-   - Freedom to operate status
-   - IP strategy recommendation
-
-5. COMMERCIAL OPPORTUNITY
-   - Market size and growth
-   - Target company analysis (top 3)
-   - Partnership vs licensing strategy
-   - Revenue potential
-
-6. TECHNICAL DEVELOPMENT PLAN
-   - Phase 1: Lab validation (timeline)
-   - Phase 2: Pilot design
-   - Phase 3: Commercial demo
-   - Resource requirements
-
-7. DISCUSSION QUESTIONS
-   - Should we pursue?
-   - Patent first?
-   - Which companies to approach?
-   - Resource allocation?
-
-Be quantitative, specific, and commercially focused.
-Use markdown formatting with ## headers.
-"""
-
         try:
-            response = self.model.generate_content(prompt)
+            model, prompt = self._brief_request(bottleneck, patent_landscape, companies, capabilities)
+            response = model.generate_content(prompt)
             return response.text
 
         except Exception as e:
             logger.error(f"Brief generation failed: {e}")
             return None
 
-    def _format_capabilities(self, capabilities):
-        """Format capabilities for prompt"""
-        lines = []
-        for cap in capabilities.get('unique_capabilities', []):
-            lines.append(f"- {cap['name']}: {cap['description']}")
-        return "\n".join(lines)
-
-    def _format_patent_landscape(self, landscape):
-        """Format patent landscape for prompt"""
-        return f"Total patents: {landscape.get('total_patents', 0)}\nWhite space: {landscape.get('white_space', False)}"
-
-    def _format_companies(self, companies):
-        """Format companies for prompt"""
-        lines = []
-        for c in companies[:5]:  # Top 5
-            lines.append(f"- {c['name']}: {c.get('description', 'N/A')}")
-        return "\n".join(lines)
+    @timed('gemini.stream_brief')
+    def stream_opportunity_brief(self, bottleneck, patent_landscape, companies, capabilities, resume_from=None):
+        """
+        Stream the opportunity brief as text chunks while the model generates it
+        If resume_from is given, the model continues that partial brief instead of starting over
+        Errors are raised so the caller can keep the partial output for a later resume
+        """
+
+        if not self.model:
+            return
+
+        model, prompt = self._brief_request(bottleneck, patent_landscape, companies, capabilities,
+                                            resume_from=resume_from)
+
+        response = model.generate_content(prompt, stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish-reason chunk)
+                continue
+            if text:
+                yield text
+
+    def _brief_request(self, bottleneck, patent_landscape, companies, capabilities, resume_from=None):
+        """
+        Build the model and compacted prompt for an opportunity brief
+        """
+
+        model, inline_prefix, cached_tokens = self._model_for(TASK_BRIEF, capabilities)
+        prompt = inline_prefix + build_brief_prompt(bottleneck, patent_landscape, companies)
+        raw_prompt = build_brief_prompt(bottleneck, patent_landscape, companies, compact=False)
+        if resume_from:
+            prompt += build_resume_suffix(resume_from)
+            raw_prompt += build_resume_suffix(resume_from, compact=False)
+
+        self.prompt_stats.record(
+            'generate_opportunity_brief',
+            raw_tokens=raw_prompt_tokens(TASK_BRIEF, capabilities, raw_prompt),
+            sent_tokens=estimate_tokens(prompt),
+            cached_tokens=cached_tokens
+        )
+
+        return model, prompt
+
+    def _model_for(self, task, capabilities):
+        """
+        Model for a task's instruction/capability prefix
+        Returns (model, inline prefix, cached_tokens): a prefix large enough to
+        cache is bound to the model and the inline prefix is empty; a smaller
+        one is sent at the start of the prompt. One model is kept per distinct
+        prefix and recreated when its context cache expires
+        """
+
+        prefix = build_task_prefix(task, capabilities)
+        key = prefix_key(prefix)
+
+        with self._prefix_lock:
+            entry = self._prefix_models.get(key)
+            if entry is None or time.monotonic() >= entry['expires_at']:
+                entry = self._create_prefix_model(prefix)
+                self._prefix_models[key] = entry
+
+        return entry['model'], entry['inline_prefix'], entry['cached_tokens']
+
+    def _create_prefix_model(self, prefix):
+        """
+        Create a model for a prefix, through context caching when the prefix is large enough
+        Below that, a system instruction would cost the same tokens as the
+        prefix on every call, so the plain model is used with the prefix inline
+        """
+        prefix_tokens = estimate_tokens(prefix)
+
+        if prefix_tokens >= CACHE_MIN_TOKENS:
+            try:
+                from google.generativeai import caching
+                cache = caching.CachedContent.create(
+                    model=f'models/{MODEL_NAME}',
+                    system_instruction=prefix,
+                    ttl=CACHE_TTL
+                )
+                logger.info(f"Cached prompt prefix ({prefix_tokens} tokens)")
+                return {
+                    'model': genai.GenerativeModel.from_cached_content(cached_content=cache),
+                    'inline_prefix': '',
+                    'cached_tokens': prefix_tokens,
+                    # Recreate shortly before the server-side cache expires
+                    'expires_at': time.monotonic() + CACHE_TTL.total_seconds() - 60
+                }
+            except Exception as e:
+                logger.info(f"Context caching unavailable, sending prefix inline: {e}")
+
+        return {
+            'model': self.model,
+            'inline_prefix': prefix,
+            'cached_tokens': 0,
+            'expires_at': float('inf')
+        }
+
+def _json_config(record_type, fields=None):
+    """Generation config constraining the reply to JSON of record_type (or some of its fields)"""
+    return genai.GenerationConfig(
+        response_mime_type='application/json',
+        response_schema=response_schema(record_type, fields)
+    )
+
+def _response_text(response):
+    """Reply text; empty when the reply has no text parts (blocked, or stopped before any output)"""
+    try:
+        return response.text
+    except ValueError:
+        return ''
+
+def _load_genai():
+    """Import google.generativeai on first use"""
+    global genai
+    if genai is None:
+        import google.generativeai
+        genai = google.generativeai
+    return genai
@@ -0,0 +1,79 @@
+"""
+Pooled HTTP sessions shared by the scrapers
+Reusing one session per thread keeps TCP/TLS connections warm across requests
+"""
+
+import time
+import threading
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+_local = threading.local()
+
+def new_session(pool_size=10):
+    """
+    Create a session with a connection pool of pool_size per host
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+def get_session():
+    """
+    Session for the current thread (requests.Session is not thread-safe)
+    """
+
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = new_session()
+        _local.session = session
+    return session
+
+class HostThrottle:
+    """
+    Minimum spacing between requests to each host, across every thread
+    A host that answers 429 or 503 is backed off: no request goes to it
+    until the backoff has passed
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_time = {}    # host -> earliest next request
+
+    def wait(self, url):
+        """Block until a request to url's host may go out, and take that slot"""
+        host = urlparse(url).netloc
+
+        # Slots are only taken when due, so a backoff set meanwhile holds waiting threads too
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                start = self._next_time.get(host, 0)
+                if start <= now:
+                    self._next_time[host] = now + self.delay
+                    return
+            time.sleep(start - now)
+
+    def back_off(self, url, seconds):
+        """Hold every request to url's host for seconds"""
+        host = urlparse(url).netloc
+
+        with self._lock:
+            self._next_time[host] = max(self._next_time.get(host, 0), time.monotonic() + seconds)
+
+def retry_after(response, default):
+    """Seconds a 429/503 response asks to wait (Retry-After in seconds), else default"""
+    try:
+        return max(float(response.headers.get('Retry-After', '')), default)
+    except ValueError:
+        return default
@@ -0,0 +1,29 @@
+"""
+Logging setup shared by the orchestrator and the CLI
+"""
+
+import os
+import logging
+from datetime import datetime
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'logs')
+
+def setup_logging(level=logging.INFO):
+    """
+    Log to the console and to logs/patent_scout_YYYYMMDD.log
+    Returns the log file path
+    """
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_file = os.path.join(LOG_DIR, f'patent_scout_{datetime.now().strftime("%Y%m%d")}.log')
+
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+    return log_file
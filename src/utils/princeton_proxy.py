@@ -4,56 +4,252 @@ Uses Princeton NetID authentication (optional)
 """
 
 import os
+import re
+import time
+import queue
 import logging
-import requests
+import threading
+import contextlib
+from http.cookiejar import LWPCookieJar
+from urllib.parse import urlparse, quote
+from utils.http_session import get_session, new_session
 
 logger = logging.getLogger(__name__)
 
+_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
 PRINCETON_PROXY_BASE = "https://ezproxy.princeton.edu/login?url="
+PRINCETON_CAS_URL = "https://fed.princeton.edu/cas/login"
 
-def get_proxy_session():
+# Cookie jar persisted across runs (gitignored)
+COOKIE_PATH = os.path.join(_ROOT, 'data/cache/princeton_cookies.txt')
+
+# Publisher hosts that need the proxy; everything else is fetched directly
+PROXY_DOMAINS = (
+    'sciencedirect.com',
+    'springer.com',
+    'wiley.com',
+    'iop.org',
+    'tandfonline.com',
+    'nature.com',
+    'acs.org',
+    'aip.org',
+    'ieee.org',
+    'rsc.org'
+)
+
+# After a failed CAS login, fetches go direct for this long before logging in again
+AUTH_RETRY_SECONDS = 600
+
+_HIDDEN_INPUT = re.compile(r'<input[^>]*type=["\']hidden["\'][^>]*>', re.IGNORECASE)
+_ATTR = re.compile(r'(name|value)=["\']([^"\']*)["\']', re.IGNORECASE)
+
+class ProxySessionManager:
     """
-    Create authenticated session through Princeton proxy
-    Returns None if credentials not configured
+    Pool of proxy sessions sharing one persisted cookie jar
+    Authenticates once per proxy session lifetime: saved cookies are reused
+    across runs and CAS login only happens again when the proxy answers
+    with its login page
     """
 
-    netid = os.getenv('PRINCETON_NETID')
-    password = os.getenv('PRINCETON_PASSWORD')
+    def __init__(self, pool_size=4, cookie_path=COOKIE_PATH):
+        self.netid = os.getenv('PRINCETON_NETID')
+        self.password = os.getenv('PRINCETON_PASSWORD')
+        self.enabled = bool(self.netid and self.password)
+        self.pool_size = pool_size
 
-    if not netid or not password:
-        logger.info("Princeton credentials not configured - using public access only")
-        return None
+        self.cookies = LWPCookieJar(cookie_path)
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._auth_lock = threading.Lock()
+        self._generation = 0
+        self._authenticated = False
+        self._auth_retry_at = 0.0   # no CAS login before this, after a failed one
+
+        if not self.enabled:
+            logger.info("Princeton credentials not configured - using public access only")
+            return
+
+        if os.path.exists(cookie_path):
+            try:
+                self.cookies.load(ignore_discard=True)
+                self.cookies.clear_expired_cookies()
+                self._authenticated = self._has_proxy_cookie()
+                if self._authenticated:
+                    logger.info("Reusing saved Princeton proxy session")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load proxy cookies: {e}")
+
+    def fetch(self, url, timeout=30, **kwargs):
+        """
+        Fetch a URL, through the proxy for paywalled publishers
+        Falls back to a direct pooled fetch when the proxy is unavailable
+        """
+
+        if self.enabled and self.should_proxy(url) and self.ensure_authenticated():
+            try:
+                with self.session() as session:
+                    generation = self._generation
+                    response = session.get(self.proxy_url(url), timeout=timeout, **kwargs)
+
+                    if self._is_login_response(response) and self._reauthenticate(generation):
+                        response = session.get(self.proxy_url(url), timeout=timeout, **kwargs)
+
+                    if not self._is_login_response(response):
+                        return response
 
-    session = requests.Session()
+                    logger.warning("Proxy session could not be re-established, trying direct")
 
-    try:
-        # Authenticate with Princeton CAS
-        cas_url = "https://fed.princeton.edu/cas/login"
+            except Exception as e:
+                logger.warning(f"Proxy fetch failed, trying direct: {e}")
 
-        # Get login page
-        login_page = session.get(cas_url, timeout=30)
+        return get_session().get(url, timeout=timeout, **kwargs)
 
-        # Note: Full CAS auth requires form parsing and submission
-        # This is a placeholder - full implementation needs CAS flow
-        logger.info("Princeton proxy session configured")
+    @contextlib.contextmanager
+    def session(self):
+        """Borrow an authenticated session from the pool"""
+        session = None
+        try:
+            session = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.pool_size:
+                    self._created += 1
+                    session = self._new_session()
+            if session is None:
+                session = self._pool.get()
+
+        try:
+            yield session
+        finally:
+            self._pool.put(session)
+
+    def ensure_authenticated(self):
+        """
+        Authenticate unless a live proxy session exists
+        A failed login is only retried after AUTH_RETRY_SECONDS
+        """
+        if self._authenticated:
+            return True
+        if time.monotonic() < self._auth_retry_at:
+            return False
+        return self._reauthenticate(self._generation)
+
+    def should_proxy(self, url):
+        host = urlparse(url).hostname or ''
+        return any(host == domain or host.endswith('.' + domain) for domain in PROXY_DOMAINS)
+
+    def proxy_url(self, url):
+        return f"{PRINCETON_PROXY_BASE}{quote(url, safe=':/?&=%')}"
+
+    def _new_session(self):
+        session = new_session(pool_size=2)
+        session.cookies = self.cookies
         return session
 
-    except Exception as e:
-        logger.warning(f"Princeton proxy auth failed: {e}")
+    def _reauthenticate(self, generation):
+        """
+        Run the CAS login once for all threads that saw the same expired session
+        """
+
+        with self._auth_lock:
+            if self._generation != generation:
+                # Another thread re-authenticated while this one waited
+                return self._authenticated
+
+            self._authenticated = self._cas_login()
+            self._auth_retry_at = 0.0 if self._authenticated else time.monotonic() + AUTH_RETRY_SECONDS
+            self._generation += 1
+
+            if self._authenticated:
+                self._save_cookies()
+
+            return self._authenticated
+
+    def _cas_login(self):
+        """
+        Log in through Princeton CAS and land on the proxy with a session cookie
+        """
+
+        self._clear_proxy_cookies()
+        session = self._new_session()
+
+        try:
+            service = f"{PRINCETON_PROXY_BASE}{quote('https://www.princeton.edu/', safe='')}"
+            login_page = session.get(PRINCETON_CAS_URL, params={'service': service}, timeout=30)
+
+            form = {'username': self.netid, 'password': self.password, '_eventId': 'submit'}
+            for tag in _HIDDEN_INPUT.findall(login_page.text):
+                attrs = dict((k.lower(), v) for k, v in _ATTR.findall(tag))
+                if attrs.get('name'):
+                    form.setdefault(attrs['name'], attrs.get('value', ''))
+
+            session.post(login_page.url, data=form, timeout=30)
+
+            if self._has_proxy_cookie():
+                logger.info("Princeton proxy session authenticated")
+                return True
+
+            logger.warning("Princeton proxy auth did not return a proxy session (MFA or bad credentials?)")
+            return False
+
+        except Exception as e:
+            logger.warning(f"Princeton proxy auth failed: {e}")
+            return False
+
+        finally:
+            session.close()
+
+    def _has_proxy_cookie(self):
+        return any(cookie.domain.lstrip('.').endswith('ezproxy.princeton.edu') for cookie in self.cookies)
+
+    def _clear_proxy_cookies(self):
+        for domain in {cookie.domain for cookie in self.cookies if 'ezproxy.princeton.edu' in cookie.domain}:
+            self.cookies.clear(domain)
+
+    def _is_login_response(self, response):
+        url = response.url or ''
+        return PRINCETON_CAS_URL in url or (response.status_code in (401, 403) and 'ezproxy' in url)
+
+    def _save_cookies(self):
+        try:
+            os.makedirs(os.path.dirname(self.cookies.filename), exist_ok=True)
+            self.cookies.save(ignore_discard=True)
+            os.chmod(self.cookies.filename, 0o600)
+        except OSError as e:
+            logger.warning(f"Could not save proxy cookies: {e}")
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_proxy_manager():
+    """
+    Process-wide proxy session manager
+    """
+
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ProxySessionManager()
+    return _manager
+
+def get_proxy_session():
+    """
+    Create authenticated session through Princeton proxy
+    Returns None if credentials not configured
+    """
+
+    manager = get_proxy_manager()
+    if not manager.enabled or not manager.ensure_authenticated():
         return None
 
+    return manager._new_session()
+
 def fetch_with_proxy(url, session=None):
     """
-    Fetch URL through Princeton proxy if session available
+    Fetch URL through Princeton proxy if a proxy session is available
+    The session argument is kept for compatibility; the pooled manager is used
     """
 
-    if session:
-        proxy_url = f"{PRINCETON_PROXY_BASE}{url}"
-        try:
-            response = session.get(proxy_url, timeout=30)
-            return response
-        except Exception as e:
-            logger.warning(f"Proxy fetch failed, trying direct: {e}")
-
-    # Fall back to direct access
-    return requests.get(url, timeout=30)
+    return get_proxy_manager().fetch(url)
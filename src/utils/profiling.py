@@ -0,0 +1,313 @@
+"""
+Profiling mode (--profile)
+Per-phase cProfile stats, sampled collapsed stacks for flamegraphs, tracemalloc
+peaks and top allocators, and call timings of the hot paths, written next to
+the log so they travel with the workflow's logs/ artifact
+Everything here is a no-op unless enable() was called
+"""
+
+import os
+import sys
+import time
+import json
+import pstats
+import cProfile
+import logging
+import threading
+import functools
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Stack sampling interval for the collapsed stacks
+SAMPLE_INTERVAL = 0.01
+
+# Frames kept per tracemalloc traceback
+TRACEMALLOC_FRAMES = 25
+
+# Allocation sites listed per phase
+TOP_ALLOCATORS = 15
+
+_state = None
+_local = threading.local()
+
+def enable(output_dir):
+    """
+    Start profiling; results go to output_dir when finish() is called
+    """
+
+    global _state
+
+    os.makedirs(output_dir, exist_ok=True)
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    _state = _ProfileState(output_dir)
+    _state.sampler.start()
+    logger.info(f"Profiling enabled, writing to {output_dir}")
+
+def enabled():
+    return _state is not None
+
+def profile_dir(log_file):
+    """Directory for a run's profile output, next to its log file"""
+    return os.path.join(os.path.dirname(log_file), f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+class phase:
+    """
+    Context manager attributing the enclosed work in this thread to a phase
+    Safe to enter from several threads at once (streaming stages). A phase
+    nested in another in the same thread pauses the outer one's cProfile, so
+    each pstats file holds only its own phase's time
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        state = _state
+        if state is None or not self.name:
+            self._state = None
+            return self
+
+        self._state = state
+        stack = getattr(_local, 'phases', None)
+        if stack is None:
+            stack = _local.phases = []
+
+        if stack:
+            stack[-1][1].disable()
+
+        self._profile = state.profile_for(self.name)
+        stack.append((self.name, self._profile))
+        state.set_thread_phase(threading.get_ident(), self.name)
+
+        self._start = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        state = self._state
+        if state is None:
+            return False
+
+        self._profile.disable()
+        state.record_time(self.name, time.perf_counter() - self._start)
+
+        stack = _local.phases
+        stack.pop()
+
+        if stack:
+            stack[-1][1].enable()
+            state.set_thread_phase(threading.get_ident(), stack[-1][0])
+        else:
+            state.set_thread_phase(threading.get_ident(), None)
+        return False
+
+def current_phase():
+    """Innermost phase of this thread, to hand on to helper threads"""
+    stack = getattr(_local, 'phases', None)
+    return stack[-1][0] if stack else None
+
+def timed(name):
+    """
+    Decorator recording call count and time of a hot-path function
+    Generator functions are timed across their whole iteration
+    """
+
+    def decorator(func):
+        import inspect
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if _state is None:
+                    yield from func(*args, **kwargs)
+                    return
+                start = time.perf_counter()
+                try:
+                    yield from func(*args, **kwargs)
+                finally:
+                    _state.record_call(name, time.perf_counter() - start)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _state is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _state.record_call(name, time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+def finish():
+    """
+    Stop profiling and write the results
+    Returns the output directory, or None if profiling was not enabled
+    """
+
+    global _state
+
+    state, _state = _state, None
+    if state is None:
+        return None
+
+    state.stop()
+    state.write()
+    tracemalloc.stop()
+    return state.output_dir
+
+class _ProfileState:
+    """Collected profiles, samples, memory and timings of one run"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self.profiles = {}       # (thread id, phase) -> cProfile.Profile
+        self.phase_times = {}    # phase -> [entries, seconds]
+        self.calls = {}          # timed name -> [calls, seconds, max]
+        self.thread_phases = {}  # thread id -> innermost phase
+        self.samples = {}        # phase -> {collapsed stack: count}
+        self.peaks = {}          # phase -> peak traced bytes while active
+        self.allocators = {}     # phase -> top allocation lines at that peak
+        self._snapshot_times = {}
+
+        self.sampler = threading.Thread(target=self._sample, name='profile-sampler', daemon=True)
+
+    def profile_for(self, name):
+        key = (threading.get_ident(), name)
+        with self._lock:
+            profile = self.profiles.get(key)
+            if profile is None:
+                profile = self.profiles[key] = cProfile.Profile()
+        return profile
+
+    def set_thread_phase(self, thread_id, name):
+        with self._lock:
+            if name is None:
+                self.thread_phases.pop(thread_id, None)
+            else:
+                self.thread_phases[thread_id] = name
+
+    def record_time(self, name, seconds):
+        with self._lock:
+            entry = self.phase_times.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def record_call(self, name, seconds):
+        with self._lock:
+            entry = self.calls.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def stop(self):
+        self._stop.set()
+        self.sampler.join(timeout=2)
+
+    def _sample(self):
+        """Sample the stacks of threads inside a phase, and memory per phase"""
+        me = threading.get_ident()
+
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            with self._lock:
+                active = dict(self.thread_phases)
+            if not active:
+                continue
+
+            frames = sys._current_frames()
+            for thread_id, name in active.items():
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == me:
+                    continue
+                stack = _collapse(frame)
+                counts = self.samples.setdefault(name, {})
+                counts[stack] = counts.get(stack, 0) + 1
+
+            current = tracemalloc.get_traced_memory()[0]
+            for name in set(active.values()):
+                if current > self.peaks.get(name, 0):
+                    self.peaks[name] = current
+                    self._snapshot_at_peak(name)
+
+    def _snapshot_at_peak(self, name):
+        """Top allocators at a phase's new memory peak, at most once a second"""
+        now = time.monotonic()
+        if now - self._snapshot_times.get(name, 0) < 1.0:
+            return
+        self._snapshot_times[name] = now
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>')
+        ])
+        self.allocators[name] = [
+            f"{stat.size / 1024:.1f} KiB in {stat.count} blocks: {stat.traceback[0].filename}:{stat.traceback[0].lineno}"
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATORS]
+        ]
+
+    def write(self):
+        by_phase = {}
+        for (_, name), profile in self.profiles.items():
+            by_phase.setdefault(name, []).append(profile)
+
+        for name, profiles in by_phase.items():
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(os.path.join(self.output_dir, f"{_filename(name)}.pstats"))
+
+        for name, counts in self.samples.items():
+            with open(os.path.join(self.output_dir, f"{_filename(name)}.collapsed"), 'w') as f:
+                for stack, count in sorted(counts.items(), key=lambda x: -x[1]):
+                    f.write(f"{stack} {count}\n")
+
+        _, overall_peak = tracemalloc.get_traced_memory()
+        summary = {
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            'peak_traced_bytes': overall_peak,
+            'phases': {
+                name: {
+                    'entries': entries,
+                    'seconds': round(seconds, 3),
+                    'peak_traced_bytes': self.peaks.get(name, 0),
+                    'top_allocators': self.allocators.get(name, [])
+                }
+                for name, (entries, seconds) in self.phase_times.items()
+            },
+            'timed_calls': {
+                name: {'calls': calls, 'seconds': round(total, 3), 'max_seconds': round(longest, 3)}
+                for name, (calls, total, longest) in sorted(self.calls.items(), key=lambda x: -x[1][1])
+            }
+        }
+
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info(f"Profile written to {self.output_dir} "
+                    f"(wall {summary['wall_seconds']:.1f}s, peak traced memory {overall_peak / 2**20:.1f} MiB)")
+        for name, entry in summary['phases'].items():
+            logger.info(f"  phase {name}: {entry['seconds']:.1f}s over {entry['entries']} entries, "
+                        f"peak {entry['peak_traced_bytes'] / 2**20:.1f} MiB")
+        for name, entry in list(summary['timed_calls'].items())[:10]:
+            logger.info(f"  {name}: {entry['calls']} calls, {entry['seconds']:.1f}s, max {entry['max_seconds']:.2f}s")
+
+def _collapse(frame):
+    """Root-first 'module:function;...' stack, as flamegraph.pl and speedscope read it"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def _filename(name):
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
@@ -0,0 +1,371 @@
+"""
+Prompt building for Gemini calls
+Compacts scraped inputs to per-field token budgets and keeps each task's
+instructions and the capabilities in one stable prefix per task, so a prefix
+large enough for context caching is cached and a small one stays inline
+"""
+
+import re
+import json
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English prose with Gemini tokenizers
+CHARS_PER_TOKEN = 4
+
+# Token budget per prompt field
+FIELD_BUDGETS = {
+    'industry': 16,
+    'process': 32,
+    'description': 160,
+    'current_limitations': 120,
+    'patent_landscape': 160,
+    'companies': 200,
+    'partial_brief': 6000
+}
+
+# Short fragments that are left over from page navigation, not report content
+_NAV_PATTERN = re.compile(
+    r'\b(skip to (main )?content|main menu|breadcrumb|cookie|privacy policy|terms of use|'
+    r'sign in|log in|subscribe|newsletter|share this|back to top|follow us|site map|search)\b',
+    re.IGNORECASE
+)
+
+# Boilerplate phrases that never belong to report prose, removed wherever they appear
+_INLINE_BOILERPLATE = re.compile(
+    r'\b(skip to (main )?content|back to top|share this page|print this page)\b',
+    re.IGNORECASE
+)
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+TASK_ANALYSIS = 'BOTTLENECK ANALYSIS'
+TASK_BRIEF = 'OPPORTUNITY BRIEF'
+
+_PREFIX_HEADER = """
+You are an IP and commercialization strategist for a plasma physics researcher.
+
+PLASMA CAPABILITIES AVAILABLE:
+{capabilities}
+"""
+
+_TASK_INSTRUCTIONS = {
+    TASK_ANALYSIS: """
+Analyze the industrial bottleneck for plasma solution potential.
+1. Could plasma solve this bottleneck? (Yes/No/Maybe)
+2. Which specific plasma capability would apply?
+3. Expected improvement (quantitative if possible)
+4. Technical feasibility (0-10 scale)
+5. Commercial potential (0-10 scale)
+6. Key technical risks
+
+Return as JSON:
+{
+  "plasma_applicable": boolean,
+  "applicable_capability": "string",
+  "expected_improvement": "string with numbers",
+  "technical_feasibility": number (0-10),
+  "commercial_potential": number (0-10),
+  "risks": ["risk1", "risk2"],
+  "recommendation": "string"
+}
+""",
+    TASK_BRIEF: """
+Generate comprehensive discussion brief (2000-3000 words) with:
+
+1. EXECUTIVE SUMMARY (3-4 sentences)
+   - The opportunity
+   - Market size
+   - Priority level
+
+2. INDUSTRIAL PAIN POINT
+   - Current process details
+   - Quantitative limitations (time, cost, yield)
+   - Why it matters
+
+3. YOUR PLASMA SOLUTION
+   - Which capability applies
+   - How plasma solves it
+   - Expected performance improvement (quantitative)
+   - Technical feasibility
+
+4. PATENT LANDSCAPE ANALYSIS
+   - Prior art summary
+   - White space identified
+   - Your novel contributions
+   - Freedom to operate status
+   - IP strategy recommendation
+
+5. COMMERCIAL OPPORTUNITY
+   - Market size and growth
+   - Target company analysis (top 3)
+   - Partnership vs licensing strategy
+   - Revenue potential
+
+6. TECHNICAL DEVELOPMENT PLAN
+   - Phase 1: Lab validation (timeline)
+   - Phase 2: Pilot design
+   - Phase 3: Commercial demo
+   - Resource requirements
+
+7. DISCUSSION QUESTIONS
+   - Should we pursue?
+   - Patent first?
+   - Which companies to approach?
+   - Resource allocation?
+
+Be quantitative, specific, and commercially focused.
+Use markdown formatting with ## headers.
+"""
+}
+
+def estimate_tokens(text):
+    """
+    Estimate the token count of a text without calling the API
+    """
+
+    if not text:
+        return 0
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def clean_scraped_text(text):
+    """
+    Strip navigation leftovers and collapse whitespace in scraped text
+    """
+
+    if not text:
+        return ''
+
+    segments = re.split(r'\s*[\r\n\t]+\s*|\s{3,}', _INLINE_BOILERPLATE.sub('\n', text))
+    kept = []
+
+    for segment in segments:
+        segment = segment.strip()
+        if not segment:
+            continue
+
+        words = segment.split()
+
+        # Menu labels and link text: very short, no sentence punctuation
+        if _NAV_PATTERN.search(segment) and len(words) < 12:
+            continue
+        if len(words) <= 3 and not segment.endswith(('.', '!', '?', ':')):
+            continue
+
+        kept.append(segment)
+
+    cleaned = ' '.join(kept) if kept else ' '.join(text.split())
+    return cleaned
+
+def fit_to_budget(text, max_tokens, keep='head'):
+    """
+    Shrink text to at most max_tokens
+    Whole sentences are kept where possible; keep='tail' keeps the end instead
+    """
+
+    text = text or ''
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    sentences = _SENTENCE_END.split(text)
+    if keep == 'tail':
+        sentences = list(reversed(sentences))
+
+    kept = []
+    used = 0
+    for sentence in sentences:
+        if used + len(sentence) + 1 > max_chars:
+            break
+        kept.append(sentence)
+        used += len(sentence) + 1
+
+    if keep == 'tail':
+        if kept:
+            return ' '.join(reversed(kept))
+        return '…' + text[-max_chars:].split(' ', 1)[-1]
+
+    if kept:
+        return ' '.join(kept)
+    return text[:max_chars].rsplit(' ', 1)[0] + '…'
+
+def compact_field(name, text, clean=True):
+    """
+    Clean and fit one prompt field to its budget
+    """
+
+    text = str(text) if text is not None else ''
+    if clean:
+        text = clean_scraped_text(text)
+    return fit_to_budget(text, FIELD_BUDGETS.get(name, 200))
+
+def format_capabilities(capabilities):
+    """Format capabilities for prompt"""
+    lines = []
+    for cap in capabilities.get('unique_capabilities', []):
+        lines.append(f"- {cap['name']}: {cap['description']}")
+    return "\n".join(lines)
+
+def format_patent_landscape(landscape):
+    """Format patent landscape for prompt"""
+    return f"Total patents: {landscape.get('total_patents', 0)}\nWhite space: {landscape.get('white_space', False)}"
+
+def format_companies(companies):
+    """Format companies for prompt"""
+    lines = []
+    for c in companies[:5]:  # Top 5
+        lines.append(f"- {c['name']}: {c.get('description', 'N/A')}")
+    return "\n".join(lines)
+
+def build_task_prefix(task, capabilities):
+    """
+    Build the stable instruction and capability prefix shared by all calls of one task
+    Each task gets its own, so no call carries another task's instructions
+    """
+
+    return _PREFIX_HEADER.format(capabilities=format_capabilities(capabilities)) + _TASK_INSTRUCTIONS[task]
+
+def prefix_key(prefix):
+    """Stable key identifying a shared prefix"""
+    return hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:16]
+
+def build_bottleneck_prompt(bottleneck, compact=True):
+    """
+    Per-call part of the bottleneck analysis prompt
+    compact=False keeps the fields as scraped, to measure what compaction saves
+    """
+
+    field = compact_field if compact else _raw_field
+
+    return f"""
+BOTTLENECK:
+Industry: {field('industry', bottleneck['industry'], clean=False)}
+Process: {field('process', bottleneck.get('process', 'N/A'), clean=False)}
+Problem: {field('description', bottleneck['description'])}
+"""
+
+def build_reask_suffix(partial, missing):
+    """
+    Suffix asking only for the fields an earlier structured reply lacked
+    """
+
+    return f"""
+YOUR EARLIER ANSWER WAS INCOMPLETE:
+{json.dumps(partial or {})}
+
+Return JSON with only these fields: {', '.join(missing)}
+"""
+
+def build_brief_prompt(bottleneck, patent_landscape, companies, compact=True):
+    """
+    Per-call part of the opportunity brief prompt
+    compact=False keeps the fields as scraped, to measure what compaction saves
+    """
+
+    field = compact_field if compact else _raw_field
+    landscape = format_patent_landscape(patent_landscape)
+    company_lines = format_companies(companies)
+    if compact:
+        landscape = fit_to_budget(landscape, FIELD_BUDGETS['patent_landscape'])
+        company_lines = fit_to_budget(company_lines, FIELD_BUDGETS['companies'])
+
+    return f"""
+OPPORTUNITY DETECTED:
+Industry: {field('industry', bottleneck['industry'], clean=False)}
+Problem: {field('description', bottleneck['description'])}
+Current method limitations: {field('current_limitations', bottleneck.get('current_limitations', 'N/A'))}
+
+PATENT LANDSCAPE:
+{landscape}
+
+TARGET COMPANIES:
+{company_lines}
+"""
+
+def build_resume_suffix(partial_brief, compact=True):
+    """
+    Continuation instructions for resuming an interrupted brief
+    Only the tail of the partial brief is sent, which is enough to continue from
+    """
+
+    tail = fit_to_budget(partial_brief, FIELD_BUDGETS['partial_brief'], keep='tail') if compact else partial_brief
+
+    return f"""
+
+The brief below was interrupted. Continue it exactly where it stops.
+Do not repeat any text that is already written.
+
+PARTIAL BRIEF (END):
+{tail}
+"""
+
+def raw_prompt_tokens(task, capabilities, raw_prompt):
+    """
+    Estimate tokens of a task prompt sent without compaction or caching
+    This is what a call costs when the task prefix is inlined ahead of the
+    per-call prompt built with compact=False
+    """
+
+    return estimate_tokens(build_task_prefix(task, capabilities) + raw_prompt)
+
+def _raw_field(name, text, clean=True):
+    """A prompt field as scraped, the compact=False counterpart of compact_field"""
+    return str(text) if text is not None else ''
+
+class PromptStats:
+    """
+    Per-call record of prompt token savings
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def record(self, call, raw_tokens, sent_tokens, cached_tokens=0):
+        """
+        Record one call's estimated raw and sent prompt tokens
+        saved is negative when the call sent more than the raw prompt would have
+        """
+        saved = raw_tokens - sent_tokens
+        with self._lock:
+            self.calls.append({
+                'call': call,
+                'raw_tokens': raw_tokens,
+                'sent_tokens': sent_tokens,
+                'cached_tokens': cached_tokens,
+                'saved_tokens': saved
+            })
+
+        logger.debug(f"Prompt tokens for {call}: {raw_tokens} -> {sent_tokens} ({_savings(saved, raw_tokens)})")
+
+    def summary(self):
+        """Totals per call type"""
+        totals = {}
+        with self._lock:
+            calls = list(self.calls)
+
+        for c in calls:
+            t = totals.setdefault(c['call'], {'calls': 0, 'raw_tokens': 0, 'sent_tokens': 0,
+                                              'cached_tokens': 0, 'saved_tokens': 0})
+            t['calls'] += 1
+            for key in ('raw_tokens', 'sent_tokens', 'cached_tokens', 'saved_tokens'):
+                t[key] += c[key]
+
+        return totals
+
+    def log_report(self):
+        """Log the token savings per call type"""
+        for call, t in sorted(self.summary().items()):
+            logger.info(
+                f"Prompt savings for {call}: {t['calls']} calls, "
+                f"{t['raw_tokens']} -> {t['sent_tokens']} input tokens "
+                f"({t['cached_tokens']} served from cache, {_savings(t['saved_tokens'], t['raw_tokens'])})"
+            )
+
+def _savings(saved, raw_tokens):
+    """'saved 40%', or 'added 5%' when more was sent than the raw prompt"""
+    pct = 100.0 * saved / raw_tokens if raw_tokens else 0.0
+    return f"saved {pct:.0f}%" if saved >= 0 else f"added {-pct:.0f}%"
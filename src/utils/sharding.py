@@ -0,0 +1,251 @@
+"""
+Sharded monthly scans (scan --shard i/N)
+Crawled pages and report PDFs are split between shards by a stable hash of
+their normalized URL, so every shard of a run agrees on who scans what, in
+any process or on any runner, and each page is processed by one shard only. Each shard writes a manifest of what it found and generated;
+merging the manifests gives the same report as a single-process run
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+SHARDS_DIR = os.path.join(_ROOT, 'data/shards')
+
+# Patent fields kept in manifests; the rest is in the patent details cache
+PATENT_FIELDS = ('number', 'title', 'assignee', 'priority_date', 'publication_date', 'url')
+
+BOTTLENECK_FIELDS = ('industry', 'description', 'source', 'source_url', 'process', 'page')
+
+class Shard:
+    """
+    Shard index (1-based) of count
+    """
+
+    def __init__(self, index, count):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, spec):
+        """Shard from 'i/N', e.g. '2/4'"""
+        try:
+            index, count = (int(part) for part in spec.split('/'))
+        except ValueError:
+            raise ValueError(f"Shard must look like i/N, got {spec!r}")
+        return cls(index, count)
+
+    @property
+    def label(self):
+        return f"shard-{self.index}-of-{self.count}"
+
+    def owns(self, key):
+        return shard_of(key, self.count) == self.index - 1
+
+    def owns_url(self, url):
+        """Whether this shard processes a page or PDF, keyed by its normalized URL"""
+        from industry_intel.report_crawler import normalize_url
+        return self.owns(normalize_url(url) or url)
+
+    def filter_config(self, industries_config):
+        """
+        industries.yaml with only this shard's report_pdfs, and the shard for the crawler
+        Every shard crawls all report_sources, since a page can be linked from
+        any of them, but only parses the pages it owns and follows the links
+        of the others; report PDFs the crawler discovers go the same way
+        """
+
+        config = dict(industries_config)
+        config['report_pdfs'] = [entry for entry in industries_config.get('report_pdfs') or []
+                                 if self.owns_url(entry['url'])]
+        config['shard'] = self
+
+        logger.info(f"{self.label}: crawled pages and {len(config['report_pdfs'])} report PDFs "
+                    f"of {self.count} shards")
+        return config
+
+def shard_of(key, count):
+    """Stable shard number (0-based) of a key; the same in every process and run"""
+    return int(hashlib.sha256(key.encode('utf-8')).hexdigest()[:12], 16) % count
+
+def default_run_id():
+    return datetime.now().strftime('%Y%m%d')
+
+def run_dir(run_id):
+    return os.path.join(SHARDS_DIR, run_id)
+
+def clear_run(run_id):
+    """Remove a run's manifests, so a rerun under the same id starts clean"""
+    directory = run_dir(run_id)
+    if os.path.isdir(directory):
+        logger.info(f"Clearing earlier manifests of run {run_id}")
+        shutil.rmtree(directory)
+
+class ShardRecorder:
+    """
+    What one shard found: bottlenecks through the patent stage, per-profile
+    briefs and deferred bottlenecks, written as the shard's manifest
+    """
+
+    def __init__(self, shard, run_id):
+        self.shard = shard
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self.bottlenecks = []
+
+    def record_bottleneck(self, bottleneck):
+        entry = slim_bottleneck(bottleneck)
+        status = bottleneck.get('patent_status')
+        if status is not None:
+            entry['patent_status'] = dict(status, patents=[slim_patent(p) for p in status.get('patents', [])])
+        with self._lock:
+            self.bottlenecks.append(entry)
+
+    def write(self, profile_files, briefs, deferred, fingerprints):
+        """
+        Write the manifest; briefs: {profile name: brief entries}
+        fingerprints: FingerprintStore.staged() of this shard
+        """
+
+        manifest = {
+            'run_id': self.run_id,
+            'shard': self.shard.index,
+            'shards': self.shard.count,
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'profiles': profile_files,
+            'bottlenecks': self.bottlenecks,
+            'briefs': {name: [dict(entry, brief_file=_relative(entry['brief_file'])) for entry in entries]
+                       for name, entries in briefs.items()},
+            'deferred': [slim_bottleneck(b) for b in deferred],
+            'fingerprints': fingerprints
+        }
+
+        path = os.path.join(run_dir(self.run_id), f"{self.shard.label}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, path)
+
+        logger.info(f"{self.shard.label}: manifest written to {os.path.relpath(path, _ROOT)}")
+        return path
+
+def load_manifests(run_id):
+    """
+    Shard manifests of a run, in shard order
+    Only manifests split the same way as the newest one are used; others are
+    left over from an earlier run under the same id with another shard count
+    Missing shards are logged; the merge goes ahead with the rest
+    """
+
+    directory = run_dir(run_id)
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"No shard manifests for run {run_id} in {directory}")
+
+    manifests = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith('shard-') and name.endswith('.json'):
+            with open(os.path.join(directory, name), 'r') as f:
+                manifests.append(json.load(f))
+
+    if not manifests:
+        raise FileNotFoundError(f"No shard manifests for run {run_id} in {directory}")
+
+    count = max(manifests, key=lambda m: m['finished_at'])['shards']
+    stale = [m for m in manifests if m['shards'] != count]
+    if stale:
+        logger.warning(f"Run {run_id}: ignoring {len(stale)} manifests of an earlier split "
+                       f"({', '.join(sorted({str(m['shards']) for m in stale}))} shards)")
+        manifests = [m for m in manifests if m['shards'] == count]
+
+    manifests.sort(key=lambda m: m['shard'])
+    missing = sorted(set(range(1, count + 1)) - {m['shard'] for m in manifests})
+    if missing:
+        logger.warning(f"Run {run_id}: shards {', '.join(map(str, missing))} of {count} missing, merging the rest")
+
+    return manifests
+
+def merge_manifests(manifests):
+    """
+    Combine shard manifests, first shard first
+    Bottlenecks are deduplicated by sentence, patents by number and briefs by
+    file; a bottleneck deferred by one shard but processed by another counts
+    as processed. Returns the merged run as a dict
+    """
+
+    from industry_intel.fingerprint_store import sentence_hash
+
+    bottlenecks = {}
+    patents = {}
+    briefs = {}
+    pages = {}
+    sentences = {}
+
+    for manifest in manifests:
+        for bottleneck in manifest['bottlenecks']:
+            key = sentence_hash(bottleneck['description'])
+            if key in bottlenecks:
+                continue
+            bottlenecks[key] = bottleneck
+
+            for patent in (bottleneck.get('patent_status') or {}).get('patents', []):
+                entry = patents.setdefault(patent.get('number') or patent.get('url'), dict(patent, industries=[]))
+                if bottleneck['industry'] not in entry['industries']:
+                    entry['industries'].append(bottleneck['industry'])
+
+        for name, entries in manifest['briefs'].items():
+            merged = briefs.setdefault(name, {})
+            for entry in entries:
+                merged.setdefault(entry['brief_file'], entry)
+
+        pages.update(manifest['fingerprints']['pages'])
+        sentences.update(manifest['fingerprints']['sentences'])
+
+    deferred = {}
+    for manifest in manifests:
+        for bottleneck in manifest['deferred']:
+            key = sentence_hash(bottleneck['description'])
+            if key not in bottlenecks:
+                deferred.setdefault(key, bottleneck)
+
+    logger.info(f"Merged {len(manifests)} shards: {len(bottlenecks)} bottlenecks, {len(patents)} patents, "
+                f"{sum(len(b) for b in briefs.values())} briefs, {len(deferred)} deferred")
+
+    return {
+        'run_id': manifests[0]['run_id'],
+        'shards': sorted(m['shard'] for m in manifests),
+        'profiles': manifests[0]['profiles'],
+        'bottlenecks': list(bottlenecks.values()),
+        'patents': list(patents.values()),
+        'briefs': {name: [dict(entry, brief_file=os.path.join(_ROOT, entry['brief_file'])) for entry in entries.values()]
+                   for name, entries in briefs.items()},
+        'deferred': list(deferred.values()),
+        'fingerprints': {'pages': pages, 'sentences': sentences}
+    }
+
+def write_merged(merged):
+    """Keep the merged bottlenecks and patents with the shard manifests"""
+    path = os.path.join(run_dir(merged['run_id']), 'merged.json')
+    record = {k: merged[k] for k in ('run_id', 'shards', 'bottlenecks', 'patents', 'deferred')}
+    with open(path, 'w') as f:
+        json.dump(record, f, indent=1)
+    return path
+
+def slim_bottleneck(bottleneck):
+    return {k: bottleneck[k] for k in BOTTLENECK_FIELDS if k in bottleneck}
+
+def slim_patent(patent):
+    return {k: patent[k] for k in PATENT_FIELDS if patent.get(k)}
+
+def _relative(path):
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(_ROOT))
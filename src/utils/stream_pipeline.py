@@ -0,0 +1,198 @@
+"""
+Streaming stage pipeline for the monthly run
+Each stage has its own worker threads and a bounded inbox, so an item moves on
+as soon as its stage is done and slow stages overlap instead of adding up
+"""
+
+import time
+import queue
+import logging
+import itertools
+import threading
+from utils import profiling
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'patent_workers': 2,
+    'company_workers': 2,
+    'analysis_workers': 4,
+    'brief_workers': 3,
+    'queue_size': 4
+}
+
+_DONE = object()
+
+def pipeline_settings(config=None):
+    """
+    Stage settings from the pipeline: block of industries.yaml
+    """
+
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({k: v for k, v in ((config or {}).get('pipeline') or {}).items() if k in DEFAULT_SETTINGS})
+    return settings
+
+def stream(source, stages, queue_size=4, source_name='source', priority=None, stop_at=None):
+    """
+    Run items from source through stages; yield final results as they complete
+    stages: list of (name, func, workers); func(item) returns the item for the
+    next stage, None to drop it, or a list of items to fan out
+    Every stage inbox holds at most queue_size items, so each stage has at most
+    workers + queue_size items in flight and a slow stage holds back the ones
+    before it. An exception raised by source is re-raised once the items already
+    read have drained; exceptions in a stage only drop that item
+    Under --profile, source and stage work is recorded as phases of those names
+    priority(item): stage inboxes hand out the highest-priority item first
+    stop_at: time.monotonic() at which to stop waiting; items still in the
+    pipeline are abandoned
+    """
+
+    stop = threading.Event()
+    inboxes = [queue.Queue(maxsize=max(1, queue_size)) if priority is None
+               else _PriorityInbox(max(1, queue_size), priority)
+               for _ in range(len(stages) + 1)]
+    stats = [StageStats(name) for name, _, _ in stages]
+    source_error = []
+    threads = []
+
+    def feed():
+        try:
+            items = iter(source)
+            while not stop.is_set():
+                with profiling.phase(source_name):
+                    item = next(items, _DONE)
+                if item is _DONE:
+                    return
+                _put(inboxes[0], item, stop)
+        except Exception as e:
+            source_error.append(e)
+        finally:
+            if hasattr(source, 'close'):
+                source.close()
+            _put(inboxes[0], _DONE, stop)
+
+    threads.append(threading.Thread(target=feed, name='stage-source', daemon=True))
+
+    for index, (name, func, workers) in enumerate(stages):
+        remaining = [max(1, workers)]
+        lock = threading.Lock()
+
+        def work(func=func, inbox=inboxes[index], outbox=inboxes[index + 1],
+                 stage=stats[index], remaining=remaining, lock=lock):
+            while True:
+                item = _get(inbox, stop)
+                if item is _DONE or stop.is_set():
+                    # Let sibling workers see the end too; the last one passes it on
+                    _put(inbox, _DONE, stop)
+                    with lock:
+                        remaining[0] -= 1
+                        last = remaining[0] == 0
+                    if last:
+                        _put(outbox, _DONE, stop)
+                    return
+
+                start = time.monotonic()
+                try:
+                    with profiling.phase(stage.name):
+                        result = func(item)
+                except Exception as e:
+                    logger.warning(f"Stage {stage.name} failed for an item: {e}", exc_info=True)
+                    result = None
+                results = result if isinstance(result, list) else [result] if result is not None else []
+                stage.record(time.monotonic() - start, len(results))
+
+                for result in results:
+                    _put(outbox, result, stop)
+
+        for n in range(max(1, workers)):
+            threads.append(threading.Thread(target=work, name=f"stage-{name}-{n}", daemon=True))
+
+    started = time.monotonic()
+    first = None
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            if stop_at is not None and time.monotonic() >= stop_at:
+                logger.warning("Pipeline stopped at its deadline")
+                break
+            try:
+                item = inboxes[-1].get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                break
+            if first is None:
+                first = time.monotonic() - started
+                logger.info(f"First result after {first:.1f}s")
+            yield item
+
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=1)
+
+        logger.info(f"Pipeline finished in {time.monotonic() - started:.1f}s")
+        for stage in stats:
+            stage.log()
+
+    if source_error:
+        raise source_error[0]
+
+class StageStats:
+    """Items in and out and busy time of one stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.passed = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, passed):
+        with self._lock:
+            self.items += 1
+            self.passed += passed
+            self.busy += seconds
+
+    def log(self):
+        logger.info(f"  {self.name}: {self.items} in, {self.passed} out, {self.busy:.1f}s busy")
+
+class _PriorityInbox(queue.PriorityQueue):
+    """Bounded inbox handing out the highest-priority item first, and the end marker last"""
+
+    def __init__(self, maxsize, priority):
+        super().__init__(maxsize)
+        self._priority = priority
+        self._order = itertools.count()
+
+    def _put(self, item):
+        if item is _DONE:
+            key = float('inf')
+        else:
+            try:
+                key = -self._priority(item)
+            except Exception:
+                key = 0.0
+        super()._put((key, next(self._order), item))
+
+    def _get(self):
+        return super()._get()[2]
+
+def _put(inbox, value, stop):
+    while not stop.is_set():
+        try:
+            inbox.put(value, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+def _get(inbox, stop):
+    while not stop.is_set():
+        try:
+            return inbox.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    return _DONE
@@ -0,0 +1,258 @@
+"""
+Structured JSON output from Gemini
+Response schemas for schema-constrained generation, validation of the
+returned JSON into typed records, and local repair of truncated or slightly
+malformed JSON, so a reply only costs another call if fields are missing
+"""
+
+import re
+import json
+import logging
+import threading
+from typing import TypedDict, get_args, get_origin, get_type_hints
+
+logger = logging.getLogger(__name__)
+
+class BottleneckAnalysis(TypedDict):
+    plasma_applicable: bool
+    applicable_capability: str
+    expected_improvement: str
+    technical_feasibility: float
+    commercial_potential: float
+    risks: list[str]
+    recommendation: str
+
+# Fields an analysis is useless without; the others default when missing
+REQUIRED_FIELDS = {
+    BottleneckAnalysis: ('plasma_applicable', 'technical_feasibility', 'commercial_potential')
+}
+
+# Range of the 0-10 scale fields
+SCORE_FIELDS = ('technical_feasibility', 'commercial_potential')
+
+_DEFAULTS = {bool: False, str: '', float: 0.0, int: 0, list: []}
+
+_JSON_TYPES = {bool: 'boolean', str: 'string', float: 'number', int: 'integer'}
+
+_FENCE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+
+def response_schema(record_type, fields=None):
+    """
+    OpenAPI-style schema for response_schema, optionally only some fields
+    Every listed field is required, so the model cannot leave one out
+    """
+
+    hints = get_type_hints(record_type)
+    names = [name for name in hints if fields is None or name in fields]
+
+    properties = {}
+    for name in names:
+        hint = hints[name]
+        if get_origin(hint) is list:
+            properties[name] = {'type': 'array', 'items': {'type': _JSON_TYPES[get_args(hint)[0]]}}
+        else:
+            properties[name] = {'type': _JSON_TYPES[hint]}
+
+    return {'type': 'object', 'properties': properties, 'required': names}
+
+def parse_record(text, record_type):
+    """
+    Parse a model reply into a record of record_type
+    Returns (record, missing required fields, repaired); record is None if
+    nothing could be recovered from the text
+    """
+
+    data, repaired = loads_lenient(text)
+    if not isinstance(data, dict):
+        return None, list(REQUIRED_FIELDS.get(record_type, ())), repaired
+
+    record, missing = validate_record(data, record_type)
+    return record, missing, repaired
+
+def validate_record(data, record_type):
+    """
+    Coerce data into record_type's fields and types
+    Returns (record, missing required fields); optional fields missing or of
+    an unusable type get their type's default
+    """
+
+    hints = get_type_hints(record_type)
+    required = REQUIRED_FIELDS.get(record_type, ())
+    record = {}
+    missing = []
+
+    for name, hint in hints.items():
+        value = _coerce(data.get(name), hint)
+
+        if value is not None and name in SCORE_FIELDS:
+            value = min(max(value, 0.0), 10.0)
+
+        if value is None:
+            if name in required:
+                missing.append(name)
+                continue
+            base = get_origin(hint) or hint
+            value = list(_DEFAULTS[base]) if base is list else _DEFAULTS[base]
+
+        record[name] = value
+
+    return record, missing
+
+def loads_lenient(text):
+    """
+    json.loads, falling back to a local repair of the usual defects: markdown
+    fences, prose around the object, trailing commas and output cut off
+    mid-object. Returns (data or None, repaired)
+    """
+
+    text = (text or '').strip()
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+
+    candidate = _FENCE.sub('', text)
+    start = candidate.find('{')
+    if start < 0:
+        return None, True
+    candidate = _TRAILING_COMMA.sub(r'\1', candidate[start:])
+
+    end = _object_end(candidate)
+    if end is not None:
+        candidate = candidate[:end]
+    else:
+        candidate = _close_truncated(candidate)
+
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r'\1', candidate)), True
+    except ValueError:
+        return None, True
+
+class OutputStats:
+    """
+    How structured replies turned out: valid, repaired locally, re-asked, failed
+    """
+
+    OUTCOMES = ('valid', 'repaired', 'reasked', 'failed')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(self.OUTCOMES, 0)
+
+    def record(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def log_report(self):
+        total = sum(self.counts.values())
+        if total:
+            logger.info("Structured output: " + ', '.join(f"{self.counts[o]} {o}" for o in self.OUTCOMES)
+                        + f" of {total} replies")
+
+def _coerce(value, hint):
+    """value as hint's type, or None if it cannot be read as one"""
+    if value is None:
+        return None
+
+    if get_origin(hint) is list:
+        if isinstance(value, str):
+            value = [part.strip() for part in re.split(r'[;\n]', value) if part.strip()]
+        if not isinstance(value, list):
+            return None
+        return [str(item) for item in value if item is not None]
+
+    if hint is bool:
+        if isinstance(value, bool):
+            return value
+        lowered = str(value).strip().lower()
+        if lowered in ('true', 'yes', 'y', '1'):
+            return True
+        if lowered in ('false', 'no', 'n', '0'):
+            return False
+        # 'Maybe' and the like are not a usable answer
+        return None
+
+    if hint in (float, int):
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float)):
+            return hint(value)
+        # '7/10', '7 out of 10', '~7'
+        match = _NUMBER.search(str(value))
+        return hint(float(match.group())) if match else None
+
+    if hint is str:
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        return str(value).strip()
+
+    return value
+
+def _object_end(text):
+    """Index just past the first complete top-level object, or None if it is cut off"""
+    depth = 0
+    in_string = False
+    escaped = False
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return index + 1
+
+    return None
+
+def _close_truncated(text):
+    """
+    Close a JSON object cut off mid-way: end the open string, drop a
+    dangling key or separator, and close open arrays and objects
+    """
+
+    stack = []
+    in_string = False
+    escaped = False
+
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+
+    if in_string:
+        text = text[:-1] if escaped else text
+        text += '"'
+
+    text = text.rstrip()
+    if stack and stack[-1] == '}':
+        # A key cut off before its colon
+        text = re.sub(r'(^|[{,])\s*"(?:[^"\\]|\\.)*"$', lambda m: '' if m.group(1) == ',' else m.group(1), text)
+    # A key without its value, or a value cut off after a separator
+    text = re.sub(r',?\s*"[^"]*"\s*:\s*$', '', text)
+    text = re.sub(r'[,:]\s*$', '', text)
+    text = re.sub(r'(\d)\.$', r'\1', text)
+    # Partial literals such as tru or nul
+    text = re.sub(r':\s*(t|tr|tru|f|fa|fal|fals|n|nu|nul)$', ': null', text)
+
+    return text + ''.join(reversed(stack))
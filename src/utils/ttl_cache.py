@@ -0,0 +1,84 @@
+"""
+In-process result cache with expiry
+Keeps search results warm for repeated queries within a run or a long-running service
+"""
+
+import copy
+import time
+import logging
+import threading
+import functools
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+def ttl_cache(ttl_seconds=6 * 3600, maxsize=512, cache_empty=False, cache_if=None):
+    """
+    Memoize a function on its arguments for ttl_seconds
+    Empty results are not cached unless cache_empty is set, since the
+    scrapers return [] on transient fetch errors; cache_if(value) replaces
+    that test for results that are never empty containers
+    Cached values are deep-copied so callers can modify what they get
+    Concurrent calls with the same arguments wait for the first one instead
+    of repeating it
+    """
+
+    def decorator(func):
+        entries = OrderedDict()
+        lock = threading.Lock()
+        in_flight = {}
+        stats = {'hits': 0, 'misses': 0}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+
+            while True:
+                now = time.monotonic()
+
+                with lock:
+                    entry = entries.get(key)
+                    if entry is not None and entry[0] > now:
+                        entries.move_to_end(key)
+                        stats['hits'] += 1
+                        return copy.deepcopy(entry[1])
+
+                    pending = in_flight.get(key)
+                    if pending is None:
+                        stats['misses'] += 1
+                        in_flight[key] = done = threading.Event()
+                        break
+
+                # Another thread is computing this key; use its result if it was cached
+                pending.wait()
+
+            try:
+                value = func(*args, **kwargs)
+
+                if cache_if(value) if cache_if is not None else (value or cache_empty):
+                    with lock:
+                        entries[key] = (now + ttl_seconds, copy.deepcopy(value))
+                        entries.move_to_end(key)
+                        while len(entries) > maxsize:
+                            entries.popitem(last=False)
+
+            finally:
+                with lock:
+                    del in_flight[key]
+                done.set()
+
+            return value
+
+        def cache_info():
+            with lock:
+                return {'hits': stats['hits'], 'misses': stats['misses'], 'size': len(entries)}
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,10 @@
+"""
+Tests run against src/ the way bin/patent-scout does
+"""
+
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
@@ -0,0 +1,54 @@
+"""
+Command line argument and input file handling
+"""
+
+import json
+
+import cli
+from invention_miner import prior_art_search
+
+def _batch(tmp_path, monkeypatch, content):
+    seen = []
+
+    def check_prior_art_batch(inventions):
+        seen.append(list(inventions))
+        return [{'invention': i, 'prior_art_found': [], 'white_space': True} for i in inventions]
+
+    monkeypatch.setattr(prior_art_search, 'check_prior_art_batch', check_prior_art_batch)
+    path = tmp_path / 'inventions'
+    path.write_text(content)
+    args = cli.build_parser().parse_args(['prior-art', '--no-save', '--batch', str(path)])
+    return cli.cmd_prior_art(args), seen
+
+def test_batch_json_list(tmp_path, monkeypatch):
+    code, seen = _batch(tmp_path, monkeypatch, json.dumps(['plasma reactor', 'arc discharge']))
+
+    assert code == 0
+    assert seen == [['plasma reactor', 'arc discharge']]
+
+def test_batch_one_per_line(tmp_path, monkeypatch):
+    code, seen = _batch(tmp_path, monkeypatch, 'plasma reactor\n\narc discharge\n')
+
+    assert code == 0
+    assert seen == [['plasma reactor', 'arc discharge']]
+
+def test_batch_rejects_json_object(tmp_path, monkeypatch, capsys):
+    code, seen = _batch(tmp_path, monkeypatch, json.dumps({'invention': 'plasma reactor'}))
+
+    assert code == 2
+    assert seen == []
+    assert 'JSON list' in capsys.readouterr().err
+
+def test_batch_rejects_list_of_objects(tmp_path, monkeypatch, capsys):
+    code, seen = _batch(tmp_path, monkeypatch, json.dumps([{'invention': 'plasma reactor'}]))
+
+    assert code == 2
+    assert seen == []
+    assert 'JSON list' in capsys.readouterr().err
+
+def test_batch_rejects_invalid_json(tmp_path, monkeypatch, capsys):
+    code, seen = _batch(tmp_path, monkeypatch, '["plasma reactor",')
+
+    assert code == 2
+    assert seen == []
+    assert 'not valid JSON' in capsys.readouterr().err
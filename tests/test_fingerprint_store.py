@@ -0,0 +1,114 @@
+"""
+Fingerprint staging: what a run commits decides what later runs skip
+"""
+
+import pytest
+
+from industry_intel.fingerprint_store import FingerprintStore, ProcessedLedger
+
+PAGE = '<html><body><p>Lithium refining is slow.</p><script>var nonce = 1;</script></body></html>'
+
+def _bottleneck(description, url='https://example.org/report'):
+    return {'industry': 'critical_minerals', 'description': description, 'source_url': url}
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'fingerprints.sqlite')
+
+def test_unchanged_page_skipped_after_commit(path):
+    store = FingerprintStore(path)
+    assert not store.page_unchanged('https://example.org/report', PAGE)
+    store.commit()
+
+    reopened = FingerprintStore(path)
+    # Scripts and whitespace do not count as a change
+    restyled = PAGE.replace('nonce = 1', 'nonce = 2').replace('refining is', 'refining\n  is')
+    assert reopened.page_unchanged('https://example.org/report', restyled)
+    assert not reopened.page_unchanged('https://example.org/report', PAGE.replace('slow', 'fast'))
+    assert reopened.skipped_pages == 1
+
+def test_committed_sentences_are_known(path):
+    store = FingerprintStore(path)
+    assert len(store.new_bottlenecks([_bottleneck('Lithium refining is slow.')] * 2)) == 1
+    store.commit()
+
+    assert FingerprintStore(path).new_bottlenecks([_bottleneck('LITHIUM  refining is slow.')]) == []
+
+def test_uncommitted_sentences_stay_new(path):
+    store = FingerprintStore(path)
+    store.new_bottlenecks([_bottleneck('Lithium refining is slow.')])
+
+    assert len(FingerprintStore(path).new_bottlenecks([_bottleneck('Lithium refining is slow.')])) == 1
+
+def test_released_sentences_reappear_after_commit(path):
+    store = FingerprintStore(path)
+    store.page_unchanged('https://example.org/report', PAGE)
+    kept, released = store.new_bottlenecks([_bottleneck('Lithium refining is slow.'),
+                                            _bottleneck('Cobalt leaching is costly.')])
+    store.release([released])
+    store.commit()
+
+    reopened = FingerprintStore(path)
+    assert reopened.new_bottlenecks([kept, released]) == [released]
+    # The page of a released sentence is fetched and parsed again
+    assert not reopened.page_unchanged('https://example.org/report', PAGE)
+
+def test_retain_only_unstages_the_rest(path):
+    store = FingerprintStore(path)
+    store.page_unchanged('https://example.org/report', PAGE)
+    passed, unseen = store.new_bottlenecks([_bottleneck('Lithium refining is slow.'),
+                                            _bottleneck('Cobalt leaching is costly.')])
+    store.retain_only([passed])
+    store.discard_pages()
+
+    # Nothing more is staged once the run was cut short
+    assert store.new_bottlenecks([_bottleneck('Nickel matte smelting is dirty.')]) == []
+    store.commit()
+
+    reopened = FingerprintStore(path)
+    assert reopened.new_bottlenecks([passed, unseen]) == [unseen]
+    assert not reopened.page_unchanged('https://example.org/report', PAGE)
+
+def test_full_rescan_sees_everything_again(path):
+    store = FingerprintStore(path)
+    store.new_bottlenecks([_bottleneck('Lithium refining is slow.')])
+    store.commit()
+
+    assert len(FingerprintStore(path, full_rescan=True).new_bottlenecks([_bottleneck('Lithium refining is slow.')])) == 1
+
+def test_staged_round_trip(path, tmp_path):
+    shard = FingerprintStore(str(tmp_path / 'shard.sqlite'))
+    shard.page_unchanged('https://example.org/report', PAGE)
+    shard.new_bottlenecks([_bottleneck('Lithium refining is slow.')])
+
+    merged = FingerprintStore(path)
+    merged.stage(shard.staged())
+    merged.commit()
+
+    reopened = FingerprintStore(path)
+    assert reopened.new_bottlenecks([_bottleneck('Lithium refining is slow.')]) == []
+    assert reopened.page_unchanged('https://example.org/report', PAGE)
+
+def test_ledger_settles_only_finished_bottlenecks():
+    filtered, briefed, failed, partly, held, dropped = (_bottleneck(f'Bottleneck {i}.') for i in range(6))
+    ledger = ProcessedLedger()
+    list(ledger.track(iter([filtered, briefed, failed, partly, held, dropped])))
+
+    ledger.settle(filtered)
+    ledger.expect(briefed, 1)
+    ledger.branch_done(briefed)
+    ledger.expect(failed, 1)
+    ledger.expect(partly, 2)
+    ledger.branch_done(partly)
+    ledger.expect(held, 1, hold=True)
+    ledger.branch_done(held)
+
+    assert ledger.unsettled() == [failed, partly, held, dropped]
+
+def test_ledger_no_branches_is_settled():
+    bottleneck = _bottleneck('Lithium refining is slow.')
+    ledger = ProcessedLedger()
+    list(ledger.track(iter([bottleneck])))
+    ledger.expect(bottleneck, 0)
+
+    assert ledger.unsettled() == []
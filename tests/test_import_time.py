@@ -0,0 +1,59 @@
+"""
+The CLI imports only what a subcommand needs
+Checked in a fresh interpreter, so modules imported by other tests do not count
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+from conftest import SRC
+
+# Modules the prior-art path must not load; they are slow to import
+HEAVY_MODULES = ('yaml', 'bs4', 'lxml', 'pypdf', 'google.generativeai')
+
+# Seconds allowed for importing cli and running the prior-art path (network stubbed out)
+IMPORT_BUDGET_SECONDS = 1.5
+
+_CHILD = """
+import sys
+import json
+import time
+
+start = time.perf_counter()
+import cli
+import utils.logging_config
+from invention_miner import prior_art_search
+
+utils.logging_config.LOG_DIR = {log_dir!r}
+prior_art_search.search_google_patents = lambda query, max_results=30: []
+
+codes = [cli.main(['prior-art', '--no-save', 'Plasma-assisted lithium extraction from brine']),
+         cli.main(['prior-art', '--no-save', '--batch', {batch!r}])]
+elapsed = time.perf_counter() - start
+
+print(json.dumps({{'codes': codes, 'seconds': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+def _run_prior_art(tmp_path):
+    batch = tmp_path / 'inventions.json'
+    batch.write_text(json.dumps(['Plasma reactor for nitrogen fixation', 'Carbon nanotube growth by arc discharge']))
+
+    child = _CHILD.format(log_dir=str(tmp_path / 'logs'), batch=str(batch))
+    completed = subprocess.run([sys.executable, '-c', child], cwd=SRC, capture_output=True, text=True,
+                               env=dict(os.environ, PYTHONPATH=SRC), timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def test_prior_art_skips_heavy_modules(tmp_path):
+    result = _run_prior_art(tmp_path)
+
+    assert result['codes'] == [0, 0]
+    loaded = [name for name in HEAVY_MODULES if name in result['modules']]
+    assert loaded == []
+
+def test_prior_art_import_budget(tmp_path):
+    result = _run_prior_art(tmp_path)
+
+    assert result['seconds'] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,100 @@
+"""
+Landscape store: append-only quarterly history, legacy imports and CPC samples
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from patent_landscape.landscape_store import LandscapeStore
+
+def _patent(number, *cpc_codes):
+    return {'number': number, 'title': f'Plasma process {number}', 'cpc_codes': list(cpc_codes)}
+
+def _landscape(total, *patents):
+    return {'total_patents': total, 'plasma_patents': len(patents), 'white_space': not patents,
+            'patents': list(patents)}
+
+Q1 = {
+    'battery': _landscape(40, _patent('US1', 'H01M'), _patent('US2', 'H01M', 'C22B')),
+    'rare_earth': _landscape(12)
+}
+
+Q2 = {
+    'battery': _landscape(45, _patent('US2', 'H01M', 'C22B'), _patent('US3', 'C22B')),
+    'rare_earth': _landscape(15, _patent('US4'))
+}
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'landscape.sqlite')
+
+@pytest.fixture
+def store(path):
+    with LandscapeStore(path) as store:
+        yield store
+
+def test_legacy_json_imported_once(path, tmp_path):
+    (tmp_path / 'quarterly_20260101.json').write_text(json.dumps(Q1))
+    (tmp_path / 'quarterly_20260401.json').write_text(json.dumps(Q2))
+    (tmp_path / 'notes.json').write_text('{}')
+
+    with LandscapeStore(path) as store:
+        assert store.snapshot_dates() == ['2026-01-01', '2026-04-01']
+
+    with LandscapeStore(path) as store:
+        assert store.import_json_snapshots(str(tmp_path)) == 0
+        assert len(store.trend('battery')) == 2
+
+def test_trend_is_append_only(store):
+    store.record_snapshot(Q1, snapshot_date='2026-01-01')
+    store.record_snapshot(Q2, snapshot_date='2026-04-01')
+
+    assert [(t['date'], t['total_patents'], t['white_space']) for t in store.trend('rare_earth')] == [
+        ('2026-01-01', 12, True), ('2026-04-01', 15, False)
+    ]
+    assert store.trend('battery', since='2026-02-01')[0]['total_patents'] == 45
+
+    # Re-recording a quarter replaces that quarter only
+    store.record_snapshot(Q1, snapshot_date='2026-04-01')
+    assert [t['total_patents'] for t in store.trend('battery')] == [40, 40]
+
+def test_diff_between_snapshots(store):
+    store.record_snapshot(Q1, snapshot_date='2026-01-01')
+    store.record_snapshot(Q2, snapshot_date='2026-04-01')
+
+    changes = store.diff('2026-01-01', '2026-04-01')
+    assert changes['battery'] == {
+        'total_delta': 5, 'plasma_delta': 0, 'white_space': [False, False],
+        'new_patents': ['US3'], 'dropped_patents': ['US1']
+    }
+    assert changes['rare_earth']['white_space'] == [True, False]
+    assert changes['rare_earth']['new_patents'] == ['US4']
+
+def test_cpc_codes_are_samples(store):
+    store.record_snapshot(Q1, snapshot_date='2026-01-01')
+    store.record_snapshot(Q2, snapshot_date='2026-04-01')
+
+    assert store.keys('cpc') == ['C22B', 'H01M']
+    assert store.trend('C22B', dimension='cpc') == [
+        {'date': '2026-01-01', 'sampled_patents': 1}, {'date': '2026-04-01', 'sampled_patents': 2}
+    ]
+    assert store.diff('2026-01-01', '2026-04-01', dimension='cpc')['H01M'] == {
+        'sampled_delta': -1, 'new_patents': [], 'dropped_patents': ['US1']
+    }
+    # No made-up totals or white space for CPC codes
+    assert store.keys('industry') == ['battery', 'rare_earth']
+
+def test_cpc_counts_migrated_to_samples(path):
+    with LandscapeStore(path):
+        pass
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("INSERT INTO counts VALUES ('2025-10-01', 'cpc', 'H01M', 3, 3, 0)")
+    conn.close()
+
+    with LandscapeStore(path) as store:
+        assert store.trend('H01M', dimension='cpc') == [{'date': '2025-10-01', 'sampled_patents': 3}]
+        assert store.conn.execute("SELECT COUNT(*) FROM counts WHERE dimension = 'cpc'").fetchone()[0] == 0
@@ -0,0 +1,45 @@
+"""
+Event endpoint input handling
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from service import ScoutService, ServiceRequestHandler
+
+@pytest.fixture
+def server():
+    handler = type('BoundServiceRequestHandler', (ServiceRequestHandler,), {'service': ScoutService(workers=1)})
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def _post(url, body):
+    request = urllib.request.Request(f"{url}/events", data=body, method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+@pytest.mark.parametrize('body', [b'[1, 2]', b'"event"', b'42', b'null', b'{"source": '])
+def test_non_object_event_is_rejected(server, body):
+    status, reply = _post(server, body)
+
+    assert status == 400
+    assert reply['error']
+
+def test_unknown_action_is_rejected(server):
+    status, reply = _post(server, json.dumps({'source': 'sentinel', 'action': 'launch'}).encode('utf-8'))
+
+    assert status == 400
+    assert 'Unsupported action' in reply['error']
@@ -0,0 +1,97 @@
+"""
+Sharded scans: every page is processed by one shard, and the merge adds up to one run
+"""
+
+import types
+
+import pytest
+
+from industry_intel import report_crawler
+from industry_intel.report_crawler import ReportCrawler, crawl_settings
+from utils.sharding import Shard, merge_manifests
+
+SOURCE = 'https://example.org/reports'
+LINKS = [f'{SOURCE}/page-{i}' for i in range(40)]
+PDFS = [f'{SOURCE}/report-{i}.pdf' for i in range(20)]
+HUB = ''.join(f'<a href="{url}">x</a>' for url in LINKS + PDFS)
+
+@pytest.fixture
+def shards():
+    return [Shard(index, 3) for index in range(1, 4)]
+
+def _crawler(shard, **settings):
+    settings = dict(crawl_settings(), respect_robots=False, **settings)
+    return ReportCrawler([{'url': SOURCE}], settings, owns=shard.owns_url)
+
+def _queued(crawler):
+    return {url for urls in crawler._queues.values() for url, _, _ in urls}
+
+def test_leaf_pages_and_pdfs_split_between_shards(shards):
+    queued, pdfs = [], []
+    for shard in shards:
+        crawler = _crawler(shard, max_depth=1)
+        crawler._queues.clear()
+        crawler._add_links(SOURCE, HUB, 0, 0)
+        queued.append(_queued(crawler))
+        pdfs.append(set(crawler.pdf_urls))
+
+    for found, expected in ((queued, LINKS), (pdfs, PDFS)):
+        assert sorted(url for urls in found for url in urls) == sorted(expected)
+
+def test_pages_with_links_to_follow_are_fetched_by_every_shard(shards):
+    for shard in shards:
+        crawler = _crawler(shard, max_depth=2)
+        crawler._queues.clear()
+        crawler._add_links(SOURCE, HUB, 0, 0)
+        assert _queued(crawler) == set(LINKS)
+
+def test_other_shards_pages_are_not_parsed(shards, monkeypatch):
+    response = types.SimpleNamespace(status_code=200, headers={'Content-Type': 'text/html'}, content=HUB.encode())
+    monkeypatch.setattr(report_crawler, 'fetch_with_proxy', lambda url: response)
+
+    parsed = []
+    for shard in shards:
+        crawler = _crawler(shard)
+        for url in LINKS:
+            crawler._active[report_crawler.urlparse(url).netloc] = 1
+            crawler._in_flight = 1
+            if crawler.fetch((url, 1, 0)) is not None:
+                parsed.append(url)
+
+    assert sorted(parsed) == sorted(LINKS)
+
+def _manifest(shard, bottlenecks, briefs=(), deferred=()):
+    return {
+        'run_id': '20260101',
+        'shard': shard,
+        'shards': 2,
+        'profiles': ['yatom_research_profile.yaml'],
+        'bottlenecks': bottlenecks,
+        'briefs': {'yatom': [{'title': 'battery Opportunity', 'brief_file': path} for path in briefs]},
+        'deferred': list(deferred),
+        'fingerprints': {'pages': {f'https://example.org/{shard}': 'h'}, 'sentences': {}}
+    }
+
+def _bottleneck(description, industry='battery', patents=()):
+    return {'industry': industry, 'description': description,
+            'patent_status': {'white_space': not patents, 'patents': [{'number': n} for n in patents]}}
+
+def test_merge_deduplicates_bottlenecks_patents_and_briefs():
+    merged = merge_manifests([
+        _manifest(1, [_bottleneck('Lithium refining is slow.', patents=['US1', 'US2'])],
+                  briefs=['data/opportunities/a.md'],
+                  deferred=[_bottleneck('Cathode recycling loses cobalt.')]),
+        _manifest(2, [_bottleneck('LITHIUM  refining is slow.', patents=['US1']),
+                      _bottleneck('Cathode recycling loses cobalt.', industry='recycling', patents=['US1'])],
+                  briefs=['data/opportunities/a.md', 'data/opportunities/b.md'])
+    ])
+
+    assert [b['description'] for b in merged['bottlenecks']] == ['Lithium refining is slow.',
+                                                                'Cathode recycling loses cobalt.']
+    assert {p['number']: p['industries'] for p in merged['patents']} == {'US1': ['battery', 'recycling'],
+                                                                         'US2': ['battery']}
+    assert sorted(entry['brief_file'].rsplit('/', 1)[1] for entry in merged['briefs']['yatom']) == ['a.md', 'b.md']
+    # Deferred by shard 1 but processed by shard 2
+    assert merged['deferred'] == []
+    assert merged['shards'] == [1, 2]
+    assert len(merged['fingerprints']['pages']) == 2
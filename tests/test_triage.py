@@ -0,0 +1,76 @@
+"""
+Local triage scoring
+"""
+
+import pytest
+
+from main import load_config
+from opportunity_engine.triage import (
+    AUDITED, OVER_BUDGET, REJECTED, SELECTED, TriageGate, TriageScorer, is_boilerplate, triage_settings
+)
+
+BOILERPLATE = [
+    'Our website uses cookies; recycling challenge page',
+    'Accept cookies to read about critical mineral supply chains',
+    'Privacy policy | Terms of use | Battery recycling news',
+    'Sign in to download the rare earth separation report',
+    'Subscribe to our newsletter on lithium extraction',
+    'Copyright 2024 Critical Minerals Association. All rights reserved.'
+]
+
+BOTTLENECKS = [
+    'Rare earth separation needs hundreds of solvent extraction stages',
+    'Battery recycling recovers less than half of the lithium in black mass',
+    'Carbon nanotube synthesis by chemical vapor deposition is slow and energy-intensive'
+]
+
+@pytest.fixture(scope='module')
+def configs():
+    return load_config('yatom_research_profile.yaml'), load_config('industries.yaml')
+
+def _bottleneck(description):
+    return {'industry': 'critical_minerals', 'description': description}
+
+@pytest.mark.parametrize('sentence', BOILERPLATE)
+def test_boilerplate_scores_zero(configs, sentence):
+    assert is_boilerplate(sentence)
+    assert TriageScorer(*configs).score(_bottleneck(sentence)) == 0.0
+
+@pytest.mark.parametrize('sentence', BOTTLENECKS)
+def test_bottlenecks_pass(configs, sentence):
+    profile, industries = configs
+
+    assert not is_boilerplate(sentence)
+    assert TriageScorer(profile, industries).score(_bottleneck(sentence)) >= triage_settings(industries)['min_score']
+
+def _gate(configs, **settings):
+    profile, industries = configs
+    return TriageGate(TriageScorer(profile, industries), dict(triage_settings(industries), **settings), seed=0)
+
+def test_boilerplate_never_reaches_gemini(configs):
+    gate = _gate(configs, audit_sample=len(BOILERPLATE))
+
+    for sentence in BOILERPLATE * 10:
+        assert gate.admit(_bottleneck(sentence))[0] == REJECTED
+
+def test_top_k_leaves_the_rest_for_the_next_run(configs):
+    gate = _gate(configs, top_k=2)
+
+    decisions = [gate.admit(_bottleneck(s))[0] for s in BOTTLENECKS]
+    assert decisions == [SELECTED, SELECTED, OVER_BUDGET]
+
+def test_audit_sample_is_bounded(configs):
+    gate = _gate(configs, min_score=1.1, audit_sample=2)
+
+    decisions = [gate.admit(_bottleneck(s))[0] for s in BOTTLENECKS * 20]
+    assert decisions.count(AUDITED) == 2
+    assert SELECTED not in decisions
+
+def test_cascade_report(configs):
+    gate = _gate(configs, top_k=1, min_score=0.0)
+    gate.admit(_bottleneck(BOTTLENECKS[0]))
+    gate.record(SELECTED, True)
+
+    report = gate.log_report('yatom')
+    assert report['precision'] == 1.0
+    assert report['recall'] == 1.0